@@ -0,0 +1,217 @@
+"""Structured JSON access and event log, written off the request path.
+
+One JSON object per line. Every request is logged as event 'request' with
+its method, path, endpoint, status, user id, role, latency, database time
+and query count (from metrics.py), and size when known. Application events
+such as failed logins go through log_event().
+
+A request thread only puts a dict on a bounded queue (ACCESS_LOG_QUEUE
+entries). One background thread takes up to ACCESS_LOG_BATCH records at a
+time, formats them and writes them in a few large writes. Each write is at
+most PIPE_BUF bytes and ends on a line, so lines from several gunicorn
+workers sharing stdout never interleave. When the queue is full a record
+is dropped and counted rather than blocking the request. The counters are
+at /admin/accesslog.
+
+ACCESS_LOG is '-' for stdout, a file path, or '' for off. Gunicorn's own
+access log is off while this one is on.
+"""
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+
+from flask import has_request_context, request, session
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Largest write that a pipe keeps whole when several processes write to it
+CHUNK_BYTES = getattr(select, 'PIPE_BUF', 4096)
+
+_STOP = object()
+
+
+class AsyncWriter:
+    """Bounded queue of records drained by one writer thread"""
+
+    def __init__(self, target=None, queue_size=10000, batch_size=256):
+        self.target = target
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._fd = None
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+
+    def configure(self, target, queue_size=10000, batch_size=256):
+        self.close()
+        self.target = target
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=queue_size)
+
+    @property
+    def enabled(self):
+        return bool(self.target)
+
+    def put(self, record):
+        """Queue record for writing; False (and counted) if the queue is full"""
+        if self._thread is None or not self._thread.is_alive():
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='access-log', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = _STOP in batch
+            records = [record for record in batch if record is not _STOP]
+            try:
+                if records:
+                    self._write(records)
+            except OSError as e:
+                self.errors += 1
+                logger.error("Access log write to %s failed: %s", self.target, e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, records):
+        if self._fd is None:
+            if self.target == '-':
+                self._fd = 1
+            else:
+                self._fd = os.open(self.target, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        chunk = b''
+        for record in records:
+            line = format_record(record)
+            if chunk and len(chunk) + len(line) > CHUNK_BYTES:
+                _write_all(self._fd, chunk)
+                chunk = b''
+            chunk += line
+        _write_all(self._fd, chunk)
+        self.written += len(records)
+        self.batches += 1
+
+    def flush(self):
+        """Block until every queued record has been written"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self, timeout=5):
+        """Write what is queued and stop the thread (gunicorn worker_exit)"""
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        self._thread = None
+        if self._fd not in (None, 1):
+            os.close(self._fd)
+        self._fd = None
+
+    def stats(self):
+        return {
+            'pid': os.getpid(),
+            'target': self.target,
+            'queued': self._queue.qsize(),
+            'capacity': self._queue.maxsize,
+            'written': self.written,
+            'batches': self.batches,
+            'dropped': self.dropped,
+            'errors': self.errors,
+        }
+
+
+def _write_all(fd, data):
+    while data:
+        data = data[os.write(fd, data):]
+
+
+def format_record(record):
+    """JSON line with the record's epoch time as an ISO 8601 UTC timestamp"""
+    record = dict(record)
+    at = record.pop('time')
+    record = {'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(at)) + f'.{int(at % 1 * 1000):03d}Z',
+              **record}
+    return (json.dumps(record, default=str, separators=(',', ':')) + '\n').encode()
+
+
+writer = AsyncWriter()
+
+
+def log_event(event, **fields):
+    """Log an application event (with the endpoint and client of the current request)"""
+    record = {'time': time.time(), 'event': event}
+    if has_request_context():
+        record['endpoint'] = request.endpoint
+        record['remote_addr'] = request.remote_addr
+    record.update(fields)
+    if writer.enabled:
+        writer.put(record)
+    else:
+        logger.info("%s %s", event, json.dumps(fields, default=str))
+
+
+def _record_response(response):
+    if not writer.enabled:
+        return response
+    record = {
+        'time': time.time(),
+        'event': 'request',
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'user_id': session.get('user_id'),
+        'role': session.get('role'),
+        'remote_addr': request.remote_addr,
+        'bytes': response.content_length,
+    }
+
+    def enqueue():
+        # When the last byte has been sent; metrics records the request after this
+        current = metrics.request_stats()
+        if current is not None:
+            seconds, db_seconds, queries = current
+            record['latency_ms'] = round(seconds * 1000, 3)
+            record['db_ms'] = round(db_seconds * 1000, 3)
+            record['queries'] = queries
+        writer.put(record)
+
+    response.call_on_close(enqueue)
+    return response
+
+
+def init_app(app):
+    """Log every request (after metrics.init_app, whose per-request counts it reads)"""
+    target = app.config.get('ACCESS_LOG') or None
+    writer.configure(target, app.config.get('ACCESS_LOG_QUEUE', 10000), app.config.get('ACCESS_LOG_BATCH', 256))
+    if target:
+        app.after_request(_record_response)
@@ -1,44 +1,142 @@
-from flask import Flask, session, redirect, url_for
-from config import Config
+import os
+import threading
+from importlib import import_module
+
+from flask import Flask, redirect, url_for
+from config import config_by_name
 from extensions import db
+import access_log
+import metrics
+import pool_metrics
+import profiler
+import query_stats
+import replicas
+import session_store
+import single_flight
+import slow_queries
+import templating
+import unit_of_work
+
+# Modules defining the models, imported so SQLAlchemy knows every table
+MODELS = [
+    'models.user',
+    'models.student',
+    'models.instructor',
+    'models.ta',
+    'models.admin',
+    'models.courses',
+    'models.enrollment',
+    'models.assignment',
+    'models.announcement',
+    'models.submission',
+]
+
+# (module, attribute) of each blueprint
+BLUEPRINTS = [
+    ('controllers.auth_controller', 'auth_bp'),
+    ('controllers.student_controller', 'student_bp'),
+    ('controllers.TA_controller', 'ta_bp'),
+    ('controllers.admin_controller', 'admin_bp'),
+    # ('controllers.instructor_controller', 'instructor_bp'),
+]
+
 
-app = Flask(__name__)
-app.config.from_object(Config)
-db.init_app(app)
-
-# Import all models
-with app.app_context():
-    # Import models to register them with SQLAlchemy
-    from models.user import User
-    from models.student import Student
-    from models.instructor import Instructor
-    from models.ta import TA
-    from models.admin import Admin
-    from models.courses import Course
-    from models.enrollment import Enrollment
-    from models.assignment import Assignment
-    from models.announcement import Announcement
-    from models.submission import Submission
-
-# Import blueprints
-from controllers.auth_controller import auth_bp
-from controllers.student_controller import student_bp
-from controllers.TA_controller import ta_bp
-from controllers.admin_controller import admin_bp
-# from controllers.instructor_controller import instructor_bp
-
-app.secret_key = 'dev-secret-key-change-this'
-
-# Register blueprints
-app.register_blueprint(auth_bp)
-app.register_blueprint(student_bp)
-app.register_blueprint(ta_bp)
-app.register_blueprint(admin_bp)
-# app.register_blueprint(instructor_bp)
-
-@app.route('/')
 def index():
     return redirect(url_for('auth.login'))
 
+
+def register_blueprints(app):
+    for module, name in BLUEPRINTS:
+        app.register_blueprint(getattr(import_module(module), name))
+
+
+class LazyBlueprints:
+    """WSGI wrapper that imports and registers the blueprints on the first request.
+
+    CLI commands, model tests and the dev reloader never pay for the controllers;
+    call load() first when the URL map is needed without a request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.loaded = False
+        self._lock = threading.Lock()
+        app.wsgi_app = self
+        app.extensions['lazy_blueprints'] = self
+
+    def load(self):
+        if self.loaded:
+            return
+        with self._lock:
+            if not self.loaded:
+                register_blueprints(self.app)
+                self.loaded = True
+
+    def __call__(self, environ, start_response):
+        self.load()
+        return self.wsgi_app(environ, start_response)
+
+
+def load_blueprints(app):
+    """Make sure every blueprint is registered (no-op when they were loaded eagerly)"""
+    lazy = app.extensions.get('lazy_blueprints')
+    if lazy:
+        lazy.load()
+
+
+def create_app(config=None):
+    """Build the application.
+
+    config is a profile name ('development', 'testing', 'production'), a config
+    class/object, or None to use the APP_CONFIG environment variable
+    (default 'development').
+    """
+    if config is None:
+        config = os.environ.get('APP_CONFIG', 'development')
+    if isinstance(config, str):
+        config = config_by_name[config]
+
+    app = Flask(__name__)
+    app.config.from_object(config)
+    pool_metrics.configure(app)
+    db.init_app(app)
+    # Before the unit of work so the stickiness hook sees its final commit
+    replicas.init_app(app)
+    pool_metrics.init_app(app)
+    metrics.init_app(app)
+    access_log.init_app(app)
+    profiler.init_app(app)
+    query_stats.init_app(app)
+    slow_queries.init_app(app)
+    single_flight.init_app(app)
+    unit_of_work.init_app(app)
+    templating.init_app(app)
+    session_store.init_app(app)
+
+    for module in MODELS:
+        import_module(module)
+
+    if app.config.get('LAZY_BLUEPRINTS'):
+        LazyBlueprints(app)
+    else:
+        register_blueprints(app)
+    app.add_url_rule('/', 'index', index)
+    if app.config.get('TEMPLATE_WARMUP'):
+        templating.warm_templates(app)
+
+    from commands import register_commands
+    register_commands(app)
+    from jobs import schedule_jobs
+    schedule_jobs(app)
+
+    return app
+
+
 if __name__ == '__main__':
+    app = create_app('development')
+    # Only in the reloader's serving process, not in the one watching files
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        from jobs import start_scheduled_jobs
+        start_scheduled_jobs(app)
     app.run(debug=True, port=5000)
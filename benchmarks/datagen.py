@@ -0,0 +1,259 @@
+"""Synthetic university generator for scale testing.
+
+Creates students, instructors/TAs, courses with realistic schedules,
+capacity-respecting enrollments, assignments, submissions and announcements,
+deterministically from a seed, and bulk-loads them with executemany.
+
+    python -m benchmarks.datagen --url sqlite:///university.db --students 50000 --courses 2000
+
+Staff and courses are built with factory-boy; the high-volume tables use
+Faker-seeded name/word pools so generation keeps up with the loader. Every
+row is reproducible from --seed except the password-hash salt (all users
+share one hash of 'password123'). All ids are assigned here, so the target
+tables should be empty (use --reset). seats_left and the assignment
+aggregate columns are filled in consistently with the generated rows.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import factory
+from factory.random import reseed_random
+from faker import Faker
+from sqlalchemy import create_engine, event
+from werkzeug.security import generate_password_hash
+
+from extensions import db
+
+DEPARTMENTS = {
+    'Computer Science': 'CS',
+    'Mathematics': 'MATH',
+    'Physics': 'PHYS',
+    'Chemistry': 'CHEM',
+    'Biology': 'BIO',
+    'Economics': 'ECON',
+    'History': 'HIST',
+    'English': 'ENG',
+    'Psychology': 'PSY',
+    'Engineering': 'ENGR',
+}
+LEVELS = ['Freshman', 'Sophomore', 'Junior', 'Senior']
+DAY_PATTERNS = ['Mon/Wed', 'Tue/Thu', 'Mon/Wed/Fri', 'Tue/Thu/Fri', 'Fri', 'Sat']
+TIME_SLOTS = ['8:00-9:30 AM', '9:00-10:00 AM', '10:00-11:30 AM', '11:00-12:00 PM',
+              '1:00-2:30 PM', '2:00-3:30 PM', '3:00-4:30 PM', '5:00-6:30 PM']
+CAPACITIES = [25, 30, 35, 40, 60, 80, 120, 200]
+DEFAULT_PASSWORD = 'password123'
+
+TABLES = ['users', 'courses', 'enrollments', 'assignments', 'announcements', 'submissions']
+
+
+class StaffFactory(factory.DictFactory):
+    name = factory.Faker('name')
+    office = factory.LazyFunction(lambda: f"{factory.random.randgen.choice(list(DEPARTMENTS))} Building "
+                                          f"{factory.random.randgen.randint(100, 499)}")
+    office_hours = factory.LazyFunction(lambda: f"{factory.random.randgen.choice(DAY_PATTERNS)} "
+                                                f"{factory.random.randgen.choice(TIME_SLOTS)}")
+
+
+class CourseFactory(factory.DictFactory):
+    department = factory.Faker('random_element', elements=list(DEPARTMENTS))
+    name = factory.Faker('catch_phrase')
+    description = factory.Faker('sentence', nb_words=12)
+    credits = factory.Faker('random_element', elements=[1, 2, 3, 3, 3, 4])
+    max_seats = factory.Faker('random_element', elements=CAPACITIES)
+    schedule = factory.LazyFunction(lambda: f"{factory.random.randgen.choice(DAY_PATTERNS)} "
+                                            f"{factory.random.randgen.choice(TIME_SLOTS)}")
+
+
+def load_models():
+    import models.user, models.courses, models.enrollment  # noqa: F401
+    import models.assignment, models.announcement, models.submission  # noqa: F401
+
+
+def generate(students=50000, courses=2000, staff=300, ta_ratio=0.4, courses_per_student=(3, 6),
+             assignments_per_course=(3, 8), announcements_per_course=(0, 6), submission_rate=0.3,
+             graded_rate=0.6, seed=42):
+    """Build every row in memory; returns {table: (columns, rows)} in insert order"""
+    rng = random.Random(seed)
+    reseed_random(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+    now = datetime(2026, 9, 1, 9, 0, 0)
+    password_hash = generate_password_hash(DEFAULT_PASSWORD)
+
+    first_names = [fake.first_name() for _ in range(500)]
+    last_names = [fake.last_name() for _ in range(1000)]
+    words = [fake.word() for _ in range(300)]
+
+    # Users: staff first, then students
+    users = []
+    ta_count = int(staff * ta_ratio)
+    instructor_ids, ta_ids = [], []
+    for i, row in enumerate(StaffFactory.build_batch(staff), start=1):
+        role = 'ta' if i <= ta_count else 'instructor'
+        (ta_ids if role == 'ta' else instructor_ids).append(i)
+        users.append((i, row['name'], f"{role}{i}@staff.university.edu", password_hash, role,
+                      None, None, row['office'], row['office_hours'], now))
+    student_ids = list(range(staff + 1, staff + students + 1))
+    for user_id in student_ids:
+        name = f"{rng.choice(first_names)} {rng.choice(last_names)}"
+        users.append((user_id, name, f"student{user_id}@university.edu", password_hash, 'student',
+                      rng.choice(list(DEPARTMENTS)), rng.choice(LEVELS), None, None, now))
+
+    # Courses
+    course_rows = []
+    counters = {}
+    for course_id, row in enumerate(CourseFactory.build_batch(courses), start=1):
+        prefix = DEPARTMENTS[row['department']]
+        counters[prefix] = counters.get(prefix, 99) + 1
+        course_rows.append([course_id, f"{prefix}{counters[prefix]}", row['name'], row['description'],
+                            row['credits'], row['max_seats'], row['max_seats'], row['schedule'],
+                            row['department'], rng.choice(instructor_ids),
+                            rng.choice(ta_ids) if ta_ids and rng.random() < 0.7 else None])
+
+    # Enrollments, never beyond a course's capacity
+    seats = {row[0]: row[5] for row in course_rows}
+    open_courses = list(seats)
+    enrollments = []
+    roster = {course_id: [] for course_id in seats}
+    enrolled_at = now - timedelta(days=14)
+    for student_id in student_ids:
+        wanted = rng.randint(*courses_per_student)
+        chosen = set()
+        for _ in range(wanted * 2):
+            if len(chosen) == wanted or not open_courses:
+                break
+            index = rng.randrange(len(open_courses))
+            course_id = open_courses[index]
+            if course_id in chosen:
+                continue
+            chosen.add(course_id)
+            seats[course_id] -= 1
+            if seats[course_id] == 0:
+                open_courses[index] = open_courses[-1]
+                open_courses.pop()
+        for course_id in chosen:
+            enrollments.append((len(enrollments) + 1, student_id, course_id, enrolled_at))
+            roster[course_id].append(student_id)
+    for row in course_rows:
+        row[6] = seats[row[0]]
+
+    # Assignments, submissions and announcements
+    assignments, submissions, announcements = [], [], []
+    for row in course_rows:
+        course_id, staff_ids = row[0], [row[9]] + ([row[10]] if row[10] else [])
+        for n in range(1, rng.randint(*assignments_per_course) + 1):
+            assignment_id = len(assignments) + 1
+            due = now + timedelta(days=7 * n, hours=rng.choice([17, 23]))
+            count = graded = 0
+            grade_sum = grade_sum_sq = 0.0
+            for student_id in roster[course_id]:
+                if rng.random() >= submission_rate:
+                    continue
+                grade = round(rng.uniform(40, 100), 1) if rng.random() < graded_rate else None
+                count += 1
+                if grade is not None:
+                    graded += 1
+                    grade_sum += grade
+                    grade_sum_sq += grade * grade
+                submissions.append((len(submissions) + 1, f"Answer to {rng.choice(words)} {rng.choice(words)}",
+                                    grade, 'Good work' if grade is not None and grade >= 70 else None,
+                                    due - timedelta(days=1), assignment_id, student_id))
+            assignments.append((assignment_id, f"Assignment {n}: {rng.choice(words).title()}",
+                                f"Work through the {rng.choice(words)} problems.", due, now, course_id,
+                                count, graded, grade_sum, grade_sum_sq))
+        for n in range(rng.randint(*announcements_per_course)):
+            announcements.append((len(announcements) + 1, f"{rng.choice(words).title()} update",
+                                  f"Please note the {rng.choice(words)} {rng.choice(words)} change.",
+                                  now - timedelta(days=n, hours=rng.randint(0, 23)),
+                                  rng.choice(staff_ids), course_id))
+
+    return {
+        'users': (('id', 'name', 'email', 'password_hash', 'role', 'major', 'level', 'office',
+                   'office_hours', 'created_at'), users),
+        'courses': (('id', 'code', 'name', 'description', 'credits', 'max_seats', 'seats_left',
+                     'schedule', 'department', 'instructor_id', 'ta_id'), [tuple(r) for r in course_rows]),
+        'enrollments': (('id', 'student_id', 'course_id', 'enrolled_at'), enrollments),
+        'assignments': (('id', 'title', 'description', 'due_date', 'created_at', 'course_id',
+                         'submission_count', 'graded_count', 'grade_sum', 'grade_sum_sq'), assignments),
+        'announcements': (('id', 'title', 'content', 'created_at', 'poster_id', 'course_id'), announcements),
+        'submissions': (('id', 'submission_text', 'grade', 'feedback', 'submitted_at', 'assignment_id',
+                         'student_id'), submissions),
+    }
+
+
+def make_engine(url):
+    """Engine tuned for bulk loading (fast_executemany on SQL Server, relaxed syncing on SQLite)"""
+    if url.startswith('mssql+pyodbc'):
+        return create_engine(url, fast_executemany=True)
+    engine = create_engine(url)
+    if engine.dialect.name == 'sqlite':
+        @event.listens_for(engine, 'connect')
+        def _bulk_pragmas(dbapi_connection, record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute('PRAGMA journal_mode=MEMORY')
+            cursor.execute('PRAGMA synchronous=OFF')
+            cursor.close()
+    return engine
+
+
+def load(engine, data, batch_size=10000, reset=False, log=print):
+    """Create missing tables and bulk-insert the generated rows; returns total rows loaded"""
+    load_models()
+    db.metadata.create_all(engine)
+    mssql = engine.dialect.name == 'mssql'
+    total = 0
+    with engine.begin() as conn:
+        if reset:
+            for table in reversed(TABLES):
+                conn.exec_driver_sql(f'DELETE FROM {table}')
+        for table in TABLES:
+            columns, rows = data[table]
+            sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+            start = time.perf_counter()
+            if mssql:
+                conn.exec_driver_sql(f'SET IDENTITY_INSERT {table} ON')
+            for offset in range(0, len(rows), batch_size):
+                conn.exec_driver_sql(sql, rows[offset:offset + batch_size])
+            if mssql:
+                conn.exec_driver_sql(f'SET IDENTITY_INSERT {table} OFF')
+            elapsed = time.perf_counter() - start
+            total += len(rows)
+            log(f"  {table:<14} {len(rows):>9,} rows  {len(rows) / elapsed if elapsed else 0:>10,.0f} rows/s")
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic university dataset")
+    parser.add_argument('--url', default='sqlite:///university.db', help='SQLAlchemy database URL')
+    parser.add_argument('--students', type=int, default=50000)
+    parser.add_argument('--courses', type=int, default=2000)
+    parser.add_argument('--staff', type=int, default=300, help='Instructors and TAs')
+    parser.add_argument('--submission-rate', type=float, default=0.3,
+                        help='Probability that an enrolled student submits a given assignment')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--reset', action='store_true', help='Delete existing rows first')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    data = generate(students=args.students, courses=args.courses, staff=args.staff,
+                    submission_rate=args.submission_rate, seed=args.seed)
+    generated = time.perf_counter() - start
+    print(f"Generated in {generated:.1f}s, loading into {args.url}")
+
+    engine = make_engine(args.url)
+    start = time.perf_counter()
+    total = load(engine, data, batch_size=args.batch_size, reset=args.reset)
+    elapsed = time.perf_counter() - start
+    print(f"Loaded {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
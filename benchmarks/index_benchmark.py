@@ -0,0 +1,104 @@
+"""Before/after benchmark for the hot-path indexes (migration 0003).
+
+Builds a synthetic SQLite database without the indexes, times the hot
+queries and captures their plans, applies the migrations and repeats.
+
+    python -m benchmarks.index_benchmark --students 20000 --courses 1000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from benchmarks import datagen
+from extensions import db
+from migrations import runner
+
+HOT_INDEXES = [
+    ('ix_enrollments_course_id', 'enrollments'),
+    ('ix_submissions_student_id', 'submissions'),
+    ('ix_assignments_course_id_due_date', 'assignments'),
+    ('ix_announcements_course_id_created_at', 'announcements'),
+    ('ix_courses_instructor_id', 'courses'),
+    ('ix_courses_ta_id', 'courses'),
+    ('ix_users_role', 'users'),
+]
+
+QUERIES = {
+    'roster (enrollments.course_id)':
+        "SELECT users.id, users.name FROM users JOIN enrollments ON enrollments.student_id = users.id "
+        "WHERE enrollments.course_id = :course_id AND users.role = 'student'",
+    'grades (submissions.student_id)':
+        "SELECT id, grade FROM submissions WHERE student_id = :student_id",
+    'assignments (course_id, due_date)':
+        "SELECT id, title FROM assignments WHERE course_id = :course_id ORDER BY due_date",
+    'announcements (course_id, created_at DESC)':
+        "SELECT id, title FROM announcements WHERE course_id = :course_id ORDER BY created_at DESC",
+    'courses.instructor_id':
+        "SELECT id FROM courses WHERE instructor_id = :staff_id",
+    'courses.ta_id':
+        "SELECT id FROM courses WHERE ta_id = :staff_id",
+    'users.role':
+        "SELECT id FROM users WHERE role = 'ta'",
+}
+
+
+def measure(engine, params, repeat):
+    results = {}
+    with engine.connect() as conn:
+        for label, sql in QUERIES.items():
+            plan = ' | '.join(row[-1] for row in conn.execute(text('EXPLAIN QUERY PLAN ' + sql), params))
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(text(sql), params).fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[label] = (statistics.median(timings), plan)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=20000)
+    parser.add_argument('--courses', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+    
+    datagen.load_models()
+    path = os.path.join(tempfile.mkdtemp(), 'index_benchmark.db')
+    engine = datagen.make_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for name, table in HOT_INDEXES:
+            runner.drop_index_if_exists(conn, name, table)
+    
+    staff = 300
+    datagen.load(engine, datagen.generate(students=args.students, courses=args.courses, staff=staff),
+                 log=lambda message: None)
+    params = {'course_id': args.courses // 2, 'student_id': staff + args.students // 2, 'staff_id': staff}
+    
+    before = measure(engine, params, args.repeat)
+    runner.upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(text('ANALYZE'))
+    after = measure(engine, params, args.repeat)
+    
+    print(f"{args.students} students, {args.courses} courses (median of {args.repeat} runs)\n")
+    for label in QUERIES:
+        before_ms, before_plan = before[label]
+        after_ms, after_plan = after[label]
+        speedup = before_ms / after_ms if after_ms else float('inf')
+        print(f"{label}\n  before {before_ms:8.3f} ms  {before_plan}\n"
+              f"  after  {after_ms:8.3f} ms  {after_plan}\n  speedup x{speedup:.1f}\n")
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
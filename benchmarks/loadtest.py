@@ -0,0 +1,349 @@
+"""Registration-day load test against a running server.
+
+Virtual users arrive at --rate per second (Poisson arrivals, at most
+--max-active at once) and walk scripted journeys over real HTTP:
+
+    student  login, search, enroll, view schedule, drop
+    ta       login, dashboard, grade a submission in an assigned course
+    admin    login, search people, search courses
+
+with exponential think time between steps. Every --interval seconds it
+prints throughput, latency percentiles, error rate and, when serving
+locally, DB pool saturation; a per-step summary follows at the end.
+
+    python -m benchmarks.loadtest --serve --users 2000 --rate 50
+    python -m benchmarks.loadtest --target http://localhost:5000 --students 50000 --courses 2000
+
+--serve builds a SQLite database from benchmarks.datagen and hosts the app
+on a threaded local server. With --target, pass the datagen sizes and seed
+the target was populated with so the journeys pick real ids.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import datagen
+from benchmarks.model_benchmark import build_app, summarize
+
+ADMIN_EMAIL = 'admin@university.edu'
+DEFAULT_MIX = 'student=85,ta=10,admin=5'
+
+
+class World:
+    """Ids and credentials the journeys draw from, rebuilt from the datagen seed"""
+
+    def __init__(self, data, admin_email=ADMIN_EMAIL, password=datagen.DEFAULT_PASSWORD):
+        users = data['users'][1]
+        self.password = password
+        self.admin_email = admin_email
+        self.students = [(row[0], row[2]) for row in users if row[4] == 'student']
+        tas = {row[0]: row[2] for row in users if row[4] == 'ta'}
+        courses = data['courses'][1]
+        self.course_ids = [row[0] for row in courses]
+        self.search_terms = sorted({row[8] for row in courses} | {row[1][:-1] for row in courses})
+        course_ta = {row[0]: row[10] for row in courses if row[10]}
+        assignment_ta = {row[0]: course_ta.get(row[5]) for row in data['assignments'][1]}
+        gradable = {}
+        for row in data['submissions'][1]:
+            ta_id = assignment_ta.get(row[5])
+            if ta_id:
+                gradable.setdefault(ta_id, []).append(row[0])
+        self.tas = [(ta_id, email, gradable[ta_id]) for ta_id, email in tas.items() if ta_id in gradable]
+        self.people_terms = ['student', 'ta', 'instructor'] + sorted({row[1].split()[-1] for row in users[:500]})
+
+
+class Recorder:
+    """Thread-safe sample store: (finished_at, step, seconds, ok)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = []
+        self.active = 0
+        self.started = 0
+        self.finished = 0
+
+    def record(self, step, elapsed, ok):
+        with self.lock:
+            self.samples.append((time.perf_counter(), step, elapsed, ok))
+
+    def since(self, index):
+        with self.lock:
+            return self.samples[index:], len(self.samples)
+
+
+class VirtualUser:
+    """One browser: a keep-alive connection and the Flask session cookie"""
+
+    def __init__(self, base_url, recorder, think_time, rng):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        self.cookies = SimpleCookie()
+        self.recorder = recorder
+        self.think_time = think_time
+        self.rng = rng
+
+    def request(self, step, method, path, form=None, expect=None):
+        headers = {}
+        body = None
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v.value}' for k, v in self.cookies.items())
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        start = time.perf_counter()
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+            ok = response.status == expect if expect else response.status < 400
+            for cookie in response.headers.get_all('Set-Cookie') or []:
+                self.cookies.load(cookie)
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            ok = False
+        self.recorder.record(step, time.perf_counter() - start, ok)
+        return ok
+
+    def think(self):
+        if self.think_time > 0:
+            time.sleep(self.rng.expovariate(1.0 / self.think_time))
+
+    def login(self, email, password):
+        # A failed login re-renders the form with 200; success redirects
+        return self.request('login', 'POST', '/login', {'email': email, 'password': password}, expect=302)
+
+    def close(self):
+        self.conn.close()
+
+
+def student_journey(user, world):
+    _, email = user.rng.choice(world.students)
+    if not user.login(email, world.password):
+        return
+    user.think()
+    user.request('student_search', 'GET', '/student/search?' + urlencode({'keyword': user.rng.choice(world.search_terms)}))
+    user.think()
+    course_id = user.rng.choice(world.course_ids)
+    user.request('student_enroll', 'GET', f'/student/enroll/{course_id}')
+    user.think()
+    user.request('student_schedule', 'GET', '/student/schedule')
+    user.think()
+    user.request('student_drop', 'GET', f'/student/drop/{course_id}')
+
+
+def ta_journey(user, world):
+    _, email, submission_ids = user.rng.choice(world.tas)
+    if not user.login(email, world.password):
+        return
+    user.think()
+    user.request('ta_dashboard', 'GET', '/ta/dashboard')
+    user.think()
+    user.request('ta_grade', 'POST', f'/ta/submission/{user.rng.choice(submission_ids)}/grade',
+                 {'grade': round(user.rng.uniform(50, 100), 1), 'feedback': 'Load test'})
+
+
+def admin_journey(user, world):
+    if not user.login(world.admin_email, world.password):
+        return
+    user.think()
+    user.request('admin_searchpeople', 'GET', '/admin/searchpeople?' + urlencode({'search': user.rng.choice(world.people_terms)}))
+    user.think()
+    user.request('admin_searchcourse', 'GET', '/admin/searchcourse?' + urlencode({'search': user.rng.choice(world.search_terms)}))
+
+
+JOURNEYS = {'student': student_journey, 'ta': ta_journey, 'admin': admin_journey}
+
+
+def parse_mix(value):
+    """'student=85,ta=10,admin=5' -> (['student', 'ta', 'admin'], [85, 10, 5])"""
+    names, weights = [], []
+    for part in value.split(','):
+        name, weight = part.split('=')
+        if name not in JOURNEYS:
+            raise ValueError(f"Unknown journey: {name}")
+        names.append(name)
+        weights.append(float(weight))
+    return names, weights
+
+
+def serve(world_data, port=0, log=print):
+    """Load the dataset into a temporary SQLite file and host the app; returns (server, app)"""
+    import logging
+    from werkzeug.security import generate_password_hash
+    from werkzeug.serving import make_server
+
+    path = os.path.join(tempfile.mkdtemp(), 'loadtest.db')
+    engine = datagen.make_engine(f'sqlite:///{path}')
+    log(f"Loading dataset into {path}")
+    datagen.load(engine, world_data, log=log)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO users (name, email, password_hash, role) VALUES (?, ?, ?, 'admin')",
+                             ('Load Test Admin', ADMIN_EMAIL, generate_password_hash(datagen.DEFAULT_PASSWORD)))
+    engine.dispose()
+
+    app = build_app(f'sqlite:///{path}')
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='loadtest-server', daemon=True).start()
+    return server, app
+
+
+def pool_sampler(app):
+    """Callable returning the app engine's pool occupancy"""
+    def sample():
+        with app.app_context():
+            from extensions import db
+            pool = db.engine.pool
+        if not hasattr(pool, 'checkedout'):
+            return None
+        return {'checked_out': pool.checkedout(), 'size': pool.size(), 'overflow': pool.overflow()}
+    return sample
+
+
+def interval_line(elapsed, samples, seconds, recorder, pool):
+    result = summarize([s[2] for s in samples])
+    errors = sum(1 for s in samples if not s[3])
+    line = (f"{elapsed:7.1f}s  active {recorder.active:>5}  {len(samples) / seconds:>8.1f} req/s  "
+            f"p50 {result['p50_ms']:>7.1f}  p95 {result['p95_ms']:>7.1f}  p99 {result['p99_ms']:>7.1f} ms  "
+            f"errors {errors / len(samples) if samples else 0:>6.1%}")
+    if pool:
+        line += f"  pool {pool['checked_out']}/{pool['size']} (+{max(pool['overflow'], 0)} overflow)"
+    return line
+
+
+def run(base_url, world, users=1000, rate=20.0, max_active=200, think_time=1.0, mix=DEFAULT_MIX,
+        interval=5.0, seed=1, sample_pool=None, log=print):
+    """Drive the journeys and return {'steps': {step: stats}, 'timeline': [...]}"""
+    names, weights = parse_mix(mix)
+    if not world.tas and 'ta' in names:
+        index = names.index('ta')
+        del names[index], weights[index]
+    recorder = Recorder()
+    slots = threading.Semaphore(max_active)
+    rng = random.Random(seed)
+    done = threading.Event()
+    timeline = []
+    start = time.perf_counter()
+
+    def virtual_user(journey, user_seed):
+        user = VirtualUser(base_url, recorder, think_time, random.Random(user_seed))
+        try:
+            JOURNEYS[journey](user, world)
+        finally:
+            user.close()
+            with recorder.lock:
+                recorder.active -= 1
+                recorder.finished += 1
+            slots.release()
+
+    def report():
+        index = 0
+        last = start
+        while not done.wait(interval):
+            now = time.perf_counter()
+            samples, index = recorder.since(index)
+            pool = sample_pool() if sample_pool else None
+            timeline.append({'elapsed': now - start, 'requests': len(samples),
+                             'errors': sum(1 for s in samples if not s[3]), 'active': recorder.active,
+                             'pool': pool, **summarize([s[2] for s in samples])})
+            log(interval_line(now - start, samples, now - last, recorder, pool))
+            last = now
+
+    reporter = threading.Thread(target=report, name='loadtest-report', daemon=True)
+    reporter.start()
+    threads = []
+    for n in range(users):
+        time.sleep(rng.expovariate(rate))
+        slots.acquire()
+        with recorder.lock:
+            recorder.active += 1
+            recorder.started += 1
+        journey = rng.choices(names, weights)[0]
+        thread = threading.Thread(target=virtual_user, args=(journey, rng.random()), daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    done.set()
+    reporter.join()
+    duration = time.perf_counter() - start
+
+    steps = {}
+    for _, step, elapsed, ok in recorder.samples:
+        steps.setdefault(step, ([], [0]))
+        steps[step][0].append(elapsed)
+        steps[step][1][0] += 0 if ok else 1
+    summary = {}
+    for step, (timings, errors) in sorted(steps.items()):
+        summary[step] = dict(summarize(timings), errors=errors[0], throughput=len(timings) / duration)
+    total = len(recorder.samples)
+    failed = sum(1 for s in recorder.samples if not s[3])
+    log(f"\n{users} virtual users, {total} requests in {duration:.1f}s "
+        f"({total / duration:.1f} req/s, {failed / total if total else 0:.2%} errors)")
+    log(f"{'step':<20} {'count':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}")
+    for step, result in summary.items():
+        log(f"{step:<20} {result['iterations']:>7} {result['throughput']:>8.1f} {result['p50_ms']:>8.1f} "
+            f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['errors']:>7}")
+    return {'duration': duration, 'requests': total, 'errors': failed, 'steps': summary, 'timeline': timeline}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--target', help='Base URL of a running server')
+    target.add_argument('--serve', action='store_true', help='Host a local SQLite-backed instance')
+    parser.add_argument('--port', type=int, default=0, help='Port for --serve (0 picks a free one)')
+    parser.add_argument('--users', type=int, default=1000, help='Virtual users to run in total')
+    parser.add_argument('--rate', type=float, default=20.0, help='Virtual user arrivals per second')
+    parser.add_argument('--max-active', type=int, default=200, help='Concurrent virtual users cap')
+    parser.add_argument('--think', type=float, default=1.0, help='Mean think time between steps (s)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Journey weights')
+    parser.add_argument('--interval', type=float, default=5.0, help='Seconds between progress lines')
+    parser.add_argument('--students', type=int, default=5000, help='datagen size of the target data')
+    parser.add_argument('--courses', type=int, default=250)
+    parser.add_argument('--staff', type=int, default=60)
+    parser.add_argument('--data-seed', type=int, default=42)
+    parser.add_argument('--admin-email', default=ADMIN_EMAIL)
+    parser.add_argument('--seed', type=int, default=1, help='Seed for arrivals and journey choices')
+    parser.add_argument('--json', metavar='PATH', help='Write the summary and timeline as JSON')
+    args = parser.parse_args(argv)
+
+    data = datagen.generate(students=args.students, courses=args.courses, staff=args.staff, seed=args.data_seed)
+    world = World(data, admin_email=args.admin_email)
+    sample_pool = None
+    server = None
+    if args.serve:
+        server, app = serve(data, port=args.port)
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        sample_pool = pool_sampler(app)
+        print(f"Serving on {base_url}")
+    else:
+        base_url = args.target
+    del data
+
+    try:
+        report = run(base_url, world, users=args.users, rate=args.rate, max_active=args.max_active,
+                     think_time=args.think, mix=args.mix, interval=args.interval, seed=args.seed,
+                     sample_pool=sample_pool)
+    finally:
+        if server:
+            server.shutdown()
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
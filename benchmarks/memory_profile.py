@@ -0,0 +1,230 @@
+"""Per-endpoint memory profile with tracemalloc.
+
+Renders the heavy pages (admin searchpeople/searchcourse/viewcourse,
+student search, TA course details) against a synthetic dataset and reports
+for each: peak traced memory during one request, the top allocation sites,
+the ORM objects held in the session identity map when the view finished,
+and net memory growth per request over repeated requests (a leak check).
+
+    python -m benchmarks.memory_profile --students 20000 --courses 1000 --top 5
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import before_render_template
+
+from benchmarks import datagen
+from benchmarks.model_benchmark import ROOT, build_app
+from extensions import db
+
+# Stack depth kept per allocation; enough to reach the view from SQLAlchemy/Jinja internals
+FRAMES = 30
+
+# Net growth per request above this (after warm-up) is reported as a leak
+LEAK_THRESHOLD_BYTES = 1024
+
+
+def pages(ids):
+    """name -> (role, user id, path)"""
+    return {
+        'admin.searchpeople': ('admin', ids['admin_id'], '/admin/searchpeople'),
+        'admin.searchcourse': ('admin', ids['admin_id'], '/admin/searchcourse'),
+        'admin.view_course': ('admin', ids['admin_id'], f"/admin/viewcourse/{ids['course_id']}"),
+        'student.search_courses': ('student', ids['student_id'], '/student/search?keyword='),
+        'ta.course_details': ('ta', ids['ta_id'], f"/ta/course/{ids['ta_course_id']}"),
+    }
+
+
+def pick_ids():
+    """A busy course, one of its TAs' courses, an enrolled student and an admin"""
+    from sqlalchemy import func
+    from models.courses import Course
+    from models.enrollment import Enrollment
+    from models.user import User
+
+    busiest = db.session.query(Enrollment.course_id, func.count().label('n')) \
+        .group_by(Enrollment.course_id).subquery()
+    course_id = db.session.query(busiest.c.course_id).order_by(busiest.c.n.desc()).limit(1).scalar()
+    ta_course = db.session.query(Course.id, Course.ta_id).join(busiest, busiest.c.course_id == Course.id) \
+        .filter(Course.ta_id.isnot(None)).order_by(busiest.c.n.desc()).first()
+    student_id = db.session.query(Enrollment.student_id).filter(Enrollment.course_id == course_id).limit(1).scalar()
+    admin_id = db.session.query(User.id).filter(User.role == 'admin').limit(1).scalar()
+    return {'course_id': course_id, 'ta_course_id': ta_course[0], 'ta_id': ta_course[1],
+            'student_id': student_id, 'admin_id': admin_id}
+
+
+def add_admin():
+    """The generated data has no admin; add one"""
+    from models.user import User
+    admin = User.query.filter_by(role='admin').first()
+    if not admin:
+        admin = User(name='Profile Admin', email='admin@university.edu', role='admin',
+                     password=datagen.DEFAULT_PASSWORD)
+        db.session.add(admin)
+        db.session.commit()
+    return admin.id
+
+
+class IdentityMapProbe:
+    """Records the ORM objects held in the session identity map while each
+    page renders (objects nothing references any more have been dropped by
+    then), optionally with a tracemalloc snapshot taken at the same moment"""
+
+    def __init__(self, app):
+        self.last = Counter()
+        self.take_snapshot = False
+        self.snapshot = None
+        before_render_template.connect(self._capture, app)
+
+    def _capture(self, sender, template, context, **extra):
+        self.last = Counter(type(obj).__name__ for obj in db.session.identity_map.values())
+        if self.take_snapshot:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.take_snapshot = False
+
+
+def _app_site(traceback):
+    """Innermost frame of the traceback that is in this repository"""
+    for frame in reversed(traceback):
+        if frame.filename.startswith(ROOT) and not frame.filename.startswith(os.path.join(ROOT, 'benchmarks')):
+            return f'{os.path.relpath(frame.filename, ROOT)}:{frame.lineno}'
+    return None
+
+
+def _sites(snapshot, before, top):
+    """Largest allocation growth grouped by the repository line that caused it"""
+    sites = {}
+    for stat in snapshot.compare_to(before, 'traceback'):
+        frame = stat.traceback[-1]
+        app_site = _app_site(stat.traceback) or f'{frame.filename}:{frame.lineno}'
+        site = sites.setdefault(app_site, {'site': app_site, 'size_diff': 0, 'count_diff': 0, 'largest': None})
+        site['size_diff'] += stat.size_diff
+        site['count_diff'] += stat.count_diff
+        if site['largest'] is None:
+            site['largest'] = f'{frame.filename}:{frame.lineno}'
+    return sorted(sites.values(), key=lambda site: site['size_diff'], reverse=True)[:top]
+
+
+def _request(client, path):
+    response = client.get(path)
+    db.session.remove()
+    return response
+
+
+def profile_page(client, probe, path, repeat=20, warmup=3, top=5):
+    """Profile one GET; returns peak bytes, top sites, identity map contents and growth per request"""
+    for _ in range(warmup):
+        _request(client, path)
+    gc.collect()
+
+    # One request: peak above the steady state, and what is allocated at the
+    # moment the template renders (loaded rows, ORM objects, context)
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    before = tracemalloc.take_snapshot().filter_traces(filters)
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    probe.take_snapshot = True
+    probe.last = Counter()
+    response = _request(client, path)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    identity_map = dict(probe.last)
+    snapshot = probe.snapshot or tracemalloc.take_snapshot()
+    probe.take_snapshot = False
+    during = _sites(snapshot.filter_traces(filters), before, top)
+    probe.snapshot = None
+
+    # Repeated requests: anything that keeps growing is retained per request
+    gc.collect()
+    start = tracemalloc.take_snapshot()
+    start_bytes = tracemalloc.get_traced_memory()[0]
+    for _ in range(repeat):
+        _request(client, path)
+    gc.collect()
+    growth = (tracemalloc.get_traced_memory()[0] - start_bytes) / repeat
+    end = tracemalloc.take_snapshot()
+    leak_sites = []
+    if growth > LEAK_THRESHOLD_BYTES:
+        leak_sites = _sites(end.filter_traces(filters), start.filter_traces(filters), top)
+
+    return {
+        'status': response.status_code,
+        'bytes': len(response.data),
+        'peak_bytes': peak,
+        'identity_map': identity_map,
+        'identity_map_total': sum(identity_map.values()),
+        'top_sites': during,
+        'growth_per_request': growth,
+        'leak': growth > LEAK_THRESHOLD_BYTES,
+        'leak_sites': leak_sites,
+    }
+
+
+def run(app, targets, repeat=20, top=5, log=print):
+    """Profile each (role, user_id, path) in targets with a logged-in test client"""
+    probe = IdentityMapProbe(app)
+    results = {}
+    tracemalloc.start(FRAMES)
+    try:
+        with app.app_context():
+            for name, (role, user_id, path) in targets.items():
+                client = app.test_client()
+                with client.session_transaction() as sess:
+                    sess['user_id'] = user_id
+                    sess['role'] = role
+                result = profile_page(client, probe, path, repeat=repeat, top=top)
+                results[name] = result
+                objects = ', '.join(f'{k}={v}' for k, v in sorted(result['identity_map'].items())) or '-'
+                log(f"{name:<24} {result['status']}  peak {result['peak_bytes'] / 1024:>9,.0f} KiB  "
+                    f"page {result['bytes'] / 1024:>7,.0f} KiB  growth {result['growth_per_request']:>8,.0f} B/req"
+                    f"{'  LEAK' if result['leak'] else ''}")
+                log(f"    identity map: {result['identity_map_total']} objects ({objects})")
+                for site in result['top_sites']:
+                    log(f"    {site['size_diff'] / 1024:>9,.1f} KiB  {site['count_diff']:>+7} blocks  {site['site']}"
+                        f"  (largest: {site['largest']})")
+                for site in result['leak_sites']:
+                    log(f"    leaking {site['size_diff'] / 1024:>9,.1f} KiB  {site['site']}")
+    finally:
+        tracemalloc.stop()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=20000)
+    parser.add_argument('--courses', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20, help='Requests per page for the leak check')
+    parser.add_argument('--top', type=int, default=5, help='Allocation sites to show per page')
+    parser.add_argument('--only', nargs='*', help='Profile only these pages')
+    parser.add_argument('--json', metavar='PATH', help='Write results as JSON')
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), 'memory_profile.db')
+    engine = datagen.make_engine(f'sqlite:///{path}')
+    datagen.load(engine, datagen.generate(students=args.students, courses=args.courses,
+                                          staff=max(20, args.courses // 5)))
+    engine.dispose()
+
+    app = build_app(f'sqlite:///{path}')
+    with app.app_context():
+        add_admin()
+        targets = pages(pick_ids())
+        db.session.remove()
+    if args.only:
+        targets = {name: target for name, target in targets.items() if name in args.only}
+    results = run(app, targets, repeat=args.repeat, top=args.top)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 1 if any(result['leak'] for result in results.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
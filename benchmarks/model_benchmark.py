@@ -0,0 +1,255 @@
+"""Micro-benchmarks for the model hot paths.
+
+Loads synthetic datasets of several sizes (benchmarks.datagen) into SQLite
+and times User.login, Course.search_courses, enroll/drop, the student and
+course read paths and the /student/grades view. Each case reports ops/sec
+and p50/p95/p99 latency; results can be saved as a JSON baseline and later
+runs compared against it so regressions fail the run.
+
+    python -m benchmarks.model_benchmark --save benchmarks/baselines/local.json
+    python -m benchmarks.model_benchmark --compare benchmarks/baselines/local.json --tolerance 0.2
+
+Baselines are machine specific: record one on the machine that compares.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import datagen
+from extensions import db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = '1000x50,10000x500'
+
+
+def build_app(url):
+    """The testing profile of the app, pointed at the benchmark database"""
+    from app import create_app, load_blueprints
+    from config import TestingConfig
+
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = url
+        SECRET_KEY = 'benchmark'
+        UNIT_OF_WORK = True
+
+    app = create_app(BenchmarkConfig)
+    load_blueprints(app)
+    return app
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(samples)))
+    return samples[min(rank, len(samples)) - 1]
+
+
+def summarize(timings):
+    """ops/sec and latency percentiles (ms) for a list of per-op seconds"""
+    ordered = sorted(timings)
+    total = sum(ordered)
+    return {
+        'iterations': len(ordered),
+        'ops_per_sec': len(ordered) / total if total else 0.0,
+        'p50_ms': percentile(ordered, 50) * 1000,
+        'p95_ms': percentile(ordered, 95) * 1000,
+        'p99_ms': percentile(ordered, 99) * 1000,
+    }
+
+
+def run_case(op, setup=None, min_time=1.0, min_iterations=10, max_iterations=2000, warmup=3):
+    """Time op() until both min_time and min_iterations are reached; setup() runs untimed"""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        op()
+    timings = []
+    spent = 0.0
+    while len(timings) < max_iterations and (spent < min_time or len(timings) < min_iterations):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        op()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        spent += elapsed
+    return summarize(timings)
+
+
+def compare(baseline, current, tolerance=0.2):
+    """List of regressions: p50 slower or ops/sec lower than baseline by more than tolerance"""
+    regressions = []
+    for size, cases in current['results'].items():
+        for name, result in cases.items():
+            base = baseline.get('results', {}).get(size, {}).get(name)
+            if not base:
+                continue
+            if result['p50_ms'] > base['p50_ms'] * (1 + tolerance):
+                regressions.append((size, name, 'p50_ms', base['p50_ms'], result['p50_ms']))
+            if result['ops_per_sec'] < base['ops_per_sec'] * (1 - tolerance):
+                regressions.append((size, name, 'ops_per_sec', base['ops_per_sec'], result['ops_per_sec']))
+    return regressions
+
+
+def parse_sizes(value):
+    """'1000x50,10000x500' -> [(1000, 50), (10000, 500)]"""
+    sizes = []
+    for part in value.split(','):
+        students, courses = part.lower().split('x')
+        sizes.append((int(students), int(courses)))
+    return sizes
+
+
+def pick_fixtures():
+    """A busy student, a busy course, a busy assignment and an open course to churn"""
+    from sqlalchemy import func
+    from models.assignment import Assignment
+    from models.courses import Course
+    from models.enrollment import Enrollment
+    from models.student import Student
+
+    student_id = db.session.query(Enrollment.student_id).group_by(Enrollment.student_id) \
+        .order_by(func.count().desc()).limit(1).scalar()
+    course_id = db.session.query(Enrollment.course_id).group_by(Enrollment.course_id) \
+        .order_by(func.count().desc()).limit(1).scalar()
+    assignment_id = db.session.query(Assignment.id).order_by(Assignment.submission_count.desc()).limit(1).scalar()
+    enrolled = db.session.query(Enrollment.course_id).filter(Enrollment.student_id == student_id)
+    open_course = Course.query.filter(~Course.id.in_(enrolled)).order_by(Course.seats_left.desc()).first()
+    if open_course.seats_left == 0:
+        # Generated courses can all be full; give the churn course one spare seat
+        open_course.max_seats += 1
+        open_course.seats_left = 1
+        db.session.commit()
+    student = db.session.get(Student, student_id)
+    return {'student_id': student_id, 'email': student.email, 'course_id': course_id,
+            'assignment_id': assignment_id, 'open_course_id': open_course.id}
+
+
+def cases(app, fixtures):
+    """name -> (op, setup); every op starts from an empty identity map"""
+    from models.assignment import Assignment
+    from models.courses import Course
+    from models.student import Student
+    from models.user import User
+
+    def fresh():
+        db.session.remove()
+
+    def login():
+        User.login(fixtures['email'], datagen.DEFAULT_PASSWORD)
+
+    def search():
+        Course.search_courses('Computer')
+
+    def enroll_drop():
+        student = db.session.get(Student, fixtures['student_id'])
+        student.enroll_course(fixtures['open_course_id'])
+        student.drop_course(fixtures['open_course_id'])
+
+    def enrolled_courses():
+        db.session.get(Student, fixtures['student_id']).get_enrolled_courses()
+
+    def course_roster():
+        db.session.get(Course, fixtures['course_id']).get_enrolled_students()
+
+    def submissions():
+        db.session.get(Assignment, fixtures['assignment_id']).get_all_submissions()
+
+    def course_to_dict():
+        db.session.get(Course, fixtures['course_id']).to_dict()
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = fixtures['student_id']
+        sess['role'] = 'student'
+
+    def grades_view():
+        response = client.get('/student/grades')
+        assert response.status_code == 200, response.status_code
+
+    return {
+        'user_login': (login, fresh),
+        'search_courses': (search, fresh),
+        'enroll_drop': (enroll_drop, fresh),
+        'get_enrolled_courses': (enrolled_courses, fresh),
+        'get_enrolled_students': (course_roster, fresh),
+        'get_all_submissions': (submissions, fresh),
+        'course_to_dict': (course_to_dict, fresh),
+        'view_grades': (grades_view, fresh),
+    }
+
+
+def run(sizes, min_time=1.0, only=None, log=print):
+    results = {}
+    workdir = tempfile.mkdtemp()
+    for students, courses in sizes:
+        label = f'{students}x{courses}'
+        path = os.path.join(workdir, f'bench_{label}.db')
+        engine = datagen.make_engine(f'sqlite:///{path}')
+        log(f"Dataset {label}:")
+        datagen.load(engine, datagen.generate(students=students, courses=courses,
+                                              staff=max(20, courses // 5)), log=log)
+        engine.dispose()
+
+        app = build_app(f'sqlite:///{path}')
+        results[label] = {}
+        with app.app_context():
+            fixtures = pick_fixtures()
+            for name, (op, setup) in cases(app, fixtures).items():
+                if only and name not in only:
+                    continue
+                result = run_case(op, setup, min_time=min_time)
+                results[label][name] = result
+                log(f"  {name:<22} {result['ops_per_sec']:>10,.1f} ops/s  p50 {result['p50_ms']:>8.3f} ms  "
+                    f"p95 {result['p95_ms']:>8.3f} ms  p99 {result['p99_ms']:>8.3f} ms  (n={result['iterations']})")
+            db.session.remove()
+            db.engine.dispose()
+    return {
+        'meta': {'created_at': datetime.now().isoformat(timespec='seconds'),
+                 'python': platform.python_version(), 'platform': platform.platform(),
+                 'min_time': min_time},
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='Comma separated STUDENTSxCOURSES datasets')
+    parser.add_argument('--min-time', type=float, default=1.0, help='Seconds of timed work per case')
+    parser.add_argument('--only', nargs='*', help='Run only these cases')
+    parser.add_argument('--save', metavar='PATH', help='Write results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='Baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown fraction')
+    args = parser.parse_args(argv)
+
+    report = run(parse_sizes(args.sizes), min_time=args.min_time, only=args.only)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.tolerance)
+        for size, name, metric, before, after in regressions:
+            print(f"REGRESSION {size} {name}: {metric} {before:.3f} -> {after:.3f}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Overhead of the sampling profiler on request handling.
+
+Times batches of GET /login (routing, session, Jinja rendering) and of a
+pure-Python loop with the profiler off and with a window sampler armed on
+every thread, alternating the two so drift affects both alike. Overhead is
+the relative difference of the median batch times; the target is under 2%.
+
+    python -m benchmarks.profiler_benchmark --rounds 21
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import profiler
+
+OVERHEAD_TARGET = 0.02
+
+
+def workloads(requests):
+    from app import create_app, load_blueprints
+    from config import TestingConfig
+
+    app = create_app(TestingConfig)
+    load_blueprints(app)
+    client = app.test_client()
+
+    def login_pages():
+        for _ in range(requests):
+            client.get('/login').close()
+
+    def python_loop():
+        total = 0
+        for i in range(requests * 2000):
+            total += i % 7
+        return total
+
+    return {'login_page': login_pages, 'python_loop': python_loop}
+
+
+def batch_time(op):
+    start = time.perf_counter()
+    op()
+    return time.perf_counter() - start
+
+
+def run(requests=1000, rounds=21, interval=0.01, log=print):
+    results = {}
+    for name, op in workloads(requests).items():
+        op()
+        off, armed, samples = [], [], 0
+        for _ in range(rounds):
+            off.append(batch_time(op))
+            sampler = profiler.Sampler(interval).start()
+            armed.append(batch_time(op))
+            sampler.stop()
+            samples += sampler.samples
+        off_ms = statistics.median(off) * 1000
+        armed_ms = statistics.median(armed) * 1000
+        results[name] = {'off_ms': off_ms, 'armed_ms': armed_ms, 'overhead': armed_ms / off_ms - 1,
+                         'samples': samples}
+        log(f"{name:<12} off {off_ms:8.1f} ms  armed {armed_ms:8.1f} ms  "
+            f"overhead {results[name]['overhead']:+.2%}  ({samples} samples)")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per batch')
+    parser.add_argument('--rounds', type=int, default=21)
+    parser.add_argument('--interval', type=float, default=0.01, help='Seconds between samples')
+    parser.add_argument('--json', metavar='PATH', help='Write results as JSON')
+    args = parser.parse_args(argv)
+
+    results = run(args.requests, args.rounds, args.interval)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    over = [name for name, result in results.items() if result['overhead'] > OVERHEAD_TARGET]
+    if over:
+        print(f"Over the {OVERHEAD_TARGET:.0%} target: {', '.join(over)}")
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
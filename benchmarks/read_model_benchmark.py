@@ -0,0 +1,141 @@
+"""ORM entities vs column-only read models for the list pages.
+
+Loads N students, N courses (each with an instructor and a TA) and a course
+with N enrollments into SQLite, then times and memory-profiles each list
+query both ways:
+
+    people   User.search_users('')          vs read_models.search_people('')
+    courses  Course.search_courses('') with
+             instructor and TA names read    vs read_models.search_courses('')
+    roster   Course.get_enrolled_students()  vs read_models.enrolled_students(id)
+
+Memory is the tracemalloc peak while building the list and the bytes still
+held by the list (plus the session's identity map) afterwards.
+
+    python -m benchmarks.read_model_benchmark --rows 10000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from benchmarks.model_benchmark import build_app, run_case
+from extensions import db
+
+ROSTER_COURSE_ID = 1
+
+
+def seed(rows):
+    """rows students and courses, two staff per 100 courses, and one course holding every student"""
+    from models.courses import Course
+    from models.enrollment import Enrollment
+    from models.user import User
+
+    password_hash = generate_password_hash('password123')
+    staff = max(2, rows // 50)
+    users = [{'id': i, 'name': f'Staff {i}', 'email': f'staff{i}@uni.edu', 'password_hash': password_hash,
+              'role': 'instructor' if i % 2 else 'ta', 'office': 'Building 1', 'office_hours': 'Mon 9-10'}
+             for i in range(1, staff + 1)]
+    users += [{'id': staff + i, 'name': f'Student {i}', 'email': f'student{i}@uni.edu',
+               'password_hash': password_hash, 'role': 'student', 'major': 'Computer Science',
+               'level': 'Junior', 'office': None, 'office_hours': None}
+              for i in range(1, rows + 1)]
+    courses = [{'id': i, 'code': f'C{i:05d}', 'name': f'Course {i}', 'description': f'Course number {i}',
+                'credits': 3, 'max_seats': rows, 'seats_left': rows, 'schedule': 'Mon/Wed 9:00-10:00 AM',
+                'department': 'General', 'instructor_id': 1 + (i * 2) % staff, 'ta_id': 2 + (i * 2) % staff}
+               for i in range(1, rows + 1)]
+    enrollments = [{'student_id': staff + i, 'course_id': ROSTER_COURSE_ID} for i in range(1, rows + 1)]
+    db.session.execute(insert(User), users)
+    db.session.execute(insert(Course), courses)
+    db.session.execute(insert(Enrollment), enrollments)
+    db.session.commit()
+
+
+def cases():
+    """name -> (orm, read model); each builds the list a page would render"""
+    from models import read_models
+    from models.courses import Course
+    from models.user import User
+
+    def orm_courses():
+        courses = Course.search_courses('')
+        # What the template reads: the staff names through the relationships
+        for course in courses:
+            course.instructor and course.instructor.name
+            course.ta and course.ta.name
+        return courses
+
+    return {
+        'people': (lambda: User.search_users(''), lambda: read_models.search_people('')),
+        'courses': (orm_courses, lambda: read_models.search_courses('')),
+        'roster': (lambda: db.session.get(Course, ROSTER_COURSE_ID).get_enrolled_students(),
+                   lambda: read_models.enrolled_students(ROSTER_COURSE_ID)),
+    }
+
+
+def memory(op):
+    """Peak bytes while op() runs and bytes still held while its result is alive"""
+    db.session.remove()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = op()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        held = current - before
+        count = len(result)
+        del result
+    finally:
+        tracemalloc.stop()
+        db.session.remove()
+    return {'rows': count, 'peak_bytes': peak - before, 'held_bytes': held}
+
+
+def run(rows=10000, min_time=1.0, log=print):
+    path = os.path.join(tempfile.mkdtemp(), 'read_models.db')
+    app = build_app(f'sqlite:///{path}')
+    results = {}
+    with app.app_context():
+        db.create_all()
+        seed(rows)
+        for name, (orm, read) in cases().items():
+            result = {}
+            for kind, op in (('orm', orm), ('read_model', read)):
+                def timed():
+                    op()
+                    db.session.remove()
+                result[kind] = {**run_case(timed, min_time=min_time, min_iterations=5, warmup=1), **memory(op)}
+            results[name] = result
+            orm_r, read_r = result['orm'], result['read_model']
+            log(f"{name:<8} {orm_r['rows']:>6} rows  "
+                f"p50 {orm_r['p50_ms']:>8.1f} -> {read_r['p50_ms']:>7.1f} ms ({orm_r['p50_ms'] / read_r['p50_ms']:.1f}x)  "
+                f"peak {orm_r['peak_bytes'] / 2**20:>6.1f} -> {read_r['peak_bytes'] / 2**20:>5.1f} MiB  "
+                f"held {orm_r['held_bytes'] / 2**20:>6.1f} -> {read_r['held_bytes'] / 2**20:>5.1f} MiB")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--min-time', type=float, default=1.0, help='Seconds to time each case')
+    parser.add_argument('--json', metavar='PATH', help='Write results as JSON')
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, args.min_time)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
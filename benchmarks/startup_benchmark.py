@@ -0,0 +1,109 @@
+"""Cold-start benchmark for create_app.
+
+Each run is a fresh interpreter that times importing the app module,
+create_app(profile) and the first request (GET /login through the test
+client, which is when lazily loaded blueprints get imported). The median
+of the runs is compared against a target so startup regressions fail:
+
+    python -m benchmarks.startup_benchmark --profile development --runs 7
+    python -m benchmarks.startup_benchmark --profile production --target-ms 900
+
+A bare interpreter start is subtracted so the numbers are the app's own cost.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Median import + create_app + first request, in milliseconds
+STARTUP_TARGET_MS = 1000
+
+# Runs in the child interpreter; prints the phase timings as JSON
+PROBE = '''
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app({profile!r})
+t2 = time.perf_counter()
+response = app.test_client().get('/login')
+t3 = time.perf_counter()
+print(json.dumps({{'import_ms': (t1 - t0) * 1000, 'create_app_ms': (t2 - t1) * 1000,
+                  'first_request_ms': (t3 - t2) * 1000, 'status': response.status_code}}))
+'''
+
+PHASES = ('import_ms', 'create_app_ms', 'first_request_ms')
+
+
+def child_env(database_url):
+    env = dict(os.environ)
+    # Nothing connects during startup, but the URL must be importable without a driver
+    env['DATABASE_URL'] = database_url
+    env['SEAT_RECONCILE_INTERVAL'] = '0'
+    return env
+
+
+def interpreter_ms(env):
+    """Wall time of an interpreter that does nothing"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], cwd=ROOT, env=env, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(profile, env):
+    """One cold start; returns the phase timings and the total wall time"""
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', PROBE.format(profile=profile)], cwd=ROOT, env=env,
+                         check=True, capture_output=True, text=True).stdout
+    wall = (time.perf_counter() - start) * 1000
+    result = json.loads(out.strip().splitlines()[-1])
+    result['wall_ms'] = wall
+    result['total_ms'] = sum(result[phase] for phase in PHASES)
+    return result
+
+
+def run(profile='development', runs=5, database_url='sqlite:///:memory:', log=print):
+    """Median of each phase over several cold starts"""
+    env = child_env(database_url)
+    # First run warms the .pyc and OS file caches and is not counted
+    measure(profile, env)
+    baseline = statistics.median(interpreter_ms(env) for _ in range(3))
+    samples = [measure(profile, env) for _ in range(runs)]
+    statuses = {sample['status'] for sample in samples}
+    summary = {key: statistics.median(sample[key] for sample in samples)
+               for key in PHASES + ('total_ms', 'wall_ms')}
+    summary['interpreter_ms'] = baseline
+    summary['status'] = statuses.pop() if len(statuses) == 1 else sorted(statuses)
+    log(f"{profile:<12} import {summary['import_ms']:>7.1f} ms  create_app {summary['create_app_ms']:>7.1f} ms  "
+        f"first request {summary['first_request_ms']:>7.1f} ms  total {summary['total_ms']:>7.1f} ms  "
+        f"(process {summary['wall_ms'] - baseline:>7.1f} ms over a bare interpreter)")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profile', nargs='*', default=['development', 'production'])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--target-ms', type=float, default=STARTUP_TARGET_MS,
+                        help='Fail if the median total is above this')
+    parser.add_argument('--database-url', default='sqlite:///:memory:')
+    parser.add_argument('--json', metavar='PATH', help='Write results as JSON')
+    args = parser.parse_args(argv)
+
+    results = {profile: run(profile, args.runs, args.database_url) for profile in args.profile}
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    slow = [profile for profile, summary in results.items() if summary['total_ms'] > args.target_ms]
+    for profile in slow:
+        print(f"{profile}: startup {results[profile]['total_ms']:.0f} ms is over the {args.target_ms:.0f} ms target")
+    return 1 if slow else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
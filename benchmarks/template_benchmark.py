@@ -0,0 +1,120 @@
+"""First-load cost of every template, cold vs bytecode cache vs warmed.
+
+For each template under templates/ this times the first get_template in a
+freshly created app (a new Jinja environment, so nothing is in memory) in
+three setups:
+
+    compile   no bytecode cache: the template is parsed and compiled
+    bytecode  TEMPLATE_BYTECODE_CACHE with a filled cache directory
+    warmed    TEMPLATE_WARMUP: create_app already loaded it
+
+which is what the first request rendering that template pays on top of the
+view itself. It then times the first real request (GET /login) in fresh
+interpreters for the same three setups.
+
+    python -m benchmarks.template_benchmark --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import startup_benchmark
+
+MODES = ('compile', 'bytecode', 'warmed')
+
+# Environment of the child interpreter for each mode (the cache dir is added by run)
+MODE_ENV = {
+    'compile': {'TEMPLATE_BYTECODE_CACHE': '0', 'TEMPLATE_WARMUP': '0'},
+    'bytecode': {'TEMPLATE_BYTECODE_CACHE': '1', 'TEMPLATE_WARMUP': '0'},
+    'warmed': {'TEMPLATE_BYTECODE_CACHE': '1', 'TEMPLATE_WARMUP': '1'},
+}
+
+
+def make_app(mode, cache_dir):
+    from app import create_app
+    from config import TestingConfig
+
+    class TemplateConfig(TestingConfig):
+        TEMPLATE_BYTECODE_CACHE = mode != 'compile'
+        TEMPLATE_CACHE_DIR = cache_dir
+        TEMPLATE_WARMUP = mode == 'warmed'
+
+    return create_app(TemplateConfig)
+
+
+def load_times(mode, cache_dir):
+    """{template: ms} for the first load of each template in a new app"""
+    import templating
+
+    app = make_app(mode, cache_dir)
+    times = {}
+    for name in templating.template_names(app):
+        start = time.perf_counter()
+        app.jinja_env.get_template(name)
+        times[name] = (time.perf_counter() - start) * 1000
+    return times
+
+
+def per_template(runs, cache_dir):
+    """{template: {mode: median ms}}"""
+    # Fill the bytecode cache (and import everything) before timing
+    load_times('bytecode', cache_dir)
+    samples = {mode: [load_times(mode, cache_dir) for _ in range(runs)] for mode in MODES}
+    names = sorted(samples['compile'][0])
+    return {name: {mode: statistics.median(run[name] for run in samples[mode]) for mode in MODES}
+            for name in names}
+
+
+def first_requests(runs, cache_dir, profile='production', database_url='sqlite:///:memory:'):
+    """{mode: startup_benchmark summary} of fresh interpreters"""
+    results = {}
+    for mode in MODES:
+        env = startup_benchmark.child_env(database_url)
+        env.update(MODE_ENV[mode], TEMPLATE_CACHE_DIR=cache_dir)
+        startup_benchmark.measure(profile, env)
+        samples = [startup_benchmark.measure(profile, env) for _ in range(runs)]
+        results[mode] = {key: statistics.median(sample[key] for sample in samples)
+                         for key in startup_benchmark.PHASES + ('total_ms',)}
+    return results
+
+
+def run(runs=5, cache_dir=None, log=print):
+    cache_dir = cache_dir or tempfile.mkdtemp(prefix='jinja-bench-')
+    templates = per_template(runs, cache_dir)
+    log(f"{'template':<44} {'compile':>9} {'bytecode':>9} {'warmed':>9}  (first load, ms)")
+    for name, times in sorted(templates.items(), key=lambda item: item[1]['compile'], reverse=True):
+        log(f"{name:<44} {times['compile']:>9.2f} {times['bytecode']:>9.2f} {times['warmed']:>9.3f}")
+    totals = {mode: sum(times[mode] for times in templates.values()) for mode in MODES}
+    log(f"{'all ' + str(len(templates)) + ' templates':<44} {totals['compile']:>9.1f} "
+        f"{totals['bytecode']:>9.1f} {totals['warmed']:>9.2f}")
+
+    requests = first_requests(runs, cache_dir)
+    log('')
+    for mode, summary in requests.items():
+        log(f"{mode:<10} create_app {summary['create_app_ms']:>7.1f} ms  "
+            f"first request {summary['first_request_ms']:>7.1f} ms")
+    return {'templates': templates, 'totals': totals, 'first_request': requests}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--cache-dir', help='Bytecode cache directory (default: a new temp dir)')
+    parser.add_argument('--json', metavar='PATH', help='Write results as JSON')
+    args = parser.parse_args(argv)
+
+    results = run(args.runs, args.cache_dir)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
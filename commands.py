@@ -0,0 +1,108 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('recompute-assignment-stats')
+@with_appcontext
+def recompute_assignment_stats_command():
+    """Rebuild the denormalized submission aggregates on assignments"""
+    from models.assignment import Assignment
+    drifted = Assignment.recompute_stats()
+    click.echo(f"Recomputed assignment stats ({drifted} assignments had drifted)")
+
+
+@click.command('reconcile-seats')
+@with_appcontext
+def reconcile_seats_command():
+    """Recompute seats_left of every course from its enrollments"""
+    import time
+    from models.courses import Course
+    start = time.perf_counter()
+    drift = Course.reconcile_seats()
+    elapsed = (time.perf_counter() - start) * 1000
+    for course_id, code, stored, expected in drift:
+        click.echo(f"  {code} (id={course_id}): seats_left {stored} -> {expected}")
+    click.echo(f"Reconciled seats in {elapsed:.1f}ms ({len(drift)} courses had drifted)")
+
+
+def _collect_ids(ids, ids_file):
+    ids = list(ids)
+    if ids_file:
+        ids.extend(int(line) for line in ids_file if line.strip())
+    return ids
+
+
+@click.command('delete-courses')
+@click.argument('course_ids', nargs=-1, type=int)
+@click.option('--ids-file', type=click.File('r'), help='File with one course id per line')
+@with_appcontext
+def delete_courses_command(course_ids, ids_file):
+    """Bulk-delete courses and all their dependent rows"""
+    from services import deletion
+    counts = deletion.delete_courses(_collect_ids(course_ids, ids_file))
+    click.echo("Deleted " + ", ".join(f"{count} {table}" for table, count in counts.items()))
+
+
+@click.command('delete-users')
+@click.argument('user_ids', nargs=-1, type=int)
+@click.option('--ids-file', type=click.File('r'), help='File with one user id per line')
+@with_appcontext
+def delete_users_command(user_ids, ids_file):
+    """Bulk-delete users (admins are skipped) and clean up their references"""
+    from services import deletion
+    counts = deletion.delete_users(_collect_ids(user_ids, ids_file))
+    click.echo("Deleted " + ", ".join(f"{count} {table}" for table, count in counts.items()))
+
+
+@click.command('schema-status')
+@with_appcontext
+def schema_status_command():
+    """List schema migrations and whether they are applied"""
+    from extensions import db
+    from migrations import runner
+    for version, description, applied in runner.status(db.engine):
+        click.echo(f"  [{'x' if applied else ' '}] {version:04d} {description}")
+
+
+@click.command('schema-upgrade')
+@click.option('--target', type=int, default=None, help='Stop after this migration version')
+@with_appcontext
+def schema_upgrade_command(target):
+    """Apply pending schema migrations"""
+    from extensions import db
+    from migrations import runner
+    applied = runner.upgrade(db.engine, target=target, log=click.echo)
+    click.echo(f"{len(applied)} migration(s) applied")
+
+
+@click.command('compile-templates')
+@with_appcontext
+def compile_templates_command():
+    """Compile every template into the Jinja bytecode cache"""
+    from flask import current_app
+    import templating
+    if not current_app.jinja_env.bytecode_cache:
+        click.echo("TEMPLATE_BYTECODE_CACHE is off; templates compiled but not cached")
+    timings = templating.warm_templates(current_app)
+    total = sum(timings.values())
+    click.echo(f"Loaded {len(timings)} templates in {total:.1f}ms")
+
+
+@click.command('sweep-sessions')
+@with_appcontext
+def sweep_sessions_command():
+    """Delete expired server-side sessions"""
+    from session_store import sweep_expired_sessions
+    click.echo(f"Deleted {sweep_expired_sessions()} expired sessions")
+
+
+def register_commands(app):
+    """Register maintenance commands on the Flask CLI"""
+    app.cli.add_command(recompute_assignment_stats_command)
+    app.cli.add_command(reconcile_seats_command)
+    app.cli.add_command(delete_courses_command)
+    app.cli.add_command(delete_users_command)
+    app.cli.add_command(schema_status_command)
+    app.cli.add_command(schema_upgrade_command)
+    app.cli.add_command(compile_templates_command)
+    app.cli.add_command(sweep_sessions_command)
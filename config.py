@@ -13,6 +13,24 @@ class Config:
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Read replicas for the GET views marked @replica_reads (comma-separated
+    # URLs; none: everything reads the primary). After a write a user reads
+    # the primary for REPLICA_STICKY_SECONDS; replicas are health-checked at
+    # most every REPLICA_HEALTH_INTERVAL seconds.
+    SQLALCHEMY_REPLICA_URIS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',')
+                               if url.strip()]
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+    REPLICA_HEALTH_INTERVAL = int(os.environ.get('REPLICA_HEALTH_INTERVAL', 10))
+    
+    # Connection pool per worker process (pool_metrics.py reports its use and
+    # suggests sizes at /admin/pool). With DB_POOL_LIVENESS_INTERVAL seconds
+    # set, a background SELECT 1 replaces the pre-ping on every checkout.
+    # The sizes apply to queue pools only (not SQLite :memory:, for one).
+    POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    POOL_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    POOL_LIVENESS_INTERVAL = int(os.environ.get('DB_POOL_LIVENESS_INTERVAL', 0))
+    
     # Optimized for SQL Server with Windows Authentication
     SQLALCHEMY_ENGINE_OPTIONS = {
         'pool_recycle': 299,
@@ -23,6 +41,115 @@ class Config:
         }
     }
     
-    # Session configuration
-    SESSION_TYPE = 'filesystem'
-    PERMANENT_SESSION_LIFETIME = 1800  # 30 minutes
\ No newline at end of file
+    # Session configuration: 'sqlite' (shared by the workers of a node),
+    # 'memory' (one process only) or 'cookie' (signed cookie, no server state)
+    SESSION_TYPE = os.environ.get('SESSION_TYPE', 'sqlite')
+    SESSION_SQLITE_PATH = os.environ.get('SESSION_SQLITE_PATH')  # None: sessions.db in the instance folder
+    SESSION_MEMORY_MAX_ENTRIES = int(os.environ.get('SESSION_MEMORY_MAX_ENTRIES', 10000))
+    PERMANENT_SESSION_LIFETIME = 1800  # 30 minutes
+    
+    # One transaction per request: model methods flush, the request commits once
+    UNIT_OF_WORK = os.environ.get('UNIT_OF_WORK', '1') == '1'
+    
+    # Replay of deadlocked/serialization-failed write transactions
+    DB_RETRY_ATTEMPTS = int(os.environ.get('DB_RETRY_ATTEMPTS', 4))
+    DB_RETRY_BASE_DELAY = 0.05  # seconds, doubled per attempt (with full jitter)
+    DB_RETRY_MAX_DELAY = 1.0
+    
+    # Import and register blueprints on the first request instead of in create_app
+    LAZY_BLUEPRINTS = False
+    
+    # Compiled templates cached on disk (directory None: a per-user temp dir),
+    # and every template loaded in create_app instead of on its first request
+    TEMPLATE_BYTECODE_CACHE = os.environ.get('TEMPLATE_BYTECODE_CACHE', '1') == '1'
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')
+    TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', '0') == '1'
+    
+    # /metrics (Prometheus text format): readable with this bearer token or as
+    # an admin. With several worker processes each writes its totals to
+    # METRICS_DIR every METRICS_FLUSH_INTERVAL seconds and a scrape sums them.
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_DIR = os.environ.get('METRICS_DIR')  # None: this process only
+    METRICS_FLUSH_INTERVAL = int(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+    
+    # Sampling profiler for admins (X-Profile header or a window; profiler.py):
+    # collapsed stacks in PROFILE_DIR (None: a temp dir), newest PROFILE_KEEP kept
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', '1') == '1'
+    PROFILE_DIR = os.environ.get('PROFILE_DIR')
+    PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.01))
+    PROFILE_KEEP = 50
+    PROFILE_MAX_SECONDS = 300
+    
+    # Per-fingerprint query statistics (query_stats.py), at most QUERY_STATS_MAX statements
+    QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', '1') == '1'
+    QUERY_STATS_MAX = int(os.environ.get('QUERY_STATS_MAX', 1000))
+    
+    # Slow-query log (slow_queries.py; 0 disables) with rate-limited plan capture
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 500))
+    SLOW_QUERY_PLANS = os.environ.get('SLOW_QUERY_PLANS', '1') == '1'
+    SLOW_QUERY_PLAN_INTERVAL = 600  # per fingerprint
+    SLOW_QUERY_PLANS_PER_MINUTE = 6
+    
+    # Structured JSON access/event log (access_log.py): '-' stdout, a file path, '' off.
+    # Written by a background thread from a queue of ACCESS_LOG_QUEUE records
+    ACCESS_LOG = os.environ.get('ACCESS_LOG', '-')
+    ACCESS_LOG_QUEUE = int(os.environ.get('ACCESS_LOG_QUEUE', 10000))
+    ACCESS_LOG_BATCH = 256
+    
+    # Identical concurrent catalog/roster reads share one query (single_flight.py);
+    # a TTL > 0 also reuses the result for that many seconds
+    SINGLE_FLIGHT_ENABLED = os.environ.get('SINGLE_FLIGHT_ENABLED', '1') == '1'
+    SINGLE_FLIGHT_TTL = float(os.environ.get('SINGLE_FLIGHT_TTL', 0))
+    
+    # Background jobs (interval in seconds, 0 disables)
+    SEAT_RECONCILE_INTERVAL = int(os.environ.get('SEAT_RECONCILE_INTERVAL', 0))
+    SESSION_SWEEP_INTERVAL = int(os.environ.get('SESSION_SWEEP_INTERVAL', 600))
+    JOBS_LOCK_PATH = os.environ.get('JOBS_LOCK_PATH')  # one worker per node runs the above; None: temp dir
+    
+    # Production server (gunicorn.conf.py): prefork workers, threads per worker,
+    # and recycling each worker after roughly WEB_MAX_REQUESTS requests
+    WEB_BIND = os.environ.get('WEB_BIND', '0.0.0.0:5000')
+    WEB_WORKERS = int(os.environ.get('WEB_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 4))
+    WEB_MAX_REQUESTS = int(os.environ.get('WEB_MAX_REQUESTS', 1000))
+    WEB_MAX_REQUESTS_JITTER = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 100))
+    WEB_TIMEOUT = int(os.environ.get('WEB_TIMEOUT', 30))
+    WEB_GRACEFUL_TIMEOUT = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    LAZY_BLUEPRINTS = True
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SECRET_KEY = 'test-secret-key'
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SEAT_RECONCILE_INTERVAL = 0
+    SESSION_SWEEP_INTERVAL = 0
+    POOL_LIVENESS_INTERVAL = 0
+    METRICS_DIR = None
+    ACCESS_LOG = ''
+    SESSION_TYPE = 'memory'
+    SQLALCHEMY_REPLICA_URIS = []
+    LAZY_BLUEPRINTS = True
+    TEMPLATE_BYTECODE_CACHE = False
+
+
+class ProductionConfig(Config):
+    DEBUG = False
+    # Everything is imported in the gunicorn master before it forks
+    LAZY_BLUEPRINTS = False
+    TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', '1') == '1'
+
+
+config_by_name = {
+    'development': DevelopmentConfig,
+    'dev': DevelopmentConfig,
+    'testing': TestingConfig,
+    'test': TestingConfig,
+    'production': ProductionConfig,
+    'prod': ProductionConfig,
+}
@@ -1,15 +1,18 @@
 from flask import Blueprint, render_template, redirect, url_for, request, flash, session
 from models.ta import TA
 from models.courses import Course
-from models.user import User
 from models.student import Student
 from models.assignment import Assignment
 from models.announcement import Announcement
 from models.submission import Submission
+from models import read_models
+from retry import retry_on_conflict
+from replicas import replica_reads
 
 ta_bp = Blueprint('ta', __name__, url_prefix='/ta')
 
 @ta_bp.route('/dashboard')
+@replica_reads
 def dashboard():
     if 'user_id' not in session or session.get('role') != 'ta':
         return redirect('/login')
@@ -26,6 +29,7 @@ def dashboard():
     return render_template('ta/dashboard.html', courses=courses)
 
 @ta_bp.route('/search_course', methods=['GET', 'POST'])
+@replica_reads
 def search_course():
     if 'user_id' not in session or session.get('role') != 'ta':
         return redirect('/login')
@@ -34,11 +38,12 @@ def search_course():
     if request.method == 'POST':
         query = request.form.get('query')
         if query:
-            results = Course.search_courses(query)
+            results = read_models.search_courses(query)
     
     return render_template('ta/search_course.html', results=results)
 
 @ta_bp.route('/search_student', methods=['GET', 'POST'])
+@replica_reads
 def search_student():
     if 'user_id' not in session or session.get('role') != 'ta':
         return redirect('/login')
@@ -47,13 +52,14 @@ def search_student():
     if request.method == 'POST':
         query = request.form.get('query')
         if query:
-            results = User.search_users(query)
+            results = read_models.search_people(query)
             # Filter for students only
             results = [user for user in results if user.role == 'student']
     
     return render_template('ta/search_student.html', results=results)
 
 @ta_bp.route('/course/<int:course_id>')
+@replica_reads
 def course_details(course_id):
     if 'user_id' not in session or session.get('role') != 'ta':
         return redirect('/login')
@@ -69,13 +75,10 @@ def course_details(course_id):
         flash("You are not assigned to this course", "error")
         return redirect(url_for('ta.dashboard'))
     
-    # Get all students (for enrollment management)
-    students = Student.get_all_students()
-    enrolled_students = course.get_enrolled_students()
+    enrolled_students = read_models.enrolled_students(course_id)
     
     return render_template('ta/course_details.html', 
                          course=course, 
-                         students=students,
                          enrolled_students=enrolled_students)
 
 @ta_bp.route('/course/<int:course_id>/add_assignment', methods=['POST'])
@@ -140,6 +143,7 @@ def add_announcement(course_id):
     return redirect(url_for('ta.course_details', course_id=course_id))
 
 @ta_bp.route('/course/<int:course_id>/attendance', methods=['GET', 'POST'])
+@replica_reads
 def attendance(course_id):
     if 'user_id' not in session or session.get('role') != 'ta':
         return redirect('/login')
@@ -155,7 +159,7 @@ def attendance(course_id):
         flash("You are not assigned to this course", "error")
         return redirect(url_for('ta.dashboard'))
     
-    students = course.get_enrolled_students()
+    students = read_models.enrolled_students(course_id)
     
     if request.method == 'POST':
         # Record attendance logic here
@@ -165,6 +169,7 @@ def attendance(course_id):
     return render_template('ta/attendance.html', course=course, students=students)
 
 @ta_bp.route('/assignment/<int:assignment_id>/submissions')
+@replica_reads
 def view_submissions(assignment_id):
     if 'user_id' not in session or session.get('role') != 'ta':
         return redirect('/login')
@@ -191,6 +196,7 @@ def view_submissions(assignment_id):
                          course=course)
 
 @ta_bp.route('/submission/<int:submission_id>/grade', methods=['POST'])
+@retry_on_conflict
 def submit_grade(submission_id):
     if 'user_id' not in session or session.get('role') != 'ta':
         return redirect('/login')
@@ -221,6 +227,7 @@ def submit_grade(submission_id):
     return redirect(request.referrer or url_for('ta.dashboard'))
 
 @ta_bp.route('/student/<int:student_id>')
+@replica_reads
 def view_student(student_id):
     if 'user_id' not in session or session.get('role') != 'ta':
         return redirect('/login')
@@ -238,6 +245,7 @@ def view_student(student_id):
                          courses=enrolled_courses)
 
 @ta_bp.route('/course/<int:course_id>/enroll_student/<int:student_id>')
+@retry_on_conflict
 def enroll_student(course_id, student_id):
     """Enroll a student in a course (TA function)"""
     if 'user_id' not in session or session.get('role') != 'ta':
@@ -1,11 +1,24 @@
-from flask import Blueprint, render_template, redirect, request, session, flash
+import time
+from flask import Blueprint, render_template, redirect, request, session, flash, current_app, jsonify, abort, \
+    send_from_directory
 from models.courses import Course
 from models.user import User  # Changed from People to User
+from models import read_models
 from extensions import db
+from services import deletion
+from retry import retry_on_conflict
+from session_store import revoke_user_sessions
+from streaming import Rows, stream_page
+from pool_metrics import pool_report, reset_stats
+import access_log
+import profiler
+import query_stats
+from replicas import replica_reads
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
 @admin_bp.route('/dashboard')
+@replica_reads
 def dashboard():
     if 'user_id' not in session or session.get('role') != 'admin':
         return redirect('/login')
@@ -13,22 +26,24 @@ def dashboard():
     return render_template('admin/dashboard.html')
 
 @admin_bp.route('/searchcourse')
+@replica_reads
 def searchcourse():
     if 'user_id' not in session or session.get('role') != 'admin':
         return redirect('/login')
     
     search_term = request.args.get('search', '')
-    courses = Course.search_courses(search_term)
+    courses = Rows(read_models.stream_courses(search_term))
     
-    return render_template('admin/searchcourse.html', courses=courses, search_term=search_term)
+    return stream_page('admin/searchcourse.html', courses=courses, search_term=search_term)
 
 @admin_bp.route('/viewcourse/<int:course_id>')
+@replica_reads
 def view_course(course_id):
     if 'user_id' not in session or session.get('role') != 'admin':
         return redirect('/login')
     
     course = Course.query.get(course_id)
-    students = course.get_enrolled_students()
+    students = read_models.enrolled_students(course_id)
     if not course:
         flash("Course not found", "error")
         return redirect('/admin/searchcourse')
@@ -36,14 +51,15 @@ def view_course(course_id):
     return render_template('admin/viewcourse.html', course=course, students=students)
 
 @admin_bp.route('/searchpeople')
+@replica_reads
 def searchpeople():
     if 'user_id' not in session or session.get('role') != 'admin':
         return redirect('/login')
     
     search_term = request.args.get('search', '')
-    people = User.search_users(search_term)  # Changed from People().search_people()
+    people = Rows(read_models.stream_people(search_term))
     
-    return render_template('admin/searchpeople.html', people=people, search_term=search_term)
+    return stream_page('admin/searchpeople.html', people=people, search_term=search_term)
 
 @admin_bp.route('/addperson', methods=['GET', 'POST'])
 def add_person():
@@ -207,23 +223,9 @@ def delete_person(person_id):
         if person.role == 'admin':
             flash('Cannot delete an admin user', 'error')
             return redirect('/admin/searchpeople')
-        if person.role=='instructor':
-            Course.query.filter_by(instructor_id=person_id).update({'instructor_id': None})
-            from models.announcement import Announcement
-            Announcement.query.filter_by(poster_id=person_id).update({'poster_id': None})
-        if person.role=='ta':
-            Course.query.filter_by(ta_id=person_id).update({'ta_id': None})
-            from models.announcement import Announcement
-            Announcement.query.filter_by(poster_id=person_id).update({'poster_id': None})
-        if person.role=='student':
-            from models.enrollment import Enrollment
-            Enrollment.query.filter_by(student_id=person_id).delete()
-
-            from models.submission import Submission
-            Submission.query.filter_by(student_id=person_id).delete()
-
-        db.session.delete(person)
-        db.session.commit()
+        
+        deletion.delete_users([person_id])
+        revoke_user_sessions([person_id])
         flash('Person deleted successfully!', 'success')
     else:
         flash('Person not found', 'error')
@@ -235,11 +237,9 @@ def delete_course(course_id):
     if 'user_id' not in session or session.get('role') != 'admin':
         return redirect('/login')
     
-    course = Course.query.get(course_id)
+    counts = deletion.delete_courses([course_id])
     
-    if course:
-        db.session.delete(course)
-        db.session.commit()
+    if counts['courses']:
         flash('Course deleted successfully!', 'success')
     else:
         flash('Course not found', 'error')
@@ -247,6 +247,7 @@ def delete_course(course_id):
     return redirect('/admin/searchcourse')
 
 @admin_bp.route('/dropstudent/<int:course_id>/<int:student_id>')
+@retry_on_conflict
 def drop_student(course_id, student_id):
     if 'user_id' not in session or session.get('role') != 'admin':
         return redirect('/login')
@@ -324,3 +325,80 @@ def add_course():
             flash('Please fill all required fields', 'error')
         
         return redirect('/admin/searchcourse')
+
+@admin_bp.route('/pool')
+def pool_status():
+    # Per worker: each gunicorn worker has its own pools
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return redirect('/login')
+
+    return jsonify(pool_report(current_app))
+
+@admin_bp.route('/pool/reset', methods=['POST'])
+def reset_pool_stats():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return redirect('/login')
+
+    reset_stats(current_app)
+    return jsonify(pool_report(current_app))
+
+@admin_bp.route('/profiles')
+def profiles():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return redirect('/login')
+    if not current_app.config.get('PROFILER_ENABLED'):
+        abort(404)
+
+    return jsonify(profiler.profile_index(current_app))
+
+@admin_bp.route('/profiles/<name>')
+def download_profile(name):
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return redirect('/login')
+    if not current_app.config.get('PROFILER_ENABLED'):
+        abort(404)
+
+    return send_from_directory(profiler.profile_dir(current_app), name, mimetype='text/plain')
+
+@admin_bp.route('/profiles/window', methods=['POST'])
+def profile_window():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return redirect('/login')
+    if not current_app.config.get('PROFILER_ENABLED'):
+        abort(404)
+
+    seconds = min(request.form.get('seconds', 30, type=float), current_app.config.get('PROFILE_MAX_SECONDS', 300))
+    name = profiler.start_window(current_app._get_current_object(), seconds)
+    if name is None:
+        return jsonify({'error': 'A profile is already running on this worker'}), 409
+    return jsonify({'seconds': seconds, 'name': name}), 202
+
+@admin_bp.route('/querystats')
+def querystats():
+    # Per worker, like the pool report
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return redirect('/login')
+
+    sort = request.args.get('sort', 'total')
+    if sort not in query_stats.SORTS:
+        sort = 'total'
+    report = query_stats.stats.report(sort, limit=200)
+    return render_template('admin/querystats.html', report=report, sort=sort,
+                           sorts=query_stats.SORTS, since=time.strftime('%Y-%m-%d %H:%M:%S',
+                                                                        time.localtime(report['since'])))
+
+@admin_bp.route('/querystats/reset', methods=['POST'])
+def reset_querystats():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return redirect('/login')
+
+    query_stats.stats.reset()
+    return redirect('/admin/querystats')
+
+@admin_bp.route('/accesslog')
+def access_log_status():
+    # Per worker: queue depth and written/dropped counters of this process's log thread
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return redirect('/login')
+
+    return jsonify(access_log.writer.stats())
@@ -3,10 +3,14 @@ from models.student import Student
 from models.courses import Course
 from models.announcement import Announcement
 from models.assignment import Assignment
+from models import read_models
+from retry import retry_on_conflict
+from replicas import replica_reads
 
 student_bp = Blueprint('student', __name__, url_prefix='/student')
 
 @student_bp.route('/dashboard')
+@replica_reads
 def dashboard():
     if 'user_id' not in session or session.get('role') != 'student':
         return redirect('/login')
@@ -23,6 +27,7 @@ def dashboard():
                          enrolled_courses=enrolled_courses)
 
 @student_bp.route('/courses')
+@replica_reads
 def view_courses():
     if 'user_id' not in session or session.get('role') != 'student':
         return redirect('/login')
@@ -35,13 +40,14 @@ def view_courses():
                          courses=enrolled_courses)
 
 @student_bp.route('/search')
+@replica_reads
 def search_courses():
     if 'user_id' not in session or session.get('role') != 'student':
         return redirect('/login')
     
     keyword = request.args.get('keyword', '')
     student = Student.get_by_id(session['user_id'])
-    courses = Course.search_courses(keyword)
+    courses = read_models.search_courses(keyword)
     
     enrolled_course_ids = [course.id for course in student.get_enrolled_courses()]
     
@@ -52,6 +58,7 @@ def search_courses():
                          keyword=keyword)
 
 @student_bp.route('/enroll/<int:course_id>')
+@retry_on_conflict
 def enroll_course(course_id):
     if 'user_id' not in session or session.get('role') != 'student':
         return redirect('/login')
@@ -63,6 +70,7 @@ def enroll_course(course_id):
     return redirect('/student/courses')
 
 @student_bp.route('/drop/<int:course_id>')
+@retry_on_conflict
 def drop_course(course_id):
     if 'user_id' not in session or session.get('role') != 'student':
         return redirect('/login')
@@ -74,6 +82,7 @@ def drop_course(course_id):
     return redirect('/student/courses')
 
 @student_bp.route('/course/<int:course_id>')
+@replica_reads
 def view_course(course_id):
     if 'user_id' not in session or session.get('role') != 'student':
         return redirect('/login')
@@ -101,6 +110,7 @@ def view_course(course_id):
                          assignments=assignments)
 
 @student_bp.route('/course/<int:course_id>/announcements')
+@replica_reads
 def view_announcements(course_id):
     if 'user_id' not in session or session.get('role') != 'student':
         return redirect('/login')
@@ -120,6 +130,7 @@ def view_announcements(course_id):
                          announcements=announcements)
 
 @student_bp.route('/course/<int:course_id>/assignments')
+@replica_reads
 def view_assignments(course_id):
     if 'user_id' not in session or session.get('role') != 'student':
         return redirect('/login')
@@ -138,7 +149,7 @@ def view_assignments(course_id):
         status = student.get_assignment_status(assignment.id)
         assignment.submitted = status['submitted']
         assignment.grade = status['grade']
-        assignment.submission_timestamp = status['timestamp']
+        assignment.submission_timestamp = status.get('submitted_at')
     
     return render_template('student/student-assignments.html', 
                          student=student, 
@@ -146,6 +157,7 @@ def view_assignments(course_id):
                          assignments=assignments)
 
 @student_bp.route('/assignment/<int:assignment_id>/submit', methods=['GET', 'POST'])
+@retry_on_conflict
 def submit_assignment(assignment_id):
     if 'user_id' not in session or session.get('role') != 'student':
         return redirect('/login')
@@ -181,6 +193,7 @@ def submit_assignment(assignment_id):
                          course=course)
 
 @student_bp.route('/grades')
+@replica_reads
 def view_grades():
     if 'user_id' not in session or session.get('role') != 'student':
         return redirect('/login')
@@ -188,26 +201,20 @@ def view_grades():
     student = Student.get_by_id(session['user_id'])
     
     grades = {}
-    for course in student.get_enrolled_courses():
-        assignments = course.get_assignments()
-        course_grades = []
-        for assignment in assignments:
-            status = student.get_assignment_status(assignment.id)
-            if status['submitted'] and status['grade'] is not None:
-                course_grades.append({
-                    'assignment': assignment.title,
-                    'grade': status['grade'],
-                    'max_grade': 10,
-                    'feedback': assignment.get_submission(student.id).get('feedback') if assignment.get_submission(student.id) else None
-                })
-        if course_grades:
-            grades[course.name] = course_grades
+    for course_name, title, grade, feedback in student.get_graded_submissions():
+        grades.setdefault(course_name, []).append({
+            'assignment': title,
+            'grade': grade,
+            'max_grade': 10,
+            'feedback': feedback
+        })
     
     return render_template('student/grades.html', 
                          student=student, 
                          grades=grades)
 
 @student_bp.route('/schedule')
+@replica_reads
 def view_schedule():
     if 'user_id' not in session or session.get('role') != 'student':
         return redirect('/login')
@@ -1,4 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 
-# Create SQLAlchemy instance
-db = SQLAlchemy()
\ No newline at end of file
+from replicas import RoutingSession
+
+# Create SQLAlchemy instance; its session routes replica reads (replicas.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""Production server settings.
+
+    gunicorn --config gunicorn.conf.py wsgi:app
+
+The app is imported once in the master (preload_app) so workers share its
+code pages copy-on-write, then WEB_WORKERS processes are forked, each
+serving WEB_THREADS threads. Connections opened by the master must not be
+shared across processes, so every worker disposes the inherited engine
+pools (primary and replicas) right after the fork and opens its own.
+Workers are recycled after WEB_MAX_REQUESTS (+ jitter) requests, finishing
+in-flight requests first, which bounds memory growth. With METRICS_DIR
+set, the workers share request metrics through files in it: cleared when
+the server starts, written by each worker as it exits. Each worker writes
+what is left of its access log queue as it exits. All values come from
+Config (and so from the environment).
+"""
+from config import Config
+
+bind = Config.WEB_BIND
+workers = Config.WEB_WORKERS
+threads = Config.WEB_THREADS
+worker_class = 'gthread' if Config.WEB_THREADS > 1 else 'sync'
+preload_app = True
+max_requests = Config.WEB_MAX_REQUESTS
+max_requests_jitter = Config.WEB_MAX_REQUESTS_JITTER
+timeout = Config.WEB_TIMEOUT
+graceful_timeout = Config.WEB_GRACEFUL_TIMEOUT
+# The app writes its own structured access log (access_log.py) when ACCESS_LOG is set
+accesslog = None if Config.ACCESS_LOG else '-'
+
+
+def on_starting(server):
+    """Start the metrics of this run from zero"""
+    if Config.METRICS_DIR:
+        from metrics import clear_directory
+        clear_directory(Config.METRICS_DIR)
+
+
+def post_fork(server, worker):
+    """Give the new worker its own connection pools and start its background jobs"""
+    from wsgi import app
+    from jobs import claim_node_jobs, start_scheduled_jobs
+    from pool_metrics import engines, reset_stats
+
+    # close=False: the sockets still belong to the master, only drop our references
+    for engine in engines(app).values():
+        engine.dispose(close=False)
+    reset_stats(app)
+    # No job runs in the master: each worker probes its own pools, and one
+    # worker per node (whichever holds the jobs lock) sweeps and reconciles
+    start_scheduled_jobs(app, node_jobs=claim_node_jobs(app))
+    server.log.info("Worker %s: engine pools reset after fork", worker.pid)
+
+
+def worker_exit(server, worker):
+    """Leave this worker's final request counts for the scrapes and write out its log"""
+    from access_log import writer
+    from metrics import exporter
+    exporter.flush()
+    writer.close()
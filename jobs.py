@@ -0,0 +1,117 @@
+import logging
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: one process, it runs every job
+    fcntl = None
+
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """Run a function every `interval` seconds on a daemon thread inside an app context
+
+    per_process jobs run in every worker; the others in one process per node.
+    """
+    
+    def __init__(self, app, name, interval, func, per_process=False):
+        self.app = app
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.per_process = per_process
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"job-{self.name}", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+    
+    def run_once(self):
+        with self.app.app_context():
+            try:
+                return self.func()
+            except Exception:
+                db.session.rollback()
+                logger.exception("Scheduled job %s failed", self.name)
+            finally:
+                db.session.remove()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+
+def reconcile_seats_job():
+    """Scheduled seats_left reconciliation; logs every drifted course"""
+    from models.courses import Course
+    drift = Course.reconcile_seats()
+    for course_id, code, stored, expected in drift:
+        logger.warning("seats_left drift on course %s (%s): stored %s, expected %s",
+                       course_id, code, stored, expected)
+    return drift
+
+
+def schedule_jobs(app):
+    """Create the background jobs enabled in the config (interval 0 disables a job).
+
+    Nothing is started here: create_app also runs for CLI commands and in the
+    gunicorn master, which must not fork with live threads. The dev server
+    and gunicorn's post_fork call start_scheduled_jobs.
+    """
+    jobs = []
+    interval = app.config.get('SEAT_RECONCILE_INTERVAL', 0)
+    if interval:
+        jobs.append(PeriodicJob(app, 'reconcile-seats', interval, reconcile_seats_job))
+    interval = app.config.get('SESSION_SWEEP_INTERVAL', 0)
+    if interval and 'session_store' in app.extensions:
+        from session_store import sweep_expired_sessions
+        jobs.append(PeriodicJob(app, 'sweep-sessions', interval, sweep_expired_sessions))
+    interval = app.config.get('POOL_LIVENESS_INTERVAL', 0)
+    if interval:
+        from pool_metrics import check_liveness
+        jobs.append(PeriodicJob(app, 'pool-liveness', interval, check_liveness, per_process=True))
+    
+    app.extensions['scheduled_jobs'] = jobs
+    return jobs
+
+
+def start_scheduled_jobs(app, node_jobs=True):
+    """Start this process's jobs; node_jobs=False starts only the per-process ones"""
+    started = [job for job in app.extensions.get('scheduled_jobs', []) if job.per_process or node_jobs]
+    for job in started:
+        job.start()
+    return started
+
+
+# Held open for the life of the process that runs the node-wide jobs
+_node_lock = None
+
+
+def claim_node_jobs(app):
+    """True if this process runs the node-wide jobs: the first to lock JOBS_LOCK_PATH does until it exits"""
+    global _node_lock
+    if _node_lock is not None or fcntl is None:
+        return True
+    path = app.config.get('JOBS_LOCK_PATH') or os.path.join(tempfile.gettempdir(), 'course-jobs.lock')
+    lock = open(path, 'a')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return False
+    _node_lock = lock
+    return True
@@ -0,0 +1,383 @@
+"""Request metrics in the Prometheus text exposition format.
+
+Per endpoint (student.*, ta.*, admin.*, auth.*; 'unmatched' for 404s) this
+records request counts by method and status, a latency histogram, a
+response size histogram and a histogram of the time each request spent in
+database queries (primary and replicas, measured around every cursor
+execute). Latency, size and DB time are taken when the response is closed,
+so streamed pages are measured to their last byte.
+
+Counters are sharded per thread: each thread only ever updates its own
+dict, so recording takes no lock; a scrape sums the shards. With
+METRICS_DIR set (several gunicorn workers) each process writes its totals
+to METRICS_DIR/metrics-<pid>.json at most every METRICS_FLUSH_INTERVAL
+seconds and when it exits, and a scrape of any worker adds up every file.
+The totals of workers that have exited are folded into one archive file so
+the directory does not grow with recycled workers.
+
+GET /metrics needs `Authorization: Bearer <METRICS_TOKEN>` or an admin
+session.
+"""
+import bisect
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+
+from flask import Response, abort, request, session
+
+from query_counter import time_queries
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process, nothing to merge
+    fcntl = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# name -> (type, help, buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests by endpoint, method and status', None),
+    'http_request_duration_seconds': ('histogram', 'Time from request to last response byte', LATENCY_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Response body size', SIZE_BUCKETS),
+    'db_request_duration_seconds': ('histogram', 'Time spent in database queries per request', DB_BUCKETS),
+    'db_queries_total': ('counter', 'Database queries by endpoint', None),
+    'db_transactions_total': ('counter', 'Replayable write transactions by endpoint (retry.py)', None),
+    'db_transaction_retries_total': ('counter', 'Transactions replayed after a deadlock or serialization failure',
+                                     None),
+    'db_transaction_aborts_total': ('counter', 'Transactions given up after DB_RETRY_ATTEMPTS attempts', None),
+}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+ARCHIVE = 'metrics-archive.json'
+
+
+class Registry:
+    """Counters and histograms sharded per thread.
+
+    A value is keyed by (name, labels) with labels a tuple of (key, value)
+    pairs. A histogram is a list of per-bucket counts (the last bucket is
+    +Inf) followed by the sum of the observations.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []  # (thread, shard)
+        self._base = {}  # totals of threads that have exited
+        self._lock = threading.Lock()  # only taken when a thread makes its shard
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._fold_exited()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _fold_exited(self):
+        # The dev server starts a thread per request: without this the
+        # shards, and the cost of a scrape, would grow without bound
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                for key, value in shard.items():
+                    _add(self._base, key, value)
+        self._shards = live
+
+    def inc(self, name, labels, amount=1):
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        shard = self._shard()
+        key = (name, labels)
+        histogram = shard.get(key)
+        if histogram is None:
+            buckets = METRICS[name][2]
+            histogram = shard[key] = [0] * (len(buckets) + 2)
+        histogram[bisect.bisect_left(METRICS[name][2], value)] += 1
+        histogram[-1] += value
+
+    def snapshot(self):
+        """{(name, labels): value} summed over every thread"""
+        with self._lock:
+            self._fold_exited()
+            shards = [shard for _, shard in self._shards]
+            totals = {key: list(value) if isinstance(value, list) else value for key, value in self._base.items()}
+        for shard in shards:
+            for key, value in shard.copy().items():
+                _add(totals, key, list(value) if isinstance(value, list) else value)
+        return totals
+
+    def clear(self):
+        with self._lock:
+            self._base.clear()
+            for _, shard in self._shards:
+                shard.clear()
+
+
+def _add(totals, key, value):
+    if key not in totals:
+        totals[key] = value
+    elif isinstance(value, list):
+        totals[key] = [a + b for a, b in zip(totals[key], value)]
+    else:
+        totals[key] += value
+
+
+registry = Registry()
+
+# Per thread: start time and DB time of the request being served
+_current = threading.local()
+
+
+def _request_started():
+    _current.start = time.perf_counter()
+    _current.db_time = 0.0
+    _current.queries = 0
+    _current.active = True
+
+
+def request_stats():
+    """(seconds so far, DB seconds, queries) of the request this thread is serving, or None"""
+    if not getattr(_current, 'active', False):
+        return None
+    return time.perf_counter() - _current.start, _current.db_time, _current.queries
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany, seconds):
+    if getattr(_current, 'active', False):
+        _current.db_time += seconds
+        _current.queries += 1
+
+
+class _CountingBody:
+    """Wraps a streamed body to count the bytes sent"""
+
+    def __init__(self, body):
+        self.body = body
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        # Unwinds stream_with_context's request context when the server is done
+        close = getattr(self.body, 'close', None)
+        if close is not None:
+            close()
+
+
+def _record_response(response):
+    if not getattr(_current, 'active', False):
+        return response
+    endpoint = request.endpoint or 'unmatched'
+    method = request.method
+    status = str(response.status_code)
+    start = _current.start
+    # The callback must not reference the response (a cycle would keep an
+    # unclosed stream, and its request context, alive until a GC pass)
+    counting = None
+    size = response.content_length or 0
+    if response.is_streamed:
+        counting = response.response = _CountingBody(response.response)
+
+    def record():
+        _current.active = False
+        body_size = counting.size if counting is not None else size
+        labels = (('endpoint', endpoint), ('method', method))
+        registry.inc('http_requests_total', labels + (('status', status),))
+        registry.observe('http_request_duration_seconds', labels, time.perf_counter() - start)
+        registry.observe('http_response_size_bytes', (('endpoint', endpoint),), body_size)
+        registry.observe('db_request_duration_seconds', (('endpoint', endpoint),), _current.db_time)
+        registry.inc('db_queries_total', (('endpoint', endpoint),), _current.queries)
+        exporter.maybe_flush()
+
+    response.call_on_close(record)
+    return response
+
+
+class Exporter:
+    """Writes this process's totals to the shared directory and merges every process's"""
+
+    def __init__(self, directory=None, interval=5):
+        self.directory = directory
+        self.interval = interval
+        self._flushed_at = 0.0
+        self._flush_lock = threading.Lock()
+
+    def maybe_flush(self):
+        if self.directory and time.monotonic() - self._flushed_at >= self.interval:
+            if self._flush_lock.acquire(blocking=False):
+                try:
+                    self.flush()
+                finally:
+                    self._flush_lock.release()
+
+    def flush(self):
+        if not self.directory:
+            return
+        self._flushed_at = time.monotonic()
+        _write(os.path.join(self.directory, f'metrics-{os.getpid()}.json'), registry.snapshot())
+
+    def collect(self):
+        """Totals over every process (or just this one without a directory)"""
+        if not self.directory:
+            return registry.snapshot()
+        self.flush()
+        with self._locked():
+            self._fold_exited()
+            totals = {}
+            for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+                for key, value in _read(path).items():
+                    _add(totals, key, value)
+        return totals
+
+    def _locked(self):
+        return _DirectoryLock(os.path.join(self.directory, '.lock'))
+
+    def _fold_exited(self):
+        if fcntl is None:
+            return
+        archive_path = os.path.join(self.directory, ARCHIVE)
+        exited = [path for path in glob.glob(os.path.join(self.directory, 'metrics-[0-9]*.json'))
+                  if not _alive(int(os.path.basename(path)[len('metrics-'):-len('.json')]))]
+        if not exited:
+            return
+        archive = _read(archive_path)
+        for path in exited:
+            for key, value in _read(path).items():
+                _add(archive, key, value)
+        _write(archive_path, archive)
+        for path in exited:
+            os.remove(path)
+
+
+class _DirectoryLock:
+    """flock on a file in the metrics directory (no-op without fcntl)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+        return False
+
+
+def _alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _write(path, totals):
+    rows = [[name, list(labels), value] for (name, labels), value in totals.items()]
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(rows, f)
+    os.replace(tmp, path)
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            rows = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {(name, tuple(tuple(pair) for pair in labels)): value for name, labels, value in rows}
+
+
+exporter = Exporter()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(totals):
+    """Text exposition format of {(name, labels): value}"""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((labels, value) for (metric, labels), value in totals.items() if metric == name)
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in series:
+            if kind == 'counter':
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), value[:-1]):
+                cumulative += count
+                le = bound if bound == '+Inf' else _number(float(bound))
+                lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(float(value[-1]))}')
+            lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view():
+    from flask import current_app
+
+    token = current_app.config.get('METRICS_TOKEN')
+    supplied = request.headers.get('Authorization', '')
+    authorized = token and hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode())
+    if not authorized and not ('user_id' in session and session.get('role') == 'admin'):
+        abort(401)
+    return Response(render(exporter.collect()), content_type=CONTENT_TYPE)
+
+
+def init_app(app):
+    """Record every request and serve /metrics"""
+    from pool_metrics import engines
+
+    exporter.directory = app.config.get('METRICS_DIR')
+    exporter.interval = app.config.get('METRICS_FLUSH_INTERVAL', 5)
+    if exporter.directory:
+        os.makedirs(exporter.directory, exist_ok=True)
+
+    for engine in engines(app).values():
+        time_queries(engine, _count_query)
+    app.before_request(_request_started)
+    app.after_request(_record_response)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+
+def clear_directory(directory):
+    """Remove the per-process files of a previous run (gunicorn on_starting)"""
+    for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+        os.remove(path)
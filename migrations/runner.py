@@ -0,0 +1,127 @@
+"""Minimal versioned schema migrations for SQL Server and SQLite.
+
+Migrations are plain functions registered with @migration(version, description)
+in migrations/versions.py. Each one receives an open connection, runs inside
+its own transaction and is recorded in the schema_migrations table. Every
+migration must be idempotent (check before it changes anything) so it can
+also be applied to databases created by db.create_all() or by
+sqlscriptfor203init.sql, which already contain the change.
+"""
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, inspect, text
+
+Migration = namedtuple('Migration', 'version description upgrade')
+
+MIGRATIONS = []
+
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+def migration(version, description):
+    """Register a migration function under a unique, increasing version"""
+    def register(func):
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append(Migration(version, description, func))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return func
+    return register
+
+
+def load_migrations():
+    import migrations.versions  # noqa: F401 (registers the migrations)
+    return list(MIGRATIONS)
+
+
+# ---------------------------------------------------------------------------
+# Idempotent DDL helpers
+# ---------------------------------------------------------------------------
+
+def reflect_table(conn, name):
+    return Table(name, MetaData(), autoload_with=conn)
+
+
+def index_exists(conn, table, name):
+    return any(index['name'] == name for index in inspect(conn).get_indexes(table))
+
+
+def column_exists(conn, table, name):
+    return any(column['name'] == name for column in inspect(conn).get_columns(table))
+
+
+def create_index_if_missing(conn, name, table, *columns, unique=False):
+    """Create an index unless one with this name exists.
+    
+    Columns are names, optionally suffixed with ' DESC'.
+    """
+    if index_exists(conn, table, name):
+        return False
+    reflected = reflect_table(conn, table)
+    expressions = []
+    for spec in columns:
+        column, _, order = spec.partition(' ')
+        expression = reflected.c[column]
+        expressions.append(expression.desc() if order.upper() == 'DESC' else expression)
+    Index(name, *expressions, unique=unique).create(conn)
+    return True
+
+
+def drop_index_if_exists(conn, name, table):
+    if not index_exists(conn, table, name):
+        return False
+    if conn.dialect.name == 'mssql':
+        conn.execute(text(f'DROP INDEX {name} ON {table}'))
+    else:
+        conn.execute(text(f'DROP INDEX {name}'))
+    return True
+
+
+def add_column_if_missing(conn, table, name, definition):
+    """ALTER TABLE ... ADD a column; definition is portable DDL such as 'INTEGER NOT NULL DEFAULT 0'"""
+    if column_exists(conn, table, name):
+        return False
+    keyword = 'ADD' if conn.dialect.name == 'mssql' else 'ADD COLUMN'
+    conn.execute(text(f'ALTER TABLE {table} {keyword} {name} {definition}'))
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def applied_versions(conn):
+    schema_migrations.create(conn, checkfirst=True)
+    return set(conn.execute(schema_migrations.select().with_only_columns(schema_migrations.c.version)).scalars())
+
+
+def status(engine):
+    """List (version, description, applied) for every known migration"""
+    with engine.begin() as conn:
+        applied = applied_versions(conn)
+    return [(m.version, m.description, m.version in applied) for m in load_migrations()]
+
+
+def upgrade(engine, target=None, log=print):
+    """Apply pending migrations up to target (all by default); returns the versions applied"""
+    with engine.begin() as conn:
+        applied = applied_versions(conn)
+    
+    done = []
+    for m in load_migrations():
+        if m.version in applied or (target is not None and m.version > target):
+            continue
+        with engine.begin() as conn:
+            m.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=m.version, description=m.description, applied_at=datetime.now()
+            ))
+        log(f"Applied migration {m.version:04d}: {m.description}")
+        done.append(m.version)
+    return done
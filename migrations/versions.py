@@ -0,0 +1,60 @@
+"""Schema migrations, in version order. See migrations/runner.py."""
+from sqlalchemy import func, inspect, select, text, update
+
+from migrations.runner import migration, add_column_if_missing, create_index_if_missing, reflect_table
+
+
+@migration(1, "Submission aggregate columns on assignments")
+def add_assignment_stats(conn):
+    added = [
+        add_column_if_missing(conn, 'assignments', 'submission_count', 'INTEGER NOT NULL DEFAULT 0'),
+        add_column_if_missing(conn, 'assignments', 'graded_count', 'INTEGER NOT NULL DEFAULT 0'),
+        add_column_if_missing(conn, 'assignments', 'grade_sum', 'FLOAT NOT NULL DEFAULT 0'),
+        add_column_if_missing(conn, 'assignments', 'grade_sum_sq', 'FLOAT NOT NULL DEFAULT 0'),
+    ]
+    if not any(added):
+        return
+    
+    # Backfill from existing submissions in one GROUP BY
+    assignments = reflect_table(conn, 'assignments')
+    submissions = reflect_table(conn, 'submissions')
+    stats = select(
+        submissions.c.assignment_id,
+        func.count(submissions.c.id).label('submission_count'),
+        func.count(submissions.c.grade).label('graded_count'),
+        func.coalesce(func.sum(submissions.c.grade), 0.0).label('grade_sum'),
+        func.coalesce(func.sum(submissions.c.grade * submissions.c.grade), 0.0).label('grade_sum_sq')
+    ).group_by(submissions.c.assignment_id).subquery()
+    conn.execute(
+        update(assignments)
+        .where(assignments.c.id == stats.c.assignment_id)
+        .values(
+            submission_count=stats.c.submission_count,
+            graded_count=stats.c.graded_count,
+            grade_sum=stats.c.grade_sum,
+            grade_sum_sq=stats.c.grade_sum_sq
+        )
+    )
+
+
+@migration(2, "Allow NULL announcements.poster_id")
+def nullable_announcement_poster(conn):
+    # SQLite cannot alter a column in place; SQLite databases get the new
+    # definition from db.create_all()
+    if conn.dialect.name != 'mssql':
+        return
+    poster = next(c for c in inspect(conn).get_columns('announcements') if c['name'] == 'poster_id')
+    if not poster['nullable']:
+        conn.execute(text('ALTER TABLE announcements ALTER COLUMN poster_id INT NULL'))
+
+
+@migration(3, "Indexes for hot query paths")
+def add_hot_path_indexes(conn):
+    create_index_if_missing(conn, 'ix_enrollments_course_id', 'enrollments', 'course_id')
+    create_index_if_missing(conn, 'ix_submissions_student_id', 'submissions', 'student_id')
+    create_index_if_missing(conn, 'ix_assignments_course_id_due_date', 'assignments', 'course_id', 'due_date')
+    create_index_if_missing(conn, 'ix_announcements_course_id_created_at', 'announcements',
+                            'course_id', 'created_at DESC')
+    create_index_if_missing(conn, 'ix_courses_instructor_id', 'courses', 'instructor_id')
+    create_index_if_missing(conn, 'ix_courses_ta_id', 'courses', 'ta_id')
+    create_index_if_missing(conn, 'ix_users_role', 'users', 'role')
@@ -1,6 +1,7 @@
 from models.instructor import Instructor
 from models.user import User
 from extensions import db
+from unit_of_work import commit
 from models.student import Student
 from models.ta import TA    
 class Admin(User):
@@ -27,7 +28,7 @@ class Admin(User):
         
         user = user_class(name=name, email=email, password=password, **kwargs)
         db.session.add(user)
-        db.session.commit()
+        commit()
         return user
     
     @staticmethod
@@ -8,16 +8,24 @@ class Announcement(db.Model):
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     
 
-    poster_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    poster_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
     
     # Relationships
     poster = db.relationship('User', back_populates='announcements_posted')
 
     
+    def get_poster(self):
+        """Get the user who posted this announcement"""
+        return self.poster
+    
     @staticmethod
     def get_by_course(course_id):
         """Get announcements for a course"""
         return Announcement.query.filter_by(course_id=course_id).order_by(
             Announcement.created_at.desc()
-        ).all()
\ No newline at end of file
+        ).all()
+
+
+# Course pages list announcements newest first
+db.Index('ix_announcements_course_id_created_at', Announcement.course_id, Announcement.created_at.desc())
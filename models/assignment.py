@@ -1,6 +1,8 @@
 from extensions import db
+from unit_of_work import commit
 from datetime import datetime
-from sqlalchemy import event
+from sqlalchemy import event, func
+from models.submission import Submission
 
 class Assignment(db.Model):
     __tablename__ = 'assignments'
@@ -14,9 +16,20 @@ class Assignment(db.Model):
     # Foreign key
     course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
     
+    # Denormalized submission aggregates, kept in step with the submissions table
+    # by add_submission, grade_submission and submission deletes
+    submission_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    graded_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    grade_sum = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    grade_sum_sq = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    
     # Relationships
     submissions = db.relationship('Submission', backref='assignment', cascade='all, delete-orphan', lazy=True)
     
+    __table_args__ = (
+        db.Index('ix_assignments_course_id_due_date', 'course_id', 'due_date'),
+    )
+    
     def __repr__(self):
         return f'<Assignment {self.title}>'
     
@@ -39,8 +52,6 @@ class Assignment(db.Model):
     
     def add_submission(self, student_id, submission_text):
         """Add or update submission for this assignment"""
-        from models.submission import Submission
-        
         # Check if submission already exists
         existing = Submission.query.filter_by(
             assignment_id=self.id,
@@ -51,7 +62,7 @@ class Assignment(db.Model):
             # Update existing submission
             existing.submission_text = submission_text
             existing.submitted_at = db.func.current_timestamp()
-            db.session.commit()
+            commit()
             return True, "Submission updated successfully"
         else:
             # Create new submission
@@ -61,12 +72,12 @@ class Assignment(db.Model):
                 submission_text=submission_text
             )
             db.session.add(submission)
-            db.session.commit()
+            self.submission_count = Assignment.submission_count + 1
+            commit()
             return True, "Submission added successfully"
     
     def get_submission(self, student_id):
         """Get submission for a specific student"""
-        from models.submission import Submission
         return Submission.query.filter_by(
             assignment_id=self.id,
             student_id=student_id
@@ -82,9 +93,18 @@ class Assignment(db.Model):
                 if grade_float < 0 or grade_float > 100:
                     return False, "Grade must be between 0 and 100"
                     
+                if submission.grade is None:
+                    self.graded_count = Assignment.graded_count + 1
+                    self.grade_sum = Assignment.grade_sum + grade_float
+                    self.grade_sum_sq = Assignment.grade_sum_sq + grade_float * grade_float
+                else:
+                    old_grade = submission.grade
+                    self.grade_sum = Assignment.grade_sum + (grade_float - old_grade)
+                    self.grade_sum_sq = Assignment.grade_sum_sq + (grade_float * grade_float - old_grade * old_grade)
+                
                 submission.grade = grade_float
                 submission.feedback = feedback
-                db.session.commit()
+                commit()
                 return True, "Grade submitted successfully"
             except (ValueError, TypeError):
                 return False, "Invalid grade format. Please enter a number."
@@ -92,7 +112,6 @@ class Assignment(db.Model):
     
     def get_all_submissions(self):
         """Get all submissions for this assignment with student information"""
-        from models.submission import Submission
         from models.user import User
         
         # Query submissions with student info
@@ -124,6 +143,105 @@ class Assignment(db.Model):
         """Check if assignment is past due"""
         return datetime.now() > self.due_date
     
+    def time_remaining(self):
+        """Seconds left until the due date (0 once past due)"""
+        if not self.due_date:
+            return None
+        return max(0, int((self.due_date - datetime.now()).total_seconds()))
+    
+    def get_submission_count(self):
+        """Number of submissions, read from the denormalized counter"""
+        return self.submission_count or 0
+    
+    def get_graded_count(self):
+        """Number of graded submissions"""
+        return self.graded_count or 0
+    
+    def get_average_grade(self):
+        """Mean grade over graded submissions, or None if nothing is graded"""
+        if not self.graded_count:
+            return None
+        return self.grade_sum / self.graded_count
+    
+    def get_grade_stddev(self):
+        """Population standard deviation of the grades, or None if nothing is graded"""
+        if not self.graded_count:
+            return None
+        mean = self.grade_sum / self.graded_count
+        variance = max(0.0, self.grade_sum_sq / self.graded_count - mean * mean)
+        return variance ** 0.5
+    
+    @staticmethod
+    def remove_student_submissions(student_ids):
+        """Delete every submission of the given students, discounting them from the aggregates.
+        
+        Both statements are set-based and run in the caller's transaction.
+        """
+        removed = db.select(
+            Submission.assignment_id.label('assignment_id'),
+            func.count(Submission.id).label('submission_count'),
+            func.count(Submission.grade).label('graded_count'),
+            func.coalesce(func.sum(Submission.grade), 0.0).label('grade_sum'),
+            func.coalesce(func.sum(Submission.grade * Submission.grade), 0.0).label('grade_sum_sq')
+        ).where(Submission.student_id.in_(student_ids)).group_by(Submission.assignment_id).subquery()
+        
+        db.session.execute(
+            db.update(Assignment)
+            .where(Assignment.id == removed.c.assignment_id)
+            .values(
+                submission_count=Assignment.submission_count - removed.c.submission_count,
+                graded_count=Assignment.graded_count - removed.c.graded_count,
+                grade_sum=Assignment.grade_sum - removed.c.grade_sum,
+                grade_sum_sq=Assignment.grade_sum_sq - removed.c.grade_sum_sq
+            )
+        )
+        return Submission.query.filter(
+            Submission.student_id.in_(student_ids)
+        ).delete(synchronize_session=False)
+    
+    @staticmethod
+    def recompute_stats():
+        """Rebuild the aggregate columns of every assignment from submissions.
+        
+        Uses a single GROUP BY over submissions; assignments without any
+        submission are reset to zero. Returns the number of assignments whose
+        stored aggregates had drifted.
+        """
+        stats = db.session.query(
+            Submission.assignment_id.label('assignment_id'),
+            func.count(Submission.id).label('submission_count'),
+            func.count(Submission.grade).label('graded_count'),
+            func.coalesce(func.sum(Submission.grade), 0.0).label('grade_sum'),
+            func.coalesce(func.sum(Submission.grade * Submission.grade), 0.0).label('grade_sum_sq')
+        ).group_by(Submission.assignment_id).subquery()
+        
+        drifted = db.session.query(func.count(Assignment.id)).outerjoin(
+            stats, stats.c.assignment_id == Assignment.id
+        ).filter(
+            (Assignment.submission_count != func.coalesce(stats.c.submission_count, 0)) |
+            (Assignment.graded_count != func.coalesce(stats.c.graded_count, 0)) |
+            (func.abs(Assignment.grade_sum - func.coalesce(stats.c.grade_sum, 0.0)) > 1e-6) |
+            (func.abs(Assignment.grade_sum_sq - func.coalesce(stats.c.grade_sum_sq, 0.0)) > 1e-6)
+        ).scalar()
+        
+        db.session.execute(
+            db.update(Assignment)
+            .where(~Assignment.id.in_(db.select(Submission.assignment_id)))
+            .values(submission_count=0, graded_count=0, grade_sum=0.0, grade_sum_sq=0.0)
+        )
+        db.session.execute(
+            db.update(Assignment)
+            .where(Assignment.id == stats.c.assignment_id)
+            .values(
+                submission_count=stats.c.submission_count,
+                graded_count=stats.c.graded_count,
+                grade_sum=stats.c.grade_sum,
+                grade_sum_sq=stats.c.grade_sum_sq
+            )
+        )
+        commit()
+        return drifted
+    
     def to_dict(self):
         """Convert assignment to dictionary"""
         return {
@@ -140,3 +258,17 @@ class Assignment(db.Model):
         }
 
 
+@event.listens_for(Submission, 'after_delete')
+def _discount_deleted_submission(mapper, connection, target):
+    """Keep the assignment aggregates in step with ORM deletes (including cascades)"""
+    assignments = Assignment.__table__
+    values = {'submission_count': assignments.c.submission_count - 1}
+    if target.grade is not None:
+        values.update(
+            graded_count=assignments.c.graded_count - 1,
+            grade_sum=assignments.c.grade_sum - target.grade,
+            grade_sum_sq=assignments.c.grade_sum_sq - target.grade * target.grade
+        )
+    connection.execute(
+        assignments.update().where(assignments.c.id == target.assignment_id).values(**values)
+    )
@@ -1,4 +1,7 @@
 from extensions import db
+from unit_of_work import commit
+from datetime import datetime
+from sqlalchemy import func, case
 from models.announcement import Announcement
 from models.assignment import Assignment
 from models.enrollment import Enrollment
@@ -17,9 +20,9 @@ class Course(db.Model):
     department = db.Column(db.String(100))
     
     # Foreign keys
-    instructor_id = db.Column(db.Integer,db.ForeignKey('users.id'),nullable=False)
+    instructor_id = db.Column(db.Integer,db.ForeignKey('users.id'),nullable=True,index=True)
 
-    ta_id = db.Column(db.Integer,db.ForeignKey('users.id'),nullable=True)
+    ta_id = db.Column(db.Integer,db.ForeignKey('users.id'),nullable=True,index=True)
 
     instructor = db.relationship('User',foreign_keys=[instructor_id],back_populates='courses_instructing')
 
@@ -59,21 +62,23 @@ class Course(db.Model):
     def get_by_code(course_code):
         return Course.query.filter_by(code=course_code).first()
     
+    @staticmethod
+    def search_query(search_term=""):
+        """Query for the courses matching search_term (all courses when empty)"""
+        query = Course.query
+        if search_term:
+            search = f"%{search_term}%"
+            query = query.filter(
+                (Course.code.ilike(search)) |
+                (Course.name.ilike(search)) |
+                (Course.description.ilike(search)) |
+                (Course.department.ilike(search))
+            )
+        return query
+    
     @staticmethod
     def search_courses(search_term=""):
-        from models.courses import Course
-        if not search_term:
-            return Course.query.all()
-        
-        search = f"%{search_term}%"
-        from models.courses import Course
-        
-        return Course.query.filter(
-            (Course.code.ilike(search)) |
-            (Course.name.ilike(search)) |
-            (Course.description.ilike(search)) |
-            (Course.department.ilike(search))
-        ).all()
+        return Course.search_query(search_term).all()
     
     def get_enrolled_students(self):
         """Get enrolled students for this course"""
@@ -91,7 +96,7 @@ class Course(db.Model):
             enrollment = Enrollment(student_id=student_id, course_id=self.id)
             db.session.add(enrollment)
             self.seats_left -= 1
-            db.session.commit()
+            commit()
             return True
         return False
     
@@ -102,10 +107,67 @@ class Course(db.Model):
         if enrollment:
             db.session.delete(enrollment)
             self.seats_left += 1
-            db.session.commit()
+            commit()
             return True
         return False
     
+    @staticmethod
+    def release_student_seats(student_ids):
+        """Give back the seats held by the given students.
+        
+        Call before removing their enrollments; runs in the caller's
+        transaction as a single UPDATE.
+        """
+        released = db.select(
+            Enrollment.course_id.label('course_id'),
+            func.count(Enrollment.id).label('seats')
+        ).where(Enrollment.student_id.in_(student_ids)).group_by(Enrollment.course_id).subquery()
+        
+        db.session.execute(
+            db.update(Course)
+            .where(Course.id == released.c.course_id)
+            .values(seats_left=Course.seats_left + released.c.seats)
+        )
+    
+    @staticmethod
+    def reconcile_seats():
+        """Recompute seats_left of every course from the enrollments table.
+        
+        The expected value is max_seats minus the number of enrollments
+        (never below zero). Drifted courses are corrected with a single
+        aggregate UPDATE ... FROM. Returns a list of
+        (course_id, code, stored_seats_left, expected_seats_left) for every
+        course that had drifted.
+        """
+        enrolled = func.count(Enrollment.id)
+        expected = case(
+            (Course.max_seats - enrolled < 0, 0),
+            else_=Course.max_seats - enrolled
+        )
+        seats = db.select(
+            Course.id.label('course_id'),
+            expected.label('expected')
+        ).outerjoin(Enrollment, Enrollment.course_id == Course.id).group_by(
+            Course.id, Course.max_seats
+        ).subquery()
+        
+        drift = db.session.execute(
+            db.select(Course.id, Course.code, Course.seats_left, seats.c.expected)
+            .join(seats, seats.c.course_id == Course.id)
+            .where(Course.seats_left != seats.c.expected)
+            .order_by(Course.id)
+        ).all()
+        
+        if drift:
+            db.session.execute(
+                db.update(Course)
+                .where(Course.id == seats.c.course_id,
+                       Course.seats_left != seats.c.expected)
+                .values(seats_left=seats.c.expected)
+            )
+        commit()
+        return [tuple(row) for row in drift]
+    
     def get_announcements(self):
         """Get announcements for this course"""
         from models.announcement import Announcement
@@ -131,6 +193,12 @@ class Course(db.Model):
     def add_assignment(self, title, description, due_date):
         """Add assignment to course"""
         from models.assignment import Assignment
+        if isinstance(due_date, str):
+            # Form input ('2025-05-01' or '2025-05-01T23:59')
+            try:
+                due_date = datetime.fromisoformat(due_date)
+            except ValueError:
+                return None
         assignment = Assignment(
             title=title,
             description=description,
@@ -138,7 +206,7 @@ class Course(db.Model):
             course_id=self.id
         )
         db.session.add(assignment)
-        db.session.commit()
+        commit()
         return assignment
     
     def add_announcement(self, title, content, poster_id):
@@ -151,7 +219,7 @@ class Course(db.Model):
             course_id=self.id
         )
         db.session.add(announcement)
-        db.session.commit()
+        commit()
         return announcement
     
     def to_dict(self):
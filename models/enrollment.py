@@ -5,7 +5,7 @@ class Enrollment(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False, index=True)
     enrolled_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     
     # Unique constraint to prevent duplicate enrollments
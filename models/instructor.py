@@ -1,5 +1,6 @@
 from models.user import User
 from extensions import db
+from unit_of_work import commit
 
 class Instructor(User):
     
@@ -19,7 +20,7 @@ class Instructor(User):
             
             # Assign instructor to course
             course.instructor_id = self.id
-            db.session.commit()
+            commit()
             return True, "Assigned to course successfully"
         return False, "Course not found"
     
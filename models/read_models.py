@@ -0,0 +1,89 @@
+"""Column-only read models for list pages.
+
+Search results and rosters are shown read-only, so instead of full ORM
+entities (instance state, identity-map entries, relationship loaders) these
+queries select only the columns the templates use into namedtuples. The
+field names match the ORM attributes, including course.instructor.name and
+course.ta.name, so a template renders either kind of object unchanged.
+Rows are plain values: nothing is tracked by the session, and changing one
+does not write anything back. That also lets identical concurrent catalog
+searches and roster loads share one query (single_flight.py), so callers
+must not change the lists they get.
+"""
+from collections import namedtuple
+
+from sqlalchemy.orm import aliased
+
+from extensions import db
+from single_flight import single_flight
+from models.courses import Course
+from models.enrollment import Enrollment
+from models.user import User
+
+Person = namedtuple('Person', ['id', 'name', 'email', 'role', 'major', 'level'])
+Staff = namedtuple('Staff', ['id', 'name'])
+CourseRow = namedtuple('CourseRow', ['id', 'code', 'name', 'description', 'credits', 'max_seats',
+                                     'seats_left', 'schedule', 'department', 'instructor', 'ta'])
+
+PERSON_COLUMNS = (User.id, User.name, User.email, User.role, User.major, User.level)
+COURSE_COLUMNS = (Course.id, Course.code, Course.name, Course.description, Course.credits,
+                  Course.max_seats, Course.seats_left, Course.schedule, Course.department)
+
+# Built once: a new alias per query copies its columns each time and grows memory
+_instructor = aliased(User, name='instructor')
+_ta = aliased(User, name='ta')
+
+
+def _people_query(search_term):
+    return User.search_query(search_term).with_entities(*PERSON_COLUMNS)
+
+
+def _courses_query(search_term):
+    return Course.search_query(search_term) \
+        .outerjoin(_instructor, Course.instructor_id == _instructor.id) \
+        .outerjoin(_ta, Course.ta_id == _ta.id) \
+        .with_entities(*COURSE_COLUMNS, _instructor.id, _instructor.name,
+                       _ta.id, _ta.name)
+
+
+def _course_row(row):
+    instructor = Staff(row[9], row[10]) if row[9] is not None else None
+    ta = Staff(row[11], row[12]) if row[11] is not None else None
+    return CourseRow(*row[:9], instructor, ta)
+
+
+def search_people(search_term=""):
+    """Users matching search_term by name, email, or role, as Person rows"""
+    return [Person._make(row) for row in _people_query(search_term)]
+
+
+def stream_people(search_term="", batch_size=500):
+    """Like search_people, reading the cursor batch_size rows at a time"""
+    for row in _people_query(search_term).yield_per(batch_size):
+        yield Person._make(row)
+
+
+@single_flight
+def search_courses(search_term=""):
+    """Courses matching search_term as CourseRow, with instructor and TA names"""
+    return [_course_row(row) for row in _courses_query(search_term)]
+
+
+def stream_courses(search_term="", batch_size=500):
+    """Like search_courses, reading the cursor batch_size rows at a time"""
+    for row in _courses_query(search_term).yield_per(batch_size):
+        yield _course_row(row)
+
+
+@single_flight
+def all_students():
+    """Every student as a Person row"""
+    return [Person._make(row) for row in db.session.query(*PERSON_COLUMNS).filter(User.role == 'student')]
+
+
+@single_flight
+def enrolled_students(course_id):
+    """Roster of a course as Person rows (Course.get_enrolled_students without the entities)"""
+    rows = db.session.query(*PERSON_COLUMNS).join(Enrollment, Enrollment.student_id == User.id) \
+        .filter(Enrollment.course_id == course_id, User.role == 'student')
+    return [Person._make(row) for row in rows]
@@ -1,5 +1,6 @@
 from models.user import User
 from extensions import db
+from unit_of_work import commit
 
 class Student(User):
     
@@ -34,7 +35,7 @@ class Student(User):
         course.seats_left -= 1
         
         db.session.add(enrollment)
-        db.session.commit()
+        commit()
         return True, "Enrolled successfully"
     
     def drop_course(self, course_id):
@@ -55,7 +56,7 @@ class Student(User):
             course.seats_left += 1
         
         db.session.delete(enrollment)
-        db.session.commit()
+        commit()
         return True, "Course dropped successfully"
     
     def get_enrolled_courses(self):
@@ -91,6 +92,23 @@ class Student(User):
             }
         return {'submitted': False, 'grade': None, 'feedback': None}
     
+    def get_graded_submissions(self):
+        """(course name, assignment title, grade, feedback) for every graded submission, in one query"""
+        from models.assignment import Assignment
+        from models.courses import Course
+        from models.enrollment import Enrollment
+        from models.submission import Submission
+        return db.session.query(Course.name, Assignment.title, Submission.grade, Submission.feedback).join(
+            Assignment, Assignment.course_id == Course.id
+        ).join(
+            Submission, Submission.assignment_id == Assignment.id
+        ).join(
+            Enrollment, (Enrollment.course_id == Course.id) & (Enrollment.student_id == self.id)
+        ).filter(
+            Submission.student_id == self.id,
+            Submission.grade.isnot(None)
+        ).order_by(Course.id, Assignment.id).all()
+    
     @staticmethod
     def get_by_id(student_id):
         return Student.query.filter_by(id=student_id, role='student').first()
@@ -11,7 +11,7 @@ class Submission(db.Model):
     
     # Foreign keys
     assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id'), nullable=False)
-    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
     # Unique constraint
     __table_args__ = (
@@ -1,6 +1,7 @@
 from models.user import User
 from models.courses import Course
 from extensions import db
+from unit_of_work import commit
 
 class TA(User):
    
@@ -21,7 +22,7 @@ class TA(User):
             
             # Assign TA to course
             course.ta_id = self.id
-            db.session.commit()
+            commit()
             return True, "Assigned to course successfully"
         return False, "Course not found"
     
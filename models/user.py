@@ -1,4 +1,6 @@
+from access_log import log_event
 from extensions import db
+from unit_of_work import commit
 from werkzeug.security import generate_password_hash, check_password_hash
 from models.courses import Course
 class User(db.Model):
@@ -8,7 +10,7 @@ class User(db.Model):
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(256), nullable=False)
-    role = db.Column(db.String(50), nullable=False)
+    role = db.Column(db.String(50), nullable=False, index=True)
     
     # Role-specific fields (nullable)
     major = db.Column(db.String(100))
@@ -76,7 +78,7 @@ class User(db.Model):
         try:
             return check_password_hash(self.password_hash, password)
         except Exception as e:
-            print(f"Password check error for user {self.email}: {e}")
+            log_event('password_check_error', user_id=self.id, error=str(e))
             return False
     
     @staticmethod
@@ -91,7 +93,7 @@ class User(db.Model):
             if user.check_password(password):
                 return user
             else:
-                print(f"Password check failed for {email}")
+                log_event('login_failed', email=email, user_id=user.id)
         return None
     
     @staticmethod
@@ -109,18 +111,23 @@ class User(db.Model):
         """Get users by role"""
         return User.query.filter_by(role=role).all()
     
+    @staticmethod
+    def search_query(search_term=""):
+        """Query for the users matching search_term by name, email, or role"""
+        query = User.query
+        if search_term:
+            search = f"%{search_term}%"
+            query = query.filter(
+                (User.name.ilike(search)) | 
+                (User.email.ilike(search)) | 
+                (User.role.ilike(search))
+            )
+        return query
+    
     @staticmethod
     def search_users(search_term=""):
         """Search users by name, email, or role"""
-        if not search_term:
-            return User.query.all()
-        
-        search = f"%{search_term}%"
-        return User.query.filter(
-            (User.name.ilike(search)) | 
-            (User.email.ilike(search)) | 
-            (User.role.ilike(search))
-        ).all()
+        return User.search_query(search_term).all()
     
     @staticmethod
     def add_person(name, email, role, password="default123"):
@@ -135,7 +142,7 @@ class User(db.Model):
         
         from extensions import db
         db.session.add(new_user)
-        db.session.commit()
+        commit()
         
         return new_user
     
@@ -162,7 +169,7 @@ class User(db.Model):
             user.set_password(password)
         
         from extensions import db
-        db.session.commit()
+        commit()
         return user
     
     @staticmethod
@@ -172,7 +179,7 @@ class User(db.Model):
         user = User.query.get(user_id)
         if user:
             db.session.delete(user)
-            db.session.commit()
+            commit()
             return True
         return False
     
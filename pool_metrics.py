@@ -0,0 +1,252 @@
+"""Connection pool metrics, background liveness checks and pool sizing stats.
+
+Every engine (the primary and any read replica) gets a PoolStats fed by pool
+events: checkouts, connections opened, invalidations, pre-ping failures and
+how many connections were in use at each checkout. For QueuePool engines
+configure() swaps in TimedQueuePool, which also measures how long each
+checkout waited for a connection and counts pool timeouts.
+
+Liveness: with POOL_LIVENESS_INTERVAL set, pool_pre_ping is off (no extra
+round trip per checkout) and a background job runs SELECT 1 on each engine
+every interval instead. A failed probe on a lost connection invalidates the
+whole pool, so the connections still pooled from before a database restart
+are replaced at their next checkout; a request that checks out a dead
+connection between two probes fails once. pool_recycle still retires
+connections before server or firewall idle timeouts.
+
+Sizing: a worker never needs more connections than it has threads (plus
+its background jobs), so the stats report the peak and p95/p99 of
+connections in use per checkout, checkouts that had to wait, and a
+suggested pool_size (p99 in use) and max_overflow (up to the peak). All
+numbers are per process; every gunicorn worker has its own pool.
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# A checkout slower than this counts as having waited for a connection
+WAIT_THRESHOLD = 0.001
+
+
+class PoolStats:
+    """Counters for one engine's pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.reset()
+
+    def reset(self):
+        """Zero the counters (connections in use stay counted)"""
+        with self._lock:
+            self.checkouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.pre_ping_failures = 0
+            self.liveness_failures = 0
+            self.timeouts = 0
+            self.waits = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.peak_in_use = self.in_use
+            self.in_use_at_checkout = Counter()
+            self.started = time.time()
+
+    def checked_out(self):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.in_use_at_checkout[self.in_use] += 1
+
+    def checked_in(self):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def waited(self, seconds):
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if seconds >= WAIT_THRESHOLD:
+                self.waits += 1
+
+    def count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def percentile_in_use(self, fraction):
+        """Connections in use at the checkout at this fraction of all checkouts"""
+        with self._lock:
+            total = sum(self.in_use_at_checkout.values())
+            seen = 0
+            for in_use in sorted(self.in_use_at_checkout):
+                seen += self.in_use_at_checkout[in_use]
+                if seen >= fraction * total:
+                    return in_use
+        return 0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'pre_ping_failures': self.pre_ping_failures,
+                'liveness_failures': self.liveness_failures,
+                'timeouts': self.timeouts,
+                'waits': self.waits,
+                'wait_ms_total': round(self.wait_total * 1000, 3),
+                'wait_ms_max': round(self.wait_max * 1000, 3),
+                'in_use': self.in_use,
+                'peak_in_use': self.peak_in_use,
+                'since': self.started,
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports checkout wait time and timeouts to its PoolStats"""
+
+    stats = None
+
+    def recreate(self):
+        # engine.dispose() replaces the pool; the stats carry over
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.stats is not None:
+                self.stats.count('timeouts')
+            raise
+        finally:
+            if self.stats is not None:
+                self.stats.waited(time.perf_counter() - start)
+
+
+def configure(app):
+    """Before db.init_app: size and time queue pools, and pick pre-ping or liveness checks"""
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if app.config.get('POOL_LIVENESS_INTERVAL'):
+        options['pool_pre_ping'] = False
+    if 'poolclass' not in options and 'pool' not in options:
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        if issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+            options['poolclass'] = TimedQueuePool
+            # Other pools (StaticPool for SQLite :memory:) reject these arguments
+            options.setdefault('pool_size', app.config.get('POOL_SIZE', 5))
+            options.setdefault('max_overflow', app.config.get('POOL_MAX_OVERFLOW', 10))
+            options.setdefault('pool_timeout', app.config.get('POOL_TIMEOUT', 30))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def observe(engine):
+    """Attach a PoolStats to engine and return it"""
+    stats = PoolStats()
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.stats = stats
+
+    @event.listens_for(engine, 'connect')
+    def _connect(dbapi_connection, record):
+        stats.count('connects')
+
+    @event.listens_for(engine, 'checkout')
+    def _checkout(dbapi_connection, record, proxy):
+        stats.checked_out()
+
+    @event.listens_for(engine, 'checkin')
+    def _checkin(dbapi_connection, record):
+        stats.checked_in()
+
+    @event.listens_for(engine, 'invalidate')
+    def _invalidate(dbapi_connection, record, exception):
+        stats.count('invalidations')
+
+    @event.listens_for(engine, 'handle_error')
+    def _handle_error(context):
+        if context.is_pre_ping:
+            stats.count('pre_ping_failures')
+
+    return stats
+
+
+def engines(app):
+    """name -> engine for the primary and every replica"""
+    from extensions import db
+
+    with app.app_context():
+        found = {'primary': db.engine}
+    for i, replica in enumerate(app.extensions.get('replicas', [])):
+        found[f'replica-{i}'] = replica.engine
+    return found
+
+
+def init_app(app):
+    """Observe the pools of every engine (after the replicas are created)"""
+    app.extensions['pool_stats'] = {name: (engine, observe(engine)) for name, engine in engines(app).items()}
+
+
+def check_liveness():
+    """Scheduled job: SELECT 1 on every engine; a lost connection invalidates its pool"""
+    from flask import current_app
+
+    failed = []
+    for name, (engine, stats) in current_app.extensions.get('pool_stats', {}).items():
+        try:
+            with engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+        except Exception as e:
+            stats.count('liveness_failures')
+            logger.warning("Pool liveness check failed on %s: %s", name, e)
+            failed.append(name)
+    return failed
+
+
+def sizing(stats, threads, jobs=0):
+    """Suggested pool_size/max_overflow for one worker from observed concurrency"""
+    useful = threads + jobs
+    p99 = stats.percentile_in_use(0.99)
+    pool_size = min(max(p99, 1), useful)
+    return {
+        'p95_in_use': stats.percentile_in_use(0.95),
+        'p99_in_use': p99,
+        'peak_in_use': stats.peak_in_use,
+        'max_useful': useful,
+        'suggested_pool_size': pool_size,
+        'suggested_max_overflow': max(min(stats.peak_in_use, useful) - pool_size, 0),
+        'wait_ratio': round(stats.waits / stats.checkouts, 4) if stats.checkouts else 0.0,
+    }
+
+
+def pool_report(app):
+    """Gauges, counters and sizing for every engine of this process"""
+    threads = app.config.get('WEB_THREADS', 1)
+    jobs = len(app.extensions.get('scheduled_jobs', []))
+    report = {}
+    for name, (engine, stats) in app.extensions.get('pool_stats', {}).items():
+        pool = engine.pool
+        entry = {'pool': type(pool).__name__, 'pre_ping': bool(pool._pre_ping)}
+        if isinstance(pool, QueuePool):
+            entry.update(size=pool.size(), checked_out=pool.checkedout(), checked_in=pool.checkedin(),
+                         overflow=max(pool.overflow(), 0), max_overflow=pool._max_overflow,
+                         timeout=pool.timeout())
+        entry.update(stats.snapshot())
+        entry['sizing'] = sizing(stats, threads, jobs)
+        report[name] = entry
+    return {'pid': os.getpid(), 'engines': report}
+
+
+def reset_stats(app):
+    for engine, stats in app.extensions.get('pool_stats', {}).values():
+        stats.reset()
@@ -0,0 +1,265 @@
+"""On-demand sampling profiler for live workers.
+
+Two ways to arm it, both admin-only:
+
+    one request   send the request with an `X-Profile: 1` header while
+                  logged in as an admin; the response carries
+                  `X-Profile-File: <name>`
+    time window   POST /admin/profiles/window (seconds=N) samples every
+                  thread of the worker that receives it for N seconds
+
+A background thread reads the Python stack of the sampled thread(s) every
+PROFILE_INTERVAL seconds (sys._current_frames) and counts identical stacks;
+threads idle in a wait or select are skipped. Nothing is traced, so the
+profiled code runs at full speed apart from the GIL the sampler takes for a
+few microseconds per sample (about 0.2% at the default 10 ms; see
+benchmarks/profiler_benchmark.py). With PROFILER_ENABLED off no hook is
+installed at all.
+
+Each profile is written to PROFILE_DIR as a collapsed-stack file
+(`root;caller;callee count` per line), the input of flamegraph.pl and
+speedscope. Only the newest PROFILE_KEEP files are kept. summary() splits
+the samples between templates, SQLAlchemy, password hashing, Flask and the
+application's own code by the innermost frame that belongs to one of them.
+One profile runs per worker at a time.
+"""
+import os
+import sys
+import sysconfig
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, g, request, session
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Installed packages and the standard library, even inside the project (a .venv)
+LIBRARY_DIRS = ('site-packages', 'dist-packages')
+STDLIB_DIRS = tuple({sysconfig.get_path('stdlib'), sysconfig.get_path('platstdlib')})
+
+# (file name, function) of frames a thread sits in while it has nothing to do
+IDLE_FRAMES = {
+    ('threading.py', 'wait'),
+    ('selectors.py', 'select'),
+    ('socket.py', 'accept'),
+    ('queue.py', 'get'),
+}
+
+# (category, path fragment), checked from the innermost frame outwards
+CATEGORIES = (
+    ('templates', '.html:'),
+    ('templates', 'jinja2/'),
+    ('password hashing', 'werkzeug/security.py'),
+    ('password hashing', 'hashlib'),
+    ('sqlalchemy', 'sqlalchemy/'),
+    ('flask', 'flask/'),
+    ('flask', 'werkzeug/'),
+    ('app', 'app:'),
+)
+
+# Held while a profile is being taken in this process
+_busy = threading.Lock()
+
+# code object -> frame label
+_labels = {}
+
+
+class Sampler:
+    """Counts the stacks of some threads (all but itself when thread_ids is None)"""
+
+    def __init__(self, interval, thread_ids=None):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(own)
+
+    def sample(self, own=None):
+        for ident, frame in sys._current_frames().items():
+            if ident == own or (self.thread_ids is not None and ident not in self.thread_ids):
+                continue
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+
+def app_path(path):
+    """path relative to the project, or None for a file outside it or in a library"""
+    if not path.startswith(PROJECT_DIR + os.sep) or path.startswith(STDLIB_DIRS) \
+            or any(directory in path for directory in LIBRARY_DIRS):
+        return None
+    return os.path.relpath(path, PROJECT_DIR)
+
+
+def frame_label(code):
+    """'function (path:line)' with paths relative to site-packages or the project"""
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        relative = app_path(path)
+        if 'site-packages' in path:
+            path = path.split('site-packages' + os.sep, 1)[-1]
+        elif relative is not None:
+            path = 'app:' + relative
+        else:
+            path = os.path.basename(path)
+        label = _labels[code] = f'{code.co_name} ({path}:{code.co_firstlineno})'.replace(';', ',')
+    return label
+
+
+def collapse(stacks):
+    """Collapsed-stack lines, heaviest first"""
+    lines = [(';'.join(frame_label(code) for code in stack), count) for stack, count in stacks.items()]
+    lines.sort(key=lambda line: -line[1])
+    return ''.join(f'{frames} {count}\n' for frames, count in lines)
+
+
+def read_collapsed(path):
+    """[(frames, count)] from a collapsed-stack file"""
+    stacks = []
+    with open(path) as f:
+        for line in f:
+            frames, _, count = line.rstrip('\n').rpartition(' ')
+            if frames:
+                stacks.append((frames.split(';'), int(count)))
+    return stacks
+
+
+def category(frames):
+    for frame in reversed(frames):
+        for name, fragment in CATEGORIES:
+            if fragment in frame:
+                return name
+    return 'other'
+
+
+def summary(stacks):
+    """{category: share of samples} for [(frames, count)]"""
+    counts = Counter()
+    for frames, count in stacks:
+        counts[category(frames)] += count
+    total = sum(counts.values())
+    return {name: round(count / total, 4) for name, count in counts.most_common()} if total else {}
+
+
+def profile_dir(app):
+    directory = app.config.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'course-profiles')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def profile_name(label):
+    safe = ''.join(ch if ch.isalnum() or ch in '-_.' else '_' for ch in label)
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{safe}-{time.monotonic_ns() % 10**6}.folded"
+
+
+def write_profile(app, name, stacks):
+    directory = profile_dir(app)
+    with open(os.path.join(directory, name), 'w') as f:
+        f.write(collapse(stacks))
+    profiles = sorted(list_profiles(app), key=lambda entry: entry['mtime'])
+    for entry in profiles[:-app.config.get('PROFILE_KEEP', 50)]:
+        os.remove(os.path.join(directory, entry['name']))
+
+
+def list_profiles(app):
+    directory = profile_dir(app)
+    entries = []
+    for name in os.listdir(directory):
+        if name.endswith('.folded'):
+            stat = os.stat(os.path.join(directory, name))
+            entries.append({'name': name, 'bytes': stat.st_size, 'mtime': stat.st_mtime})
+    return entries
+
+
+def profile_index(app):
+    """Newest first, each with its summary; and whether a profile is running"""
+    directory = profile_dir(app)
+    entries = sorted(list_profiles(app), key=lambda entry: entry['mtime'], reverse=True)
+    for entry in entries:
+        entry['summary'] = summary(read_collapsed(os.path.join(directory, entry['name'])))
+    return {'pid': os.getpid(), 'running': _busy.locked(), 'profiles': entries}
+
+
+def start_window(app, seconds):
+    """Sample every thread of this worker for seconds; returns the file name, or None if busy
+
+    app must be the application itself, not current_app: the profile is
+    written from a timer thread.
+    """
+    if not _busy.acquire(blocking=False):
+        return None
+    name = profile_name('window')
+    sampler = Sampler(app.config.get('PROFILE_INTERVAL', 0.01)).start()
+
+    def finish():
+        try:
+            write_profile(app, name, sampler.stop())
+        finally:
+            _busy.release()
+
+    timer = threading.Timer(seconds, finish)
+    timer.daemon = True
+    timer.start()
+    return name
+
+
+def _start_request_profile():
+    if 'X-Profile' not in request.headers or session.get('role') != 'admin':
+        return
+    if not _busy.acquire(blocking=False):
+        g._profile = None
+        return
+    g._profile = (profile_name(request.endpoint or 'unmatched'),
+                  Sampler(current_app.config.get('PROFILE_INTERVAL', 0.01), {threading.get_ident()}).start())
+
+
+def _name_profile(response):
+    if 'X-Profile' in request.headers and '_profile' in g:
+        response.headers['X-Profile-File'] = g._profile[0] if g._profile else 'busy'
+    return response
+
+
+def _finish_request_profile(exc):
+    # Teardown: after a streamed page has been sent in full
+    profile = g.pop('_profile', None)
+    if profile is None:
+        return
+    name, sampler = profile
+    try:
+        write_profile(current_app, name, sampler.stop())
+    finally:
+        _busy.release()
+
+
+def init_app(app):
+    """Honour X-Profile on admin requests (nothing is installed with PROFILER_ENABLED off)"""
+    if not app.config.get('PROFILER_ENABLED'):
+        return
+    app.before_request(_start_request_profile)
+    app.after_request(_name_profile)
+    app.teardown_request(_finish_request_profile)
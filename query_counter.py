@@ -0,0 +1,108 @@
+"""Count the SQL statements an engine executes, grouped by fingerprint.
+
+Used by the query-budget tests: wrap a request in query_budget(engine, n)
+and it fails with the offending statements when more than n are executed.
+A fingerprint is the statement with literals and bound values replaced by
+'?', so the same query issued in a loop (an N+1) collapses into one line
+with a high count.
+
+time_queries() times every statement on an engine once and hands the
+elapsed seconds to the listeners that metrics, query_stats and slow_queries
+register, so they do not each time the same execute.
+"""
+import re
+import time
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'(?:\?|%\(\w+\)s|:\w+|%s)')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(statement):
+    """Normalize a SQL statement so executions of the same query compare equal"""
+    sql = _STRING.sub('?', statement)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """More statements were executed than the budget allows"""
+
+
+class QueryCounter:
+    """Records every statement executed on an engine while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        return False
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def fingerprints(self):
+        """Counter of fingerprint -> executions"""
+        return Counter(fingerprint(statement) for statement in self.statements)
+
+    def report(self, limit=20):
+        """Most frequent fingerprints, one per line"""
+        lines = [f"{count:>4} x {sql}" for sql, count in self.fingerprints().most_common(limit)]
+        return '\n'.join(lines)
+
+
+@contextmanager
+def query_budget(engine, limit, label=''):
+    """Fail with QueryBudgetExceeded if the block executes more than limit statements"""
+    with QueryCounter(engine) as counter:
+        yield counter
+    if counter.count > limit:
+        raise QueryBudgetExceeded(
+            f"{label or 'block'} executed {counter.count} queries (budget {limit}):\n{counter.report()}")
+
+
+# engine -> listeners called after each of its statements
+_listeners = weakref.WeakKeyDictionary()
+
+
+def time_queries(engine, listener):
+    """Call listener(conn, cursor, statement, parameters, context, executemany, seconds) after every statement"""
+    listeners = _listeners.get(engine)
+    if listeners is None:
+        listeners = _listeners[engine] = []
+        event.listen(engine, 'before_cursor_execute', _start_timer)
+        event.listen(engine, 'after_cursor_execute', _stop_timer)
+    if listener not in listeners:
+        listeners.append(listener)
+
+
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_start'] = time.perf_counter()
+
+
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop('query_start', None)
+    if start is None:
+        return
+    seconds = time.perf_counter() - start
+    for listener in _listeners.get(conn.engine, ()):
+        listener(conn, cursor, statement, parameters, context, executemany, seconds)
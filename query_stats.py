@@ -0,0 +1,161 @@
+"""Cumulative statistics per normalized SQL statement, like pg_stat_statements.
+
+Every statement executed on the primary or a replica is reduced to its
+fingerprint (query_counter.fingerprint: literals and bound values become
+'?') and counted: calls, total, mean and max time, and rows. Rows are the
+rows fetched for a SELECT, counted as the result is read, or the rows
+affected for an INSERT, UPDATE or DELETE. So an
+`Enrollment.query.filter_by(student_id=..., course_id=...)` run from a loop
+shows up as one line with a large call count.
+
+The table holds at most QUERY_STATS_MAX fingerprints. When it is full the
+least-called tenth is evicted (and counted) to make room, so a stream of
+distinct statements cannot grow it without bound. Fingerprints are cached
+per statement string, since SQLAlchemy's compiled cache issues the same
+strings over and over.
+
+Per process, like the pool stats: each gunicorn worker keeps its own table.
+/admin/querystats shows it and POST /admin/querystats/reset clears it.
+"""
+import threading
+import time
+
+from query_counter import fingerprint, time_queries
+
+# sort parameter -> row key
+SORTS = {
+    'total': 'total_ms',
+    'calls': 'calls',
+    'mean': 'mean_ms',
+    'max': 'max_ms',
+    'rows': 'rows',
+}
+
+
+class QueryStats:
+    """Calls, time and rows per fingerprint, bounded to max_entries fingerprints"""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._fingerprints = {}  # statement -> fingerprint
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # fingerprint -> [calls, total seconds, max seconds, rows]
+            self.entries = {}
+            self.evicted = 0
+            self.started = time.time()
+
+    def fingerprint(self, statement):
+        sql = self._fingerprints.get(statement)
+        if sql is None:
+            if len(self._fingerprints) >= 2 * self.max_entries:
+                self._fingerprints.clear()
+            sql = self._fingerprints[statement] = fingerprint(statement)
+        return sql
+
+    def record(self, statement, seconds, rows=0):
+        """Count one execution; returns the fingerprint"""
+        sql = self.fingerprint(statement)
+        with self._lock:
+            entry = self.entries.get(sql)
+            if entry is None:
+                if len(self.entries) >= self.max_entries:
+                    self._evict()
+                entry = self.entries[sql] = [0, 0.0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3] += rows
+        return sql
+
+    def add_rows(self, sql, rows):
+        with self._lock:
+            entry = self.entries.get(sql)
+            if entry is not None:
+                entry[3] += rows
+
+    def _evict(self):
+        ranked = sorted(self.entries.items(), key=lambda item: item[1][0], reverse=True)
+        keep = ranked[:self.max_entries * 9 // 10]
+        self.evicted += len(ranked) - len(keep)
+        self.entries = dict(keep)
+
+    def rows(self, sort='total', limit=None):
+        """One dict per fingerprint, largest first by SORTS[sort]"""
+        with self._lock:
+            items = [(sql, list(entry)) for sql, entry in self.entries.items()]
+        overall = sum(entry[1] for _, entry in items)
+        rows = [{
+            'query': sql,
+            'calls': calls,
+            'total_ms': round(total * 1000, 3),
+            'mean_ms': round(total * 1000 / calls, 3),
+            'max_ms': round(longest * 1000, 3),
+            'rows': count,
+            'share': round(total / overall, 4) if overall else 0.0,
+        } for sql, (calls, total, longest, count) in items]
+        rows.sort(key=lambda row: row[SORTS.get(sort, 'total_ms')], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def report(self, sort='total', limit=None):
+        return {
+            'since': self.started,
+            'fingerprints': len(self.entries),
+            'max_entries': self.max_entries,
+            'evicted': self.evicted,
+            'queries': self.rows(sort, limit),
+        }
+
+
+stats = QueryStats()
+
+
+class _RowCountingCursor:
+    """DBAPI cursor proxy that adds the rows a result fetches to its fingerprint"""
+
+    def __init__(self, cursor, sql):
+        self._cursor = cursor
+        self._sql = sql
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            stats.add_rows(self._sql, 1)
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._cursor.fetchmany(*args)
+        stats.add_rows(self._sql, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        stats.add_rows(self._sql, len(rows))
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def _record_query(conn, cursor, statement, parameters, context, executemany, seconds):
+    if cursor.description is None:
+        stats.record(statement, seconds, max(cursor.rowcount, 0))
+        return
+    sql = stats.record(statement, seconds)
+    # The result reads from context.cursor; batched inserts fetch RETURNING rows themselves
+    if context is not None and not executemany and context.cursor is cursor:
+        context.cursor = _RowCountingCursor(cursor, sql)
+
+
+def init_app(app):
+    """Count every statement on every engine"""
+    from pool_metrics import engines
+
+    if not app.config.get('QUERY_STATS_ENABLED', True):
+        return
+    stats.max_entries = app.config.get('QUERY_STATS_MAX', 1000)
+    for engine in engines(app).values():
+        time_queries(engine, _record_query)
@@ -0,0 +1,171 @@
+"""Read-replica routing.
+
+Views decorated with @replica_reads send their SELECTs to a read replica
+(SQLALCHEMY_REPLICA_URIS) when requested with GET or HEAD. Everything else,
+meaning writes, SELECT ... FOR UPDATE, the ORM flush, and undecorated
+views, goes to the primary (SQLALCHEMY_DATABASE_URI). Routing happens in
+RoutingSession.get_bind, the session class of db.
+
+Read-your-writes: once a request has written, the rest of it reads from the
+primary, and the user's session is pinned to the primary for
+REPLICA_STICKY_SECONDS so the pages after an enroll or a grade show it
+even if the replicas lag.
+
+Health: a replica is pinged (SELECT 1) at most every
+REPLICA_HEALTH_INTERVAL seconds when it is about to be used, and marked down
+as soon as a connection to it fails. Reads go to a random healthy replica
+and to the primary when none is healthy; a decorated view whose replica
+fails mid-request is rerun once against the primary.
+"""
+import logging
+import random
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+logger = logging.getLogger(__name__)
+
+# Session key holding the time until which the user reads from the primary
+STICKY_KEY = '_primary_until'
+
+
+class Replica:
+    """One replica engine and its health"""
+
+    def __init__(self, url, engine, check_interval):
+        self.url = url
+        self.engine = engine
+        self.check_interval = check_interval
+        self.healthy = True
+        self.checked_at = 0.0
+        self.reads = 0
+        self._lock = threading.Lock()
+        event.listen(engine, 'handle_error', self._on_error)
+
+    def available(self):
+        """Healthy, re-checking when the last check is older than check_interval"""
+        if time.monotonic() - self.checked_at >= self.check_interval and self._lock.acquire(blocking=False):
+            # One thread checks; the others go by the last result meanwhile
+            try:
+                self.check()
+            finally:
+                self._lock.release()
+        return self.healthy
+
+    def check(self):
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+        except Exception as e:
+            self.mark_down(e)
+        else:
+            if not self.healthy:
+                logger.warning("Replica %s is back up", self.engine.url)
+            self.healthy = True
+        self.checked_at = time.monotonic()
+        return self.healthy
+
+    def mark_down(self, error):
+        if self.healthy:
+            logger.warning("Replica %s marked down: %s", self.engine.url, error)
+        self.healthy = False
+        self.checked_at = time.monotonic()
+
+    def _on_error(self, context):
+        # Lost connections and operational errors (unreachable, missing
+        # schema) take the replica out; data errors are the query's fault
+        if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+            self.mark_down(context.original_exception)
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends plain SELECTs to the request's replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            if _is_write(self, clause):
+                # Everything after a write in this request must see it
+                g._db_wrote = True
+                g._db_replica = None
+            else:
+                replica = g.get('_db_replica')
+                if replica is not None and _is_plain_select(clause):
+                    replica.reads += 1
+                    return replica.engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _is_write(session, clause):
+    if session._flushing:
+        return True
+    if clause is None:
+        return False
+    return clause.is_dml or getattr(clause, '_for_update_arg', None) is not None
+
+
+def _is_plain_select(clause):
+    return clause is not None and clause.is_select and clause._for_update_arg is None
+
+
+def pick_replica():
+    """A random healthy replica, or None (use the primary)"""
+    replicas = current_app.extensions.get('replicas')
+    if not replicas:
+        return None
+    healthy = [replica for replica in replicas if replica.available()]
+    return random.choice(healthy) if healthy else None
+
+
+def pinned_to_primary():
+    return session.get(STICKY_KEY, 0) > time.time()
+
+
+def replica_reads(view):
+    """Route the view's reads to a replica for GET/HEAD requests.
+
+    Only for views whose reads may be slightly stale; a view that writes is
+    still safe (the write and everything after it go to the primary).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        replica = None
+        if request.method in ('GET', 'HEAD') and not pinned_to_primary():
+            replica = pick_replica()
+        g._db_replica = replica
+        try:
+            return view(*args, **kwargs)
+        except DBAPIError:
+            if replica is None or replica.healthy:
+                raise
+            # The replica failed under us: read everything again from the primary
+            from extensions import db
+            db.session.rollback()
+            g._db_replica = None
+            return view(*args, **kwargs)
+    return wrapper
+
+
+def init_app(app):
+    """Create the replica engines and pin writers to the primary"""
+    urls = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+    if not urls:
+        return
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    interval = app.config.get('REPLICA_HEALTH_INTERVAL', 10)
+    app.extensions['replicas'] = [Replica(url, create_engine(url, **options), interval) for url in urls]
+
+    @app.before_request
+    def _reset_routing():
+        g._db_replica = None
+        g._db_wrote = False
+
+    @app.after_request
+    def _stick_to_primary(response):
+        if g.get('_db_wrote'):
+            session[STICKY_KEY] = time.time() + app.config.get('REPLICA_STICKY_SECONDS', 5)
+        return response
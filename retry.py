@@ -0,0 +1,135 @@
+"""Replay write transactions that lost a deadlock or serialization race.
+
+SQL Server picks deadlock victims (error 1205) under registration load; the
+victim's transaction is rolled back and can safely be replayed. Wrap write
+views with @retry_on_conflict (or call run_in_transaction directly) to replay
+the whole unit of work with jittered exponential backoff, up to
+DB_RETRY_ATTEMPTS attempts. Retries and aborts are counted per route and
+exported at /metrics (db_transaction_retries_total and friends).
+"""
+import logging
+import random
+import re
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, has_request_context, request, session
+from sqlalchemy.exc import DBAPIError
+
+from metrics import registry
+from unit_of_work import transaction
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATEs for serialization failure and deadlock
+RETRYABLE_SQLSTATES = {'40001', '40P01'}
+
+# SQL Server: deadlock victim, lock request timeout, snapshot update conflicts,
+# in-memory OLTP validation/commit dependency failures
+RETRYABLE_SQLSERVER_ERRORS = {1205, 1222, 3960, 3961, 41301, 41302, 41305, 41325}
+
+# SQLite reports lock contention only through the message text
+RETRYABLE_MESSAGES = ('database is locked', 'deadlock')
+
+# Outcome -> counter in metrics.py
+OUTCOME_METRICS = {
+    'calls': 'db_transactions_total',
+    'retries': 'db_transaction_retries_total',
+    'aborts': 'db_transaction_aborts_total',
+}
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def is_retryable(exc):
+    """True if the error means the transaction can simply be run again
+
+    A lost connection is not: if it dropped during COMMIT the transaction
+    may have landed, and replaying it would apply its increments twice.
+    """
+    if not isinstance(exc, DBAPIError):
+        return False
+    
+    orig = exc.orig
+    args = getattr(orig, 'args', ()) or ()
+    if args and isinstance(args[0], str) and args[0] in RETRYABLE_SQLSTATES:
+        return True
+    if getattr(orig, 'sqlstate', None) in RETRYABLE_SQLSTATES:
+        return True
+    
+    message = str(orig)
+    codes = {int(code) for code in re.findall(r'\((\d{3,5})\)', message)}
+    if codes & RETRYABLE_SQLSERVER_ERRORS:
+        return True
+    return any(text in message.lower() for text in RETRYABLE_MESSAGES)
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """Full-jitter exponential backoff for the given (1-based) failed attempt"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** (attempt - 1))))
+
+
+def _record(name, outcome):
+    with _stats_lock:
+        counters = _stats.setdefault(name, {'calls': 0, 'retries': 0, 'aborts': 0})
+        counters[outcome] += 1
+    registry.inc(OUTCOME_METRICS[outcome], (('endpoint', name),))
+
+
+def retry_stats():
+    """Snapshot of the per-route counters: {name: {'calls', 'retries', 'aborts'}}"""
+    with _stats_lock:
+        return {name: dict(counters) for name, counters in _stats.items()}
+
+
+def reset_retry_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def run_in_transaction(func, *args, name=None, **kwargs):
+    """Run func in its own transaction, replaying it on retryable errors.
+    
+    func must be safe to run again from the start: it should load whatever
+    it needs rather than rely on objects from an earlier attempt.
+    """
+    config = current_app.config
+    attempts = max(1, config.get('DB_RETRY_ATTEMPTS', 4))
+    base_delay = config.get('DB_RETRY_BASE_DELAY', 0.05)
+    max_delay = config.get('DB_RETRY_MAX_DELAY', 1.0)
+    name = name or getattr(func, '__name__', 'transaction')
+    
+    # Flash messages from a failed attempt must not show up twice
+    flashes = list(session.get('_flashes', [])) if has_request_context() else None
+    
+    _record(name, 'calls')
+    for attempt in range(1, attempts + 1):
+        try:
+            with transaction():
+                return func(*args, **kwargs)
+        except Exception as exc:
+            if not is_retryable(exc):
+                raise
+            if attempt == attempts:
+                _record(name, 'aborts')
+                logger.error("Giving up on %s after %d attempts: %s", name, attempt, exc.orig)
+                raise
+            
+            _record(name, 'retries')
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            logger.warning("Retrying %s (attempt %d/%d) in %.3fs: %s",
+                           name, attempt + 1, attempts, delay, exc.orig)
+            if flashes is not None:
+                session['_flashes'] = list(flashes)
+            time.sleep(delay)
+
+
+def retry_on_conflict(view):
+    """View decorator: run the view as one replayable transaction"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        name = request.endpoint if has_request_context() else view.__name__
+        return run_in_transaction(view, *args, name=name, **kwargs)
+    return wrapper
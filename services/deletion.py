@@ -0,0 +1,94 @@
+"""Set-based deletion of courses and users.
+
+Nothing here loads ORM objects: every dependent table is cleared with a
+DELETE ... WHERE <fk> IN (...) statement, children before parents, inside a
+single transaction. Id lists are processed in chunks so large term-end purges
+stay under SQL Server's 2100 bound-parameter limit.
+"""
+from extensions import db
+import unit_of_work
+from models.user import User
+from models.courses import Course
+from models.enrollment import Enrollment
+from models.assignment import Assignment
+from models.announcement import Announcement
+from models.submission import Submission
+
+CHUNK_SIZE = 1000
+
+
+def _chunks(ids, size=CHUNK_SIZE):
+    ids = list(dict.fromkeys(ids))
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _delete(model, criterion):
+    result = db.session.execute(
+        db.delete(model).where(criterion).execution_options(synchronize_session=False)
+    )
+    return result.rowcount or 0
+
+
+def _update(model, criterion, values):
+    db.session.execute(
+        db.update(model).where(criterion).values(values).execution_options(synchronize_session=False)
+    )
+
+
+def delete_courses(course_ids, commit=True):
+    """Delete courses with their announcements, assignments, submissions and enrollments.
+    
+    Returns a dict of deleted row counts per table.
+    """
+    counts = dict.fromkeys(('submissions', 'assignments', 'announcements', 'enrollments', 'courses'), 0)
+    try:
+        for chunk in _chunks(course_ids):
+            course_assignments = db.select(Assignment.id).where(Assignment.course_id.in_(chunk))
+            counts['submissions'] += _delete(Submission, Submission.assignment_id.in_(course_assignments))
+            counts['assignments'] += _delete(Assignment, Assignment.course_id.in_(chunk))
+            counts['announcements'] += _delete(Announcement, Announcement.course_id.in_(chunk))
+            counts['enrollments'] += _delete(Enrollment, Enrollment.course_id.in_(chunk))
+            counts['courses'] += _delete(Course, Course.id.in_(chunk))
+        if commit:
+            unit_of_work.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return counts
+
+
+def delete_users(user_ids, commit=True):
+    """Delete non-admin users and clean up everything that references them.
+    
+    Seats held by deleted students are given back and their submissions are
+    discounted from the assignment aggregates before the rows go away.
+    Course and announcement references to deleted staff are cleared, as the
+    admin delete_person view has always done. Admin accounts are skipped.
+    
+    Returns a dict of affected row counts per table.
+    """
+    counts = dict.fromkeys(('enrollments', 'submissions', 'users'), 0)
+    try:
+        for chunk in _chunks(user_ids):
+            chunk = db.session.execute(
+                db.select(User.id).where(User.id.in_(chunk), User.role != 'admin')
+            ).scalars().all()
+            if not chunk:
+                continue
+            
+            Course.release_student_seats(chunk)
+            counts['enrollments'] += _delete(Enrollment, Enrollment.student_id.in_(chunk))
+            counts['submissions'] += Assignment.remove_student_submissions(chunk)
+            
+            _update(Course, Course.instructor_id.in_(chunk), {'instructor_id': None})
+            _update(Course, Course.ta_id.in_(chunk), {'ta_id': None})
+            _update(Announcement, Announcement.poster_id.in_(chunk), {'poster_id': None})
+            
+            counts['users'] += _delete(User, User.id.in_(chunk))
+        if commit:
+            unit_of_work.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return counts
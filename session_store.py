@@ -0,0 +1,278 @@
+"""Server-side sessions.
+
+The session cookie only carries a random session id; the data lives in a
+store selected by SESSION_TYPE:
+
+    memory  in-process LRU with a TTL; for a single process (tests, the dev
+            server). Each gunicorn worker would have its own sessions.
+    sqlite  a SQLite file (SESSION_SQLITE_PATH, default sessions.db in the
+            instance folder) shared by every worker and thread on the node.
+            Session ids are bearer tokens, so the file and its WAL/SHM files
+            are readable by the app's user only.
+    cookie  Flask's default signed-cookie sessions (no server-side state).
+
+Writes are lazy: a request that does not modify its session does not touch
+the store, except to push the expiry forward once less than half of
+PERMANENT_SESSION_LIFETIME is left. The id is replaced whenever the logged
+in user changes (login, logout) so an id seen before login is useless
+afterwards, and revoke_user_sessions ends every session of a user. Expired
+sessions are ignored when read and deleted by sweep (SESSION_SWEEP_INTERVAL
+background job, or `flask sweep-sessions`).
+"""
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+from werkzeug.datastructures import CallbackDict
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session data plus its id; tracks modification like Flask's cookie session"""
+
+    def __init__(self, data=None, sid=None, expires=None):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(data, on_update)
+        self.new = sid is None
+        self.sid = sid or new_sid()
+        self.expires = expires
+        self.modified = False
+        self.accessed = False
+        self.loaded_user_id = dict.get(self, 'user_id')
+
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+
+def new_sid():
+    return secrets.token_urlsafe(32)
+
+
+class MemoryStore:
+    """Thread-safe LRU of session data with per-entry expiry"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        """(data, expires) or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[sid]
+                return None
+            self._entries.move_to_end(sid)
+            return dict(entry[0]), entry[1]
+
+    def set(self, sid, data, expires):
+        with self._lock:
+            self._entries[sid] = (dict(data), expires)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def touch(self, sid, expires):
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is not None:
+                self._entries[sid] = (entry[0], expires)
+
+    def delete(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def delete_users(self, user_ids):
+        user_ids = set(user_ids)
+        with self._lock:
+            revoked = [sid for sid, (data, _) in self._entries.items() if data.get('user_id') in user_ids]
+            for sid in revoked:
+                del self._entries[sid]
+        return len(revoked)
+
+    def sweep(self):
+        """Drop expired sessions; returns how many"""
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, (_, expires) in self._entries.items() if expires <= now]
+            for sid in expired:
+                del self._entries[sid]
+        return len(expired)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteStore:
+    """Sessions in a SQLite file shared by the worker processes of a node.
+
+    Each thread of each process opens its own connection (never one
+    inherited across a fork); WAL mode lets readers run alongside a writer.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        # Created 0600 before SQLite opens it; SQLite gives the WAL and SHM
+        # files the mode of the database
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS sessions ('
+                         'sid TEXT PRIMARY KEY, data TEXT NOT NULL, user_id INTEGER, expires REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_sessions_expires ON sessions (expires)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_sessions_user_id ON sessions (user_id)')
+        # Fails on a file someone else created first
+        for name in (path, path + '-wal', path + '-shm'):
+            if os.path.exists(name):
+                os.chmod(name, 0o600)
+
+    def _connect(self):
+        if getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def get(self, sid):
+        row = self._connect().execute('SELECT data, expires FROM sessions WHERE sid = ? AND expires > ?',
+                                      (sid, time.time())).fetchone()
+        if row is None:
+            return None
+        return session_json_serializer.loads(row[0]), row[1]
+
+    def set(self, sid, data, expires):
+        user_id = data.get('user_id')
+        self._connect().execute(
+            'INSERT INTO sessions (sid, data, user_id, expires) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (sid) DO UPDATE SET data = excluded.data, user_id = excluded.user_id, '
+            'expires = excluded.expires',
+            (sid, session_json_serializer.dumps(dict(data)), user_id if isinstance(user_id, int) else None,
+             expires))
+
+    def touch(self, sid, expires):
+        self._connect().execute('UPDATE sessions SET expires = ? WHERE sid = ?', (expires, sid))
+
+    def delete(self, sid):
+        self._connect().execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+
+    def delete_users(self, user_ids):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+        placeholders = ', '.join('?' * len(user_ids))
+        return self._connect().execute(f'DELETE FROM sessions WHERE user_id IN ({placeholders})',
+                                       user_ids).rowcount
+
+    def sweep(self):
+        return self._connect().execute('DELETE FROM sessions WHERE expires <= ?', (time.time(),)).rowcount
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+
+class ServerSessionInterface(SessionInterface):
+    """Keeps the session in a store and only its id in the cookie"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            entry = self.store.get(sid)
+            if entry is not None:
+                return ServerSession(entry[0], sid, entry[1])
+        return ServerSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified and not session.new:
+                # Cleared (logout): forget it on both sides
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        expires = time.time() + lifetime
+        if session.get('user_id') != session.loaded_user_id and not session.new:
+            # Someone logged in or out: the old id must not carry over
+            self.store.delete(session.sid)
+            session.sid = new_sid()
+            session.modified = True
+
+        if session.modified:
+            self.store.set(session.sid, session, expires)
+        elif session.expires - time.time() < lifetime / 2 and app.config.get('SESSION_REFRESH_EACH_REQUEST'):
+            self.store.touch(session.sid, expires)
+        else:
+            return
+
+        response.set_cookie(name, session.sid,
+                            expires=self.get_expiration_time(app, session),
+                            httponly=self.get_cookie_httponly(app),
+                            domain=domain, path=path,
+                            secure=self.get_cookie_secure(app),
+                            samesite=self.get_cookie_samesite(app))
+
+
+def make_store(app):
+    config = app.config
+    session_type = config.get('SESSION_TYPE', 'cookie')
+    if session_type == 'memory':
+        return MemoryStore(config.get('SESSION_MEMORY_MAX_ENTRIES', 10000))
+    if session_type == 'sqlite':
+        path = config.get('SESSION_SQLITE_PATH')
+        if not path:
+            # Not the shared temp dir: anyone there could read or plant session ids
+            os.makedirs(app.instance_path, mode=0o700, exist_ok=True)
+            path = os.path.join(app.instance_path, 'sessions.db')
+        return SQLiteStore(path)
+    if session_type == 'cookie':
+        return None
+    raise ValueError(f"Unknown SESSION_TYPE {session_type!r} (expected memory, sqlite or cookie)")
+
+
+def init_app(app):
+    """Install the server-side session interface selected by SESSION_TYPE"""
+    store = make_store(app)
+    if store is None:
+        return
+    app.session_interface = ServerSessionInterface(store)
+    app.extensions['session_store'] = store
+
+
+def revoke_user_sessions(user_ids):
+    """End every session of these users (no-op with cookie sessions); returns how many"""
+    store = current_app.extensions.get('session_store')
+    return store.delete_users(user_ids) if store else 0
+
+
+def sweep_expired_sessions():
+    """Scheduled job: delete expired sessions"""
+    store = current_app.extensions.get('session_store')
+    return store.sweep() if store else 0
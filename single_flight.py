@@ -0,0 +1,135 @@
+"""Share one database read between identical concurrent calls (single flight).
+
+When registration opens, hundreds of students search for the same keyword
+within the same second, and every request would run the same ILIKE scan.
+A function decorated with @single_flight runs once per distinct arguments
+at a time. A call arriving while an identical call is in flight waits for
+it and gets the same result, or the same exception. With SINGLE_FLIGHT_TTL
+set, the result is also reused for that many seconds after it arrives.
+The default 0 shares in-flight calls only, so no result is older than a
+query that was already running when the call was made.
+
+Only decorate functions returning values that belong to no session and are
+not changed by their callers, such as the read models' namedtuple lists.
+ORM entities are bound to the session, and so the thread, of the request
+that loaded them.
+
+Read-your-writes (see replicas.py): a request that has written, has
+unflushed changes, or is pinned to the primary always runs its own query.
+Calls routed to a replica never share with calls reading the primary.
+"""
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context
+
+# Finished results kept for the TTL, at most
+MAX_ENTRIES = 1024
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'finished_at')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+
+class SingleFlight:
+    """Calls in flight (and results younger than ttl) by key"""
+
+    def __init__(self, ttl=0.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.shared = 0
+        self.cached = 0
+
+    def do(self, key, fn):
+        """fn(), or the result of the identical call already in flight"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.finished_at is not None \
+                    and time.monotonic() - call.finished_at >= self.ttl:
+                del self._calls[key]
+                call = None
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            elif call.finished_at is None:
+                self.shared += 1
+            else:
+                self.cached += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if call.error is None and self.ttl > 0:
+                    call.finished_at = time.monotonic()
+                    if len(self._calls) > MAX_ENTRIES:
+                        self._prune()
+                elif self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def _prune(self):
+        now = time.monotonic()
+        for key, call in list(self._calls.items()):
+            if call.finished_at is not None and (now - call.finished_at >= self.ttl
+                                                 or len(self._calls) > MAX_ENTRIES):
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            return {'executed': self.executed, 'shared': self.shared, 'cached': self.cached,
+                    'in_flight': sum(1 for call in self._calls.values() if call.finished_at is None)}
+
+
+def _may_share():
+    if not has_request_context():
+        return True
+    from extensions import db
+    from replicas import pinned_to_primary
+
+    if g.get('_db_wrote') or pinned_to_primary():
+        return False
+    return not (db.session.new or db.session.deleted or db.session.dirty)
+
+
+def single_flight(fn):
+    """Run identical concurrent calls of fn once (see the module docstring)"""
+    name = f'{fn.__module__}.{fn.__qualname__}'
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        group = current_app.extensions.get('single_flight') if has_app_context() else None
+        if group is None or not _may_share():
+            return fn(*args, **kwargs)
+        key = (name, args, tuple(sorted(kwargs.items())), g.get('_db_replica') is not None)
+        try:
+            hash(key)
+        except TypeError:
+            return fn(*args, **kwargs)
+        return group.do(key, lambda: fn(*args, **kwargs))
+    return wrapper
+
+
+def init_app(app):
+    if app.config.get('SINGLE_FLIGHT_ENABLED', True):
+        app.extensions['single_flight'] = SingleFlight(app.config.get('SINGLE_FLIGHT_TTL', 0.0))
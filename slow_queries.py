@@ -0,0 +1,238 @@
+"""Slow-query log with execution plans.
+
+A statement that takes longer than SLOW_QUERY_MS is logged (logger
+'slow_queries', WARNING) with its duration, parameters, the Flask endpoint
+of the request and the application code that issued it, e.g.
+`Course.search_courses (models/courses.py:81)`. SLOW_QUERY_MS = 0 turns
+the log off.
+
+With SLOW_QUERY_PLANS on, the estimated plan is attached: SHOWPLAN_TEXT on
+SQL Server, EXPLAIN QUERY PLAN on SQLite. Neither runs the statement. Plans
+are taken by one background thread on its own connection per engine,
+outside the pool, so a request never waits for one and never competes
+with other requests for a pooled connection. Plan capture is rate limited:
+at most one plan per fingerprint every SLOW_QUERY_PLAN_INTERVAL seconds,
+at most SLOW_QUERY_PLANS_PER_MINUTE in all, and at most QUEUE_SIZE waiting.
+A slow query over those limits is logged at once without a plan.
+"""
+import logging
+import queue
+import sys
+import threading
+import time
+
+from flask import has_request_context, request
+from profiler import app_path
+from query_counter import fingerprint, time_queries
+
+logger = logging.getLogger(__name__)
+
+PARAMS_MAX_CHARS = 500
+# co_qualname is new in Python 3.11 (the Dockerfile and CI run 3.10)
+HAS_QUALNAME = sys.version_info >= (3, 11)
+QUEUE_SIZE = 16
+PLANNABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+# The listener and the hook that calls it, not the code that issued the query
+_TIMING_FILES = (__file__, time_queries.__code__.co_filename)
+
+
+def code_location(frame):
+    """'qualname (path:line)' of the innermost application frame calling out of frame"""
+    while frame is not None:
+        path = frame.f_code.co_filename
+        relative = app_path(path)
+        if relative is not None and path not in _TIMING_FILES:
+            return f'{qualified_name(frame)} ({relative}:{frame.f_lineno})'
+        frame = frame.f_back
+    return None
+
+
+# code object -> qualified name, before Python 3.11
+_qualnames = {}
+
+
+def qualified_name(frame):
+    """co_qualname, or on Python < 3.11 the class defining the code (via self, cls or the module)"""
+    code = frame.f_code
+    if HAS_QUALNAME:
+        return code.co_qualname
+    name = _qualnames.get(code)
+    if name is None:
+        owner = frame.f_locals.get('self', frame.f_locals.get('cls'))
+        if owner is not None:
+            classes = (owner if isinstance(owner, type) else type(owner)).__mro__
+        else:
+            module = frame.f_globals.get('__name__')
+            classes = [value for value in frame.f_globals.values()
+                       if isinstance(value, type) and value.__module__ == module]
+        name = code.co_name
+        for cls in classes:
+            attribute = vars(cls).get(code.co_name)
+            # staticmethod and classmethod objects wrap the function
+            if getattr(getattr(attribute, '__func__', attribute), '__code__', None) is code:
+                name = f'{cls.__qualname__}.{code.co_name}'
+                break
+        _qualnames[code] = name
+    return name
+
+
+def explain(dbapi_connection, dialect_name, statement, parameters):
+    """Estimated plan lines for statement, without running it"""
+    cursor = dbapi_connection.cursor()
+    try:
+        if dialect_name == 'mssql':
+            cursor.execute('SET SHOWPLAN_TEXT ON')
+            try:
+                cursor.execute(statement, parameters)
+                lines = []
+                while True:
+                    if cursor.description is not None:
+                        lines.extend(str(row[0]) for row in cursor.fetchall())
+                    if not cursor.nextset():
+                        break
+            finally:
+                cursor.execute('SET SHOWPLAN_TEXT OFF')
+            return lines
+        if dialect_name == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+            return [row[-1] for row in cursor.fetchall()]
+        return None
+    finally:
+        cursor.close()
+
+
+class PlanCapturer:
+    """Takes plans in a background thread, within the rate limits"""
+
+    def __init__(self, interval=600, per_minute=6):
+        self.interval = interval
+        self.per_minute = per_minute
+        self._lock = threading.Lock()
+        self._last_planned = {}  # fingerprint -> time of its last plan
+        self._recent = []  # times of plans in the last minute
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._thread = None
+        self._connections = {}  # engine -> raw DBAPI connection
+        self.captured = 0
+        self.skipped = 0
+
+    def allow(self, sql):
+        now = time.monotonic()
+        with self._lock:
+            self._recent = [at for at in self._recent if now - at < 60]
+            last = self._last_planned.get(sql)
+            if (last is not None and now - last < self.interval) or len(self._recent) >= self.per_minute:
+                self.skipped += 1
+                return False
+            if len(self._last_planned) >= 1000:
+                self._last_planned.clear()
+            self._last_planned[sql] = now
+            self._recent.append(now)
+            return True
+
+    def submit(self, engine, record):
+        """Queue record for a plan; False (nothing queued) when over a limit"""
+        if not self.allow(record['fingerprint']):
+            return False
+        self._start()
+        try:
+            self._queue.put_nowait((engine, record))
+        except queue.Full:
+            with self._lock:
+                self.skipped += 1
+            return False
+        return True
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='slow-query-plans', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            engine, record = self._queue.get()
+            try:
+                record['plan'] = self.plan(engine, record['statement'], record['_parameters'])
+                if record['plan'] is not None:
+                    self.captured += 1
+            except Exception as e:
+                record['plan_error'] = str(e)
+                self._drop_connection(engine)
+            finally:
+                log(record)
+                self._queue.task_done()
+
+    def plan(self, engine, statement, parameters):
+        dbapi_connection = self._connections.get(engine)
+        if dbapi_connection is None:
+            cargs, cparams = engine.dialect.create_connect_args(engine.url)
+            dbapi_connection = self._connections[engine] = engine.dialect.connect(*cargs, **cparams)
+        lines = explain(dbapi_connection, engine.dialect.name, statement, parameters)
+        dbapi_connection.rollback()
+        return lines
+
+    def _drop_connection(self, engine):
+        dbapi_connection = self._connections.pop(engine, None)
+        if dbapi_connection is not None:
+            try:
+                dbapi_connection.close()
+            except Exception:
+                pass
+
+    def wait(self):
+        """Block until every queued plan has been taken and logged"""
+        self._queue.join()
+
+
+capturer = PlanCapturer()
+
+# SLOW_QUERY_MS in seconds (None: off) and whether plans are taken
+_settings = {'threshold': None, 'plans': False}
+
+
+def log(record):
+    record.pop('_parameters', None)
+    message = ('Slow query %.1f ms in %s at %s: %s | parameters: %s'
+               % (record['duration_ms'], record['endpoint'] or '-', record['location'] or '-',
+                  record['statement'], record['parameters']))
+    if record.get('plan'):
+        message += '\nplan:\n  ' + '\n  '.join(record['plan'])
+    elif record.get('plan_error'):
+        message += f"\nplan unavailable: {record['plan_error']}"
+    logger.warning(message, extra={'slow_query': record})
+
+
+def _log_if_slow(conn, cursor, statement, parameters, context, executemany, seconds):
+    threshold = _settings['threshold']
+    if threshold is None or seconds < threshold:
+        return
+    record = {
+        'duration_ms': round(seconds * 1000, 3),
+        'statement': statement,
+        'fingerprint': fingerprint(statement),
+        'parameters': repr(parameters)[:PARAMS_MAX_CHARS],
+        'endpoint': request.endpoint if has_request_context() else None,
+        'location': code_location(sys._getframe(1)),
+        'executemany': executemany,
+        'plan': None,
+        '_parameters': parameters,
+    }
+    plannable = not executemany and statement.lstrip().upper().startswith(PLANNABLE)
+    if not (_settings['plans'] and plannable and capturer.submit(conn.engine, record)):
+        log(record)
+
+
+def init_app(app):
+    """Log slow statements on every engine"""
+    from pool_metrics import engines
+
+    threshold_ms = app.config.get('SLOW_QUERY_MS')
+    if not threshold_ms:
+        return
+    _settings['threshold'] = threshold_ms / 1000
+    _settings['plans'] = app.config.get('SLOW_QUERY_PLANS', True)
+    capturer.interval = app.config.get('SLOW_QUERY_PLAN_INTERVAL', 600)
+    capturer.per_minute = app.config.get('SLOW_QUERY_PLANS_PER_MINUTE', 6)
+    for engine in engines(app).values():
+        time_queries(engine, _log_if_slow)
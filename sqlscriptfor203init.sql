@@ -82,7 +82,13 @@ CREATE TABLE assignments (
     description NVARCHAR(MAX),
     due_date DATETIME NOT NULL,
     created_at DATETIME DEFAULT GETDATE(),
-    course_id INT NOT NULL FOREIGN KEY REFERENCES courses(id)
+    course_id INT NOT NULL FOREIGN KEY REFERENCES courses(id),
+    
+    -- Denormalized submission aggregates (see Assignment.recompute_stats)
+    submission_count INT NOT NULL DEFAULT 0,
+    graded_count INT NOT NULL DEFAULT 0,
+    grade_sum FLOAT NOT NULL DEFAULT 0,
+    grade_sum_sq FLOAT NOT NULL DEFAULT 0
 );
 GO
 
@@ -92,7 +98,7 @@ CREATE TABLE announcements (
     title NVARCHAR(200) NOT NULL,
     content NVARCHAR(MAX) NOT NULL,
     created_at DATETIME DEFAULT GETDATE(),
-    poster_id INT NOT NULL FOREIGN KEY REFERENCES users(id),
+    poster_id INT NULL FOREIGN KEY REFERENCES users(id),
     course_id INT NOT NULL FOREIGN KEY REFERENCES courses(id)
 );
 GO
@@ -111,6 +117,16 @@ CREATE TABLE submissions (
 );
 GO
 
+-- Indexes for hot query paths (migration 0003)
+CREATE INDEX ix_enrollments_course_id ON enrollments(course_id);
+CREATE INDEX ix_submissions_student_id ON submissions(student_id);
+CREATE INDEX ix_assignments_course_id_due_date ON assignments(course_id, due_date);
+CREATE INDEX ix_announcements_course_id_created_at ON announcements(course_id, created_at DESC);
+CREATE INDEX ix_courses_instructor_id ON courses(instructor_id);
+CREATE INDEX ix_courses_ta_id ON courses(ta_id);
+CREATE INDEX ix_users_role ON users(role);
+GO
+
 -- ============================================
 -- 3. INSERT DUMMY DATA with role-specific fields
 -- ============================================
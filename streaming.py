@@ -0,0 +1,62 @@
+"""Streamed rendering for long listings.
+
+A listing view passes a generator of rows (from a yield_per query, so the
+database cursor is read batch by batch) to stream_page, which renders the
+template with Flask's stream_template and sends the HTML as it is
+produced. The page header and the first rows reach the browser while the
+rest are still being fetched, and neither the full result nor the full
+page is ever held in memory.
+"""
+from flask import Response, stream_template
+
+# Jinja yields tiny fragments; they are sent in chunks of about this many characters
+CHUNK_SIZE = 8 * 1024
+
+
+class Rows:
+    """A row generator that can also be tested for emptiness.
+
+    Templates check `{% if rows %}` before looping; a bare generator is always
+    true, so this fetches the first row to answer and replays it when iterated.
+    It can be iterated once.
+    """
+
+    _missing = object()
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._first = self._missing
+
+    def __bool__(self):
+        if self._first is self._missing:
+            self._first = next(self._rows, None)
+        return self._first is not None
+
+    def __iter__(self):
+        if self._first is self._missing:
+            self._first = next(self._rows, None)
+        if self._first is not None:
+            yield self._first
+        yield from self._rows
+
+
+def _chunks(fragments, size):
+    buffer = []
+    length = 0
+    for fragment in fragments:
+        buffer.append(fragment)
+        length += len(fragment)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_page(template_name, chunk_size=CHUNK_SIZE, **context):
+    """Response that renders template_name incrementally (request context kept until done)"""
+    response = Response(_chunks(stream_template(template_name, **context), chunk_size), mimetype='text/html')
+    # Tell buffering proxies (nginx) to pass chunks through as they come
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,51 @@
+"""Jinja bytecode cache and template warm-up.
+
+Jinja compiles a template to Python the first time it is loaded, so the
+first request to every page after a deploy or a worker start pays for the
+compile. With TEMPLATE_BYTECODE_CACHE the compiled code is stored on disk
+(TEMPLATE_CACHE_DIR, default a per-user directory under the system temp
+dir) and later processes only unmarshal it; a changed template has a
+different checksum and is recompiled. With TEMPLATE_WARMUP every template
+is loaded in create_app, which under gunicorn's preload happens in the
+master, so forked and recycled workers start with all templates in memory.
+`flask compile-templates` fills the cache in a build step.
+"""
+import os
+import time
+
+from jinja2 import FileSystemBytecodeCache, TemplateError
+
+# Only these are templates; other files under templates/ (stylesheets) are skipped
+TEMPLATE_SUFFIXES = ('.html',)
+
+
+def init_app(app):
+    """Attach the bytecode cache to the app's Jinja environment"""
+    if app.config.get('TEMPLATE_BYTECODE_CACHE'):
+        directory = app.config.get('TEMPLATE_CACHE_DIR')
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def template_names(app):
+    return app.jinja_env.list_templates(filter_func=lambda name: name.endswith(TEMPLATE_SUFFIXES))
+
+
+def warm_templates(app):
+    """Load (and so compile or read from the bytecode cache) every template.
+
+    Returns {name: milliseconds}. A template that fails to compile is logged
+    and left out rather than stopping the app from starting; the page using
+    it fails on its own request as it would without the warm-up.
+    """
+    timings = {}
+    for name in template_names(app):
+        start = time.perf_counter()
+        try:
+            app.jinja_env.get_template(name)
+        except TemplateError as e:
+            app.logger.error("Template %s failed to compile: %s", name, e)
+            continue
+        timings[name] = (time.perf_counter() - start) * 1000
+    return timings
@@ -1,11 +1,13 @@
 import pytest
-from app import create_app
+from sqlalchemy import insert
+from app import create_app, load_blueprints
+from config import TestingConfig
 from extensions import db
 
 @pytest.fixture
 def app():
     """Create and configure a Flask app for testing models"""
-    app = create_app()
+    app = create_app('testing')
     app.config.update({
         'TESTING': True,
         'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
@@ -23,4 +25,40 @@ def app():
 def session_db(app):
     """Database session for model tests"""
     with app.app_context():
-        yield db.session
\ No newline at end of file
+        yield db.session
+
+@pytest.fixture
+def query_budget(app):
+    """Context manager factory failing a block that runs more than N statements"""
+    from query_counter import query_budget as budget
+    
+    def within(limit, label=''):
+        return budget(db.engine, limit, label)
+    return within
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Factory for apps on their own database: make_app(url=None, rows=None, **settings)
+
+    settings override TestingConfig, url defaults to a SQLite file in tmp_path,
+    and rows, a list of (model, [column dicts]), are inserted after create_all
+    (no tables are created when rows is None).
+    """
+    def factory(url=None, rows=None, **settings):
+        settings['SQLALCHEMY_DATABASE_URI'] = url or f"sqlite:///{tmp_path / 'app.db'}"
+        app = create_app(type('Settings', (TestingConfig,), settings))
+        load_blueprints(app)
+        if rows is not None:
+            with app.app_context():
+                db.create_all()
+                for model, values in rows:
+                    db.session.execute(insert(model), values)
+                db.session.commit()
+        return app
+    return factory
+
+def log_in(client, user_id=1, role='student'):
+    """Put a logged-in user in the test client's session"""
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+        sess['role'] = role
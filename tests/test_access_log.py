@@ -0,0 +1,126 @@
+import json
+import threading
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+import access_log
+from access_log import AsyncWriter
+from configtest import log_in, make_app  # noqa: F401 (make_app is a fixture)
+from extensions import db
+from models.user import User
+
+
+USERS = [
+    {'id': 1, 'name': 'Sam Student', 'email': 'sam@uni.edu', 'password_hash': generate_password_hash('right'),
+     'role': 'student'},
+    {'id': 2, 'name': 'Ada Admin', 'email': 'ada@uni.edu', 'password_hash': 'bogus$salt$hash', 'role': 'admin'},
+]
+
+
+def read_log(path):
+    access_log.writer.flush()
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = tmp_path / 'access.log'
+    yield path
+    access_log.writer.configure(None)
+
+
+@pytest.fixture
+def app(make_app, log_path):
+    return make_app(rows=[(User, USERS)], ACCESS_LOG=str(log_path))
+
+
+class TestAccessLog:
+    """Tests for the structured request log"""
+
+    def test_request_fields(self, app, log_path):
+        """Test that a request is logged with its endpoint, user, role, latency and queries"""
+        client = app.test_client()
+        log_in(client, 1, 'student')
+
+        client.get('/student/dashboard').close()
+
+        record, = read_log(log_path)
+        assert record['event'] == 'request'
+        assert record['endpoint'] == 'student.dashboard'
+        assert record['method'] == 'GET' and record['path'] == '/student/dashboard'
+        assert record['status'] == 200
+        assert record['user_id'] == 1 and record['role'] == 'student'
+        assert record['latency_ms'] > 0
+        assert record['queries'] > 0
+        assert record['ts'].endswith('Z')
+
+    def test_failed_login_event(self, app, log_path):
+        """Test that a failed login is logged as an event instead of printed"""
+        client = app.test_client()
+
+        client.post('/login', data={'email': 'sam@uni.edu', 'password': 'wrong'}).close()
+
+        events = [record for record in read_log(log_path) if record['event'] == 'login_failed']
+        assert events == [{'ts': events[0]['ts'], 'event': 'login_failed', 'endpoint': 'auth.login',
+                           'remote_addr': '127.0.0.1', 'email': 'sam@uni.edu', 'user_id': 1}]
+
+    def test_password_check_error_event(self, app, log_path):
+        """Test that an unreadable password hash is logged as an event"""
+        with app.app_context():
+            assert not db.session.get(User, 2).check_password('anything')
+
+        record, = read_log(log_path)
+        assert record['event'] == 'password_check_error'
+        assert record['user_id'] == 2 and record['error']
+
+    def test_disabled(self, make_app, log_path):
+        """Test that with ACCESS_LOG empty no hook is installed and nothing is written"""
+        app = make_app(rows=[(User, USERS)], ACCESS_LOG='')
+
+        app.test_client().get('/login').close()
+
+        assert access_log._record_response not in app.after_request_funcs.get(None, [])
+        assert not log_path.exists()
+
+
+class TestAsyncWriter:
+    """Tests for the queued background writer"""
+
+    def test_drops_instead_of_blocking(self, tmp_path):
+        """Test that a full queue drops and counts records without blocking"""
+        writer = AsyncWriter(str(tmp_path / 'log'), queue_size=2)
+        gate = threading.Event()
+        original = writer._write
+        writer._write = lambda records: (gate.wait(), original(records))
+
+        results = [writer.put({'time': 0.0, 'event': 'n', 'i': i}) for i in range(10)]
+        gate.set()
+        writer.close()
+
+        written = (tmp_path / 'log').read_text().splitlines()
+        assert results.count(False) == writer.dropped
+        assert len(written) + writer.dropped == 10
+        assert writer.dropped >= 7
+
+    def test_batches_and_whole_lines(self, tmp_path):
+        """Test that records are written in batches of whole lines from many threads"""
+        path = tmp_path / 'log'
+        writer = AsyncWriter(str(path), batch_size=64)
+
+        def work(n):
+            for i in range(500):
+                writer.put({'time': 0.0, 'event': 'n', 'thread': n, 'i': i, 'pad': 'x' * 100})
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.close()
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert len(records) == 2000 and writer.dropped == 0
+        assert writer.batches < 2000
+        assert records[0]['ts'] == '1970-01-01T00:00:00.000Z'
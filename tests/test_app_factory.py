@@ -0,0 +1,70 @@
+import pytest
+
+from app import create_app, load_blueprints
+from benchmarks import startup_benchmark
+from config import ProductionConfig, TestingConfig
+
+
+class TestAppFactory:
+    """Tests for create_app and its config profiles"""
+
+    def test_profiles_by_name(self):
+        """Test that each profile name selects its config class"""
+        assert create_app('testing').config['TESTING'] is True
+        assert create_app('development').config['DEBUG'] is True
+        assert create_app('prod').config['DEBUG'] is False
+
+    def test_config_class_and_env_default(self, monkeypatch):
+        """Test that a config class is accepted and APP_CONFIG picks the default profile"""
+        class Custom(TestingConfig):
+            SECRET_KEY = 'custom'
+
+        assert create_app(Custom).config['SECRET_KEY'] == 'custom'
+        monkeypatch.setenv('APP_CONFIG', 'testing')
+        assert create_app().config['TESTING'] is True
+
+    def test_unknown_profile(self):
+        """Test that a misspelled profile fails loudly"""
+        with pytest.raises(KeyError):
+            create_app('staging')
+
+    def test_production_registers_blueprints_eagerly(self):
+        """Test that the production profile has every route before the first request"""
+        app = create_app(ProductionConfig)
+
+        assert 'lazy_blueprints' not in app.extensions
+        assert {'auth', 'student', 'ta', 'admin'} <= set(app.blueprints)
+
+    def test_lazy_blueprints_load_on_first_request(self):
+        """Test that lazy blueprints are registered by the first request only"""
+        app = create_app('testing')
+        assert not app.blueprints
+
+        response = app.test_client().get('/')
+
+        assert response.status_code == 302
+        assert response.headers['Location'].endswith('/login')
+        assert {'auth', 'student', 'ta', 'admin'} <= set(app.blueprints)
+
+    def test_load_blueprints(self):
+        """Test that load_blueprints registers lazy blueprints once"""
+        app = create_app('testing')
+
+        load_blueprints(app)
+        load_blueprints(app)
+
+        assert 'admin.searchpeople' in app.view_functions
+
+    def test_startup_benchmark(self):
+        """Test that the startup benchmark times every phase in a fresh interpreter"""
+        summary = startup_benchmark.run('testing', runs=1, log=lambda *a: None)
+
+        assert summary['status'] == 200
+        assert summary['total_ms'] > 0
+        assert all(summary[phase] > 0 for phase in startup_benchmark.PHASES)
+
+    def test_startup_benchmark_development_in_memory(self):
+        """Test that the documented default (development, SQLite :memory:) starts"""
+        summary = startup_benchmark.run('development', runs=1, log=lambda *a: None)
+
+        assert summary['status'] == 200
@@ -280,4 +280,85 @@ class TestAssignmentModel:
         with pytest.raises(Exception):
             session_db.commit()
         
-        session_db.rollback()
\ No newline at end of file
+        session_db.rollback()
+    
+    def _graded_setup(self, session_db, student_count=2):
+        """Create an instructor, course, assignment and some students"""
+        instructor = User(name="Instructor", email="inst@test.com", role="instructor", password="password123")
+        session_db.add(instructor)
+        session_db.commit()
+        
+        course = Course(code="CS101", name="CS 101", instructor_id=instructor.id)
+        session_db.add(course)
+        session_db.commit()
+        
+        assignment = Assignment(title="HW1", description="Homework 1", due_date=datetime.now(), course_id=course.id)
+        students = [
+            User(name=f"Student{i}", email=f"student{i}@test.com", role="student", password="password123")
+            for i in range(student_count)
+        ]
+        session_db.add(assignment)
+        session_db.add_all(students)
+        session_db.commit()
+        return course, assignment, students
+    
+    def test_submission_stats_maintained(self, session_db):
+        """Test that add_submission and grade_submission keep the aggregates current"""
+        course, assignment, students = self._graded_setup(session_db)
+        
+        assert assignment.get_submission_count() == 0
+        assert assignment.get_average_grade() is None
+        
+        for student in students:
+            assignment.add_submission(student.id, "answer")
+        # Resubmitting must not count twice
+        assignment.add_submission(students[0].id, "better answer")
+        assert assignment.get_submission_count() == 2
+        
+        assignment.grade_submission(students[0].id, 80)
+        assignment.grade_submission(students[1].id, 70)
+        assignment.grade_submission(students[1].id, 100)  # regrade
+        
+        assert assignment.get_graded_count() == 2
+        assert assignment.get_average_grade() == 90.0
+        assert assignment.get_grade_stddev() == 10.0
+        
+        data = assignment.to_dict()
+        assert data['submission_count'] == 2
+        assert data['average_grade'] == 90.0
+    
+    def test_submission_stats_on_delete(self, session_db):
+        """Test that deleting submissions discounts them from the aggregates"""
+        course, assignment, students = self._graded_setup(session_db)
+        for student in students:
+            assignment.add_submission(student.id, "answer")
+        assignment.grade_submission(students[0].id, 60)
+        
+        # ORM delete
+        session_db.delete(assignment.get_submission(students[0].id))
+        session_db.commit()
+        assert assignment.submission_count == 1
+        assert assignment.graded_count == 0
+        assert assignment.grade_sum == 0
+        
+        # Set-based delete
+        Assignment.remove_student_submissions([students[1].id])
+        session_db.commit()
+        session_db.refresh(assignment)
+        assert assignment.submission_count == 0
+    
+    def test_recompute_stats(self, session_db):
+        """Test that recompute_stats repairs drifted aggregates"""
+        course, assignment, students = self._graded_setup(session_db)
+        assignment.add_submission(students[0].id, "answer")
+        assignment.grade_submission(students[0].id, 75)
+        
+        assignment.submission_count = 42
+        assignment.grade_sum = 0
+        session_db.commit()
+        
+        assert Assignment.recompute_stats() == 1
+        assert assignment.submission_count == 1
+        assert assignment.graded_count == 1
+        assert assignment.get_average_grade() == 75.0
+        assert Assignment.recompute_stats() == 0
@@ -431,4 +431,47 @@ class TestCourseModel:
         assert course.seats_left == 30
         assert course.schedule == "TBA"
         assert course.department == "General"
-        assert course.description == "Course: Test Course"
\ No newline at end of file
+        assert course.description == "Course: Test Course"
+    
+    def test_reconcile_seats(self, session_db):
+        """Test that reconcile_seats rebuilds seats_left from enrollments"""
+        instructor = User(name="Inst", email="inst@test.com", role="instructor", password="password123")
+        student = User(name="Student", email="student@test.com", role="student", password="password123")
+        session_db.add_all([instructor, student])
+        session_db.commit()
+        
+        full = Course(code="CS101", name="CS 101", max_seats=3, instructor_id=instructor.id)
+        empty = Course(code="CS102", name="CS 102", max_seats=5, instructor_id=instructor.id)
+        session_db.add_all([full, empty])
+        session_db.commit()
+        
+        session_db.add(Enrollment(student_id=student.id, course_id=full.id))
+        full.seats_left = 3  # drifted: enrollment added without taking a seat
+        empty.seats_left = 1  # drifted: seats never given back
+        session_db.commit()
+        
+        drift = Course.reconcile_seats()
+        assert sorted(drift) == [(full.id, "CS101", 3, 2), (empty.id, "CS102", 1, 5)]
+        assert full.seats_left == 2
+        assert empty.seats_left == 5
+        assert Course.reconcile_seats() == []
+    
+    def test_release_student_seats(self, session_db):
+        """Test that release_student_seats gives back one seat per enrollment"""
+        instructor = User(name="Inst", email="inst@test.com", role="instructor", password="password123")
+        student = User(name="Student", email="student@test.com", role="student", password="password123")
+        session_db.add_all([instructor, student])
+        session_db.commit()
+        
+        course = Course(code="CS101", name="CS 101", max_seats=2, instructor_id=instructor.id)
+        session_db.add(course)
+        session_db.commit()
+        assert course.enroll_student(student.id)
+        assert course.seats_left == 1
+        
+        Course.release_student_seats([student.id])
+        Enrollment.query.filter_by(student_id=student.id).delete()
+        session_db.commit()
+        
+        assert course.seats_left == 2
+        assert Course.reconcile_seats() == []
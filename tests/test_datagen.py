@@ -0,0 +1,44 @@
+from sqlalchemy import text
+from benchmarks import datagen
+
+class TestDatagen:
+    """Tests for the synthetic university generator"""
+    
+    def test_deterministic_by_seed(self):
+        """Test that the same seed yields the same rows"""
+        first = datagen.generate(students=300, courses=20, staff=10, seed=7)
+        second = datagen.generate(students=300, courses=20, staff=10, seed=7)
+        other = datagen.generate(students=300, courses=20, staff=10, seed=8)
+        
+        for table in datagen.TABLES:
+            if table != 'users':  # password hashes are salted
+                assert first[table] == second[table]
+        strip_hash = lambda rows: [row[:3] + row[4:] for row in rows]
+        assert strip_hash(first['users'][1]) == strip_hash(second['users'][1])
+        assert first['enrollments'] != other['enrollments']
+    
+    def test_enrollments_respect_capacity(self):
+        """Test that no course is enrolled beyond max_seats"""
+        data = datagen.generate(students=500, courses=5, staff=4)
+        columns, courses = data['courses']
+        enrolled = {}
+        for _, student_id, course_id, _ in data['enrollments'][1]:
+            enrolled[course_id] = enrolled.get(course_id, 0) + 1
+        
+        for course in courses:
+            course = dict(zip(columns, course))
+            assert enrolled.get(course['id'], 0) <= course['max_seats']
+            assert course['seats_left'] == course['max_seats'] - enrolled.get(course['id'], 0)
+    
+    def test_load(self, tmp_path):
+        """Test bulk loading into SQLite"""
+        engine = datagen.make_engine(f"sqlite:///{tmp_path / 'university.db'}")
+        data = datagen.generate(students=200, courses=10, staff=6)
+        total = datagen.load(engine, data, batch_size=50, log=lambda message: None)
+        
+        assert total == sum(len(rows) for _, rows in data.values())
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM users")).scalar() == 206
+            graded = conn.execute(text("SELECT COUNT(grade) FROM submissions")).scalar()
+            assert conn.execute(text("SELECT SUM(graded_count) FROM assignments")).scalar() == graded
+        engine.dispose()
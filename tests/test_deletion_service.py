@@ -0,0 +1,82 @@
+import pytest
+from datetime import datetime
+from models.user import User
+from models.courses import Course
+from models.enrollment import Enrollment
+from models.assignment import Assignment
+from models.announcement import Announcement
+from models.submission import Submission
+from services import deletion
+
+class TestDeletionService:
+    """Tests for services/deletion.py"""
+    
+    @pytest.fixture
+    def populated(self, session_db):
+        """A course with an announcement, an assignment, enrolled students and submissions"""
+        admin = User(name="Admin", email="admin@test.com", role="admin", password="password123")
+        instructor = User(name="Inst", email="inst@test.com", role="instructor", password="password123")
+        students = [
+            User(name=f"Student{i}", email=f"student{i}@test.com", role="student", password="password123")
+            for i in range(3)
+        ]
+        session_db.add_all([admin, instructor] + students)
+        session_db.commit()
+        
+        course = Course(code="CS101", name="CS 101", max_seats=10, instructor_id=instructor.id)
+        other = Course(code="CS102", name="CS 102", max_seats=10, instructor_id=instructor.id)
+        session_db.add_all([course, other])
+        session_db.commit()
+        
+        for student in students:
+            course.enroll_student(student.id)
+            other.enroll_student(student.id)
+        course.add_announcement("Welcome", "Hello", instructor.id)
+        assignment = course.add_assignment("HW1", "Homework", datetime.now())
+        for student in students:
+            assignment.add_submission(student.id, "answer")
+            assignment.grade_submission(student.id, 90)
+        
+        return {'admin': admin, 'instructor': instructor, 'students': students,
+                'course': course, 'other': other, 'assignment': assignment}
+    
+    def test_delete_courses(self, session_db, populated):
+        """Test that deleting a course removes all dependent rows"""
+        course_id = populated['course'].id
+        counts = deletion.delete_courses([course_id])
+        
+        assert counts == {'submissions': 3, 'assignments': 1, 'announcements': 1,
+                          'enrollments': 3, 'courses': 1}
+        assert session_db.get(Course, course_id) is None
+        assert Submission.query.count() == 0
+        assert Enrollment.query.filter_by(course_id=course_id).count() == 0
+        # The other course is untouched
+        assert Enrollment.query.filter_by(course_id=populated['other'].id).count() == 3
+    
+    def test_delete_courses_missing(self, session_db, populated):
+        """Test deleting a course that does not exist"""
+        counts = deletion.delete_courses([99999])
+        assert counts['courses'] == 0
+    
+    def test_delete_users(self, session_db, populated):
+        """Test that deleting students restores seats and assignment aggregates"""
+        students = populated['students']
+        counts = deletion.delete_users([students[0].id, students[1].id, populated['admin'].id])
+        
+        assert counts == {'enrollments': 4, 'submissions': 2, 'users': 2}
+        assert session_db.get(User, populated['admin'].id) is not None
+        assert populated['course'].seats_left == 9
+        assert populated['other'].seats_left == 9
+        assert populated['assignment'].submission_count == 1
+        assert populated['assignment'].get_average_grade() == 90.0
+        assert Course.reconcile_seats() == []
+        assert Assignment.recompute_stats() == 0
+    
+    def test_delete_instructor_clears_references(self, session_db, populated):
+        """Test that deleting staff clears course and announcement references"""
+        instructor_id = populated['instructor'].id
+        deletion.delete_users([instructor_id])
+        
+        assert Course.query.filter_by(instructor_id=instructor_id).count() == 0
+        assert Announcement.query.filter_by(poster_id=instructor_id).count() == 0
+        assert Announcement.query.count() == 1
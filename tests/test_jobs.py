@@ -0,0 +1,46 @@
+import subprocess
+import sys
+import threading
+
+import jobs
+from configtest import make_app  # noqa: F401 (fixture)
+
+EVERY_JOB = {'SEAT_RECONCILE_INTERVAL': 3600, 'SESSION_SWEEP_INTERVAL': 3600, 'POOL_LIVENESS_INTERVAL': 3600}
+
+
+class TestScheduledJobs:
+    """Tests for scheduling and starting the background jobs"""
+
+    def test_create_app_starts_nothing(self, make_app):
+        """Test that create_app schedules the jobs without starting a thread (CLI, gunicorn master)"""
+        app = make_app(**EVERY_JOB)
+        names = [job.name for job in app.extensions['scheduled_jobs']]
+        assert names == ['reconcile-seats', 'sweep-sessions', 'pool-liveness']
+        running = [thread.name for thread in threading.enumerate()]
+        assert not any(name.startswith('job-') for name in running)
+
+    def test_start_without_node_jobs(self, make_app):
+        """Test that a worker without the jobs lock starts only the per-process jobs"""
+        app = make_app(**EVERY_JOB)
+        started = jobs.start_scheduled_jobs(app, node_jobs=False)
+        try:
+            assert [job.name for job in started] == ['pool-liveness']
+        finally:
+            for job in started:
+                job.stop()
+
+    def test_one_process_claims_node_jobs(self, tmp_path, monkeypatch, make_app):
+        """Test that only the first process to take the jobs lock runs the node-wide jobs"""
+        app = make_app(**EVERY_JOB)
+        app.config['JOBS_LOCK_PATH'] = str(tmp_path / 'jobs.lock')
+        monkeypatch.setattr(jobs, '_node_lock', None)
+        assert jobs.claim_node_jobs(app)
+        try:
+            assert jobs.claim_node_jobs(app)
+            other = subprocess.run(
+                [sys.executable, '-c',
+                 'import fcntl, sys; f = open(sys.argv[1], "a"); fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)',
+                 app.config['JOBS_LOCK_PATH']], capture_output=True)
+            assert other.returncode != 0
+        finally:
+            jobs._node_lock.close()
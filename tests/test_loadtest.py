@@ -0,0 +1,44 @@
+import pytest
+
+from benchmarks import datagen, loadtest
+
+
+@pytest.fixture(scope='module')
+def small_data():
+    return datagen.generate(students=200, courses=12, staff=8, seed=3)
+
+
+class TestLoadTest:
+    """Tests for the registration-day load-test harness"""
+    
+    def test_parse_mix(self):
+        """Test journey weights parsing and unknown journeys"""
+        assert loadtest.parse_mix('student=80,admin=20') == (['student', 'admin'], [80.0, 20.0])
+        with pytest.raises(ValueError):
+            loadtest.parse_mix('student=80,registrar=20')
+    
+    def test_world_gives_tas_their_own_submissions(self, small_data):
+        """Test that TA journeys only grade submissions in courses they assist"""
+        world = loadtest.World(small_data)
+        course_ta = {row[0]: row[10] for row in small_data['courses'][1]}
+        assignment_course = {row[0]: row[5] for row in small_data['assignments'][1]}
+        submission_assignment = {row[0]: row[5] for row in small_data['submissions'][1]}
+        
+        assert world.tas
+        for ta_id, email, submission_ids in world.tas:
+            assert email.startswith('ta')
+            for submission_id in submission_ids:
+                assert course_ta[assignment_course[submission_assignment[submission_id]]] == ta_id
+    
+    def test_run_against_local_server(self, small_data):
+        """Test a short run end to end against a served SQLite instance"""
+        server, app = loadtest.serve(small_data, log=lambda *a: None)
+        try:
+            report = loadtest.run(f'http://127.0.0.1:{server.server_port}', loadtest.World(small_data),
+                                  users=6, rate=100, think_time=0, interval=60, log=lambda *a: None)
+        finally:
+            server.shutdown()
+        
+        assert report['errors'] == 0
+        assert report['steps']['login']['iterations'] == 6
+        assert report['requests'] > 6
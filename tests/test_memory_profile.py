@@ -0,0 +1,67 @@
+import pytest
+
+from benchmarks import memory_profile
+from models.courses import Course
+from models.user import User
+
+_retained = []
+
+
+@pytest.fixture
+def people(app, session_db):
+    """An admin plus a handful of students and courses"""
+    admin = User(name='Ada Admin', email='admin@uni.edu', role='admin', password='password123')
+    session_db.add(admin)
+    for i in range(5):
+        session_db.add(User(name=f'Student {i}', email=f's{i}@uni.edu', role='student', password='password123'))
+    for i in range(3):
+        session_db.add(Course(code=f'CS10{i}', name=f'Course {i}'))
+    session_db.commit()
+    return admin.id
+
+
+class TestMemoryProfile:
+    """Tests for the tracemalloc endpoint memory profiler"""
+    
+    def test_profiles_page_and_identity_map(self, app, people):
+        """Test that a rendered page reports peak memory and the ORM objects it held"""
+        student_id = User.query.filter_by(role='student').first().id
+        results = memory_profile.run(app, {'search': ('student', student_id, '/student/search?keyword=')},
+                                     repeat=5, log=lambda *a: None)
+        
+        result = results['search']
+        assert result['status'] == 200
+        assert result['peak_bytes'] > 0
+        # The courses are read-model rows; only the logged-in student is an entity
+        assert result['identity_map'] == {'Student': 1}
+        assert result['top_sites']
+        assert not result['leak']
+    
+    def test_streamed_page_holds_no_rows(self, app, people):
+        """Test that a streamed listing has loaded no rows when its template starts"""
+        results = memory_profile.run(app, {'people': ('admin', people, '/admin/searchpeople')},
+                                     repeat=5, log=lambda *a: None)
+        
+        result = results['people']
+        assert result['status'] == 200
+        assert result['bytes'] > 0
+        assert result['identity_map'] == {}
+        assert not result['leak']
+    
+    def test_detects_leak_across_requests(self, app, people):
+        """Test that memory retained by every request is flagged as a leak"""
+        @app.route('/leaky')
+        def leaky():
+            _retained.append(bytearray(16 * 1024))
+            return 'ok'
+        
+        try:
+            results = memory_profile.run(app, {'leaky': ('admin', people, '/leaky')},
+                                         repeat=5, log=lambda *a: None)
+        finally:
+            _retained.clear()
+        
+        result = results['leaky']
+        assert result['leak']
+        assert result['growth_per_request'] >= 16 * 1024
+        assert any('tests/test_memory_profile.py' in site['site'] for site in result['leak_sites'])
@@ -0,0 +1,197 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import metrics
+from configtest import log_in, make_app  # noqa: F401 (make_app is a fixture)
+from metrics import Exporter, registry
+from models.user import User
+
+
+USERS = [
+    {'id': 1, 'name': 'Sam Student', 'email': 'sam@uni.edu', 'password_hash': 'x', 'role': 'student'},
+    {'id': 2, 'name': 'Ada Admin', 'email': 'ada@uni.edu', 'password_hash': 'x', 'role': 'admin'},
+]
+
+
+def fetch(client, url, **kwargs):
+    """Body of a GET; closing the response records it, as a WSGI server would"""
+    with client.get(url, **kwargs) as response:
+        return response.data
+
+
+def value(name, **labels):
+    """Total of one series in this process"""
+    return registry.snapshot().get((name, tuple(labels.items())))
+
+
+@pytest.fixture
+def app(make_app):
+    registry.clear()
+    yield make_app(rows=[(User, USERS)], METRICS_TOKEN='scrape-token')
+    registry.clear()
+
+
+@pytest.fixture
+def scrape(app):
+    client = app.test_client()
+    return lambda: client.get('/metrics', headers={'Authorization': 'Bearer scrape-token'}).text
+
+
+class TestRequestMetrics:
+    """Tests for the per-endpoint request metrics"""
+
+    def test_counts_latency_size_and_db_time(self, app):
+        """Test that a request is counted with its status, duration, size and queries"""
+        client = app.test_client()
+        log_in(client, 1, 'student')
+
+        body = fetch(client, '/student/dashboard')
+        fetch(client, '/student/dashboard')
+
+        assert value('http_requests_total', endpoint='student.dashboard', method='GET', status='200') == 2
+        latency = value('http_request_duration_seconds', endpoint='student.dashboard', method='GET')
+        assert sum(latency[:-1]) == 2 and latency[-1] > 0
+        size = value('http_response_size_bytes', endpoint='student.dashboard')
+        assert size[-1] == 2 * len(body)
+        assert value('db_queries_total', endpoint='student.dashboard') > 0
+        assert value('db_request_duration_seconds', endpoint='student.dashboard')[-1] > 0
+
+    def test_status_codes_and_unmatched(self, app):
+        """Test that redirects and 404s are labelled by status, unknown URLs as unmatched"""
+        client = app.test_client()
+        fetch(client, '/student/dashboard')
+        fetch(client, '/no/such/page')
+
+        assert value('http_requests_total', endpoint='student.dashboard', method='GET', status='302') == 1
+        assert value('http_requests_total', endpoint='unmatched', method='GET', status='404') == 1
+
+    def test_streamed_size(self, app):
+        """Test that a streamed page is measured to its last byte"""
+        client = app.test_client()
+        log_in(client, 2, 'admin')
+
+        body = fetch(client, '/admin/searchpeople?search=')
+
+        assert value('http_response_size_bytes', endpoint='admin.searchpeople')[-1] == len(body)
+
+    def test_threads_do_not_lose_counts(self):
+        """Test that per-thread shards add up exactly under concurrent updates"""
+        registry.clear()
+        labels = (('endpoint', 'test'),)
+
+        def work():
+            for _ in range(10000):
+                registry.inc('db_queries_total', labels)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert registry.snapshot()[('db_queries_total', labels)] == 80000
+        registry.clear()
+
+    def test_exited_threads_folded(self):
+        """Test that the shards of exited threads are merged rather than kept (a thread per request)"""
+        registry.clear()
+        labels = (('endpoint', 'test'),)
+        for _ in range(300):
+            thread = threading.Thread(target=registry.observe, args=('db_request_duration_seconds', labels, 0.002))
+            thread.start()
+            thread.join()
+
+        histogram = registry.snapshot()[('db_request_duration_seconds', labels)]
+
+        assert sum(histogram[:-1]) == 300
+        assert len(registry._shards) <= 2
+        registry.clear()
+
+
+class TestExposition:
+    """Tests for the /metrics endpoint and text format"""
+
+    def test_requires_token_or_admin(self, app):
+        """Test that only the scrape token or an admin session can read the metrics"""
+        client = app.test_client()
+
+        assert client.get('/metrics').status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer scrape-token'}).status_code == 200
+        log_in(client, 2, 'admin')
+        assert client.get('/metrics').status_code == 200
+
+    def test_text_format(self, app, scrape):
+        """Test that histograms are exported with cumulative buckets, sum and count"""
+        client = app.test_client()
+        fetch(client, '/login')
+        fetch(client, '/login')
+
+        text = scrape()
+
+        assert '# TYPE http_request_duration_seconds histogram' in text
+        assert 'http_requests_total{endpoint="auth.login",method="GET",status="200"} 2' in text
+        assert 'http_request_duration_seconds_bucket{endpoint="auth.login",method="GET",le="+Inf"} 2' in text
+        assert 'http_request_duration_seconds_count{endpoint="auth.login",method="GET"} 2' in text
+        buckets = [int(line.rsplit(' ', 1)[1]) for line in text.splitlines()
+                   if line.startswith('http_response_size_bytes_bucket{endpoint="auth.login"')]
+        assert buckets == sorted(buckets) and buckets[-1] == 2
+
+    def test_label_escaping(self):
+        """Test that quotes, backslashes and newlines in labels are escaped"""
+        text = metrics.render({('db_queries_total', (('endpoint', 'a"b\\c\nd'),)): 1})
+
+        assert 'db_queries_total{endpoint="a\\"b\\\\c\\nd"} 1' in text
+
+
+def _child(directory):
+    registry.clear()
+    registry.inc('db_queries_total', (('endpoint', 'child'),), 5)
+    Exporter(directory).flush()
+
+
+class TestMultiprocess:
+    """Tests for aggregating worker processes through METRICS_DIR"""
+
+    def test_sums_processes_and_folds_exited(self, tmp_path):
+        """Test that a scrape adds every worker's file and archives those of exited workers"""
+        registry.clear()
+        directory = str(tmp_path)
+        labels = (('endpoint', 'child'),)
+        context = multiprocessing.get_context('fork')
+        for _ in range(2):
+            child = context.Process(target=_child, args=(directory,))
+            child.start()
+            child.join()
+        registry.inc('db_queries_total', labels, 1)
+
+        totals = Exporter(directory).collect()
+
+        assert totals[('db_queries_total', labels)] == 11
+        files = sorted(os.listdir(directory))
+        assert metrics.ARCHIVE in files
+        assert f'metrics-{os.getpid()}.json' in files
+        assert len([name for name in files if name.startswith('metrics-') and name[8].isdigit()]) == 1
+        # Archived totals are still counted
+        assert Exporter(directory).collect()[('db_queries_total', labels)] == 11
+        registry.clear()
+
+    def test_live_workers_not_archived(self, tmp_path):
+        """Test that the file of a running worker is kept as is"""
+        worker = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+        try:
+            metrics._write(str(tmp_path / f'metrics-{worker.pid}.json'),
+                           {('db_queries_total', (('endpoint', 'w'),)): 3})
+
+            totals = Exporter(str(tmp_path)).collect()
+
+            assert totals[('db_queries_total', (('endpoint', 'w'),))] == 3
+            assert os.path.exists(tmp_path / f'metrics-{worker.pid}.json')
+        finally:
+            worker.kill()
+            worker.wait()
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import create_engine, text
+from models.user import User
+from models.courses import Course
+from models.enrollment import Enrollment
+from models.assignment import Assignment
+from models.announcement import Announcement
+from models.submission import Submission
+from migrations import runner
+from extensions import db
+
+class TestMigrations:
+    """Tests for the schema migration runner"""
+    
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+        db.metadata.create_all(engine)
+        yield engine
+        engine.dispose()
+    
+    def test_upgrade_records_versions(self, engine):
+        """Test that upgrade applies every migration once"""
+        applied = runner.upgrade(engine, log=lambda message: None)
+        assert applied == [m.version for m in runner.load_migrations()]
+        assert all(done for _, _, done in runner.status(engine))
+        # Second run is a no-op
+        assert runner.upgrade(engine, log=lambda message: None) == []
+    
+    def test_upgrade_to_target(self, engine):
+        """Test stopping at a target version"""
+        assert runner.upgrade(engine, target=1, log=lambda message: None) == [1]
+        pending = [version for version, _, done in runner.status(engine) if not done]
+        assert 1 not in pending and pending
+    
+    def test_indexes_created_idempotently(self, engine):
+        """Test that missing hot-path indexes are (re)created and used"""
+        with engine.begin() as conn:
+            assert runner.drop_index_if_exists(conn, 'ix_enrollments_course_id', 'enrollments')
+            assert not runner.index_exists(conn, 'enrollments', 'ix_enrollments_course_id')
+        
+        runner.upgrade(engine, log=lambda message: None)
+        
+        with engine.connect() as conn:
+            assert runner.index_exists(conn, 'enrollments', 'ix_enrollments_course_id')
+            plan = conn.execute(text(
+                "EXPLAIN QUERY PLAN SELECT * FROM enrollments WHERE course_id = 1"
+            )).fetchall()
+            assert 'ix_enrollments_course_id' in plan[0][-1]
+    
+    def test_adds_and_backfills_assignment_stats(self, engine):
+        """Test that the aggregate columns are added and backfilled on an old schema"""
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE assignments"))
+            conn.execute(text(
+                "CREATE TABLE assignments (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, "
+                "description TEXT, due_date DATETIME NOT NULL, created_at DATETIME, course_id INTEGER NOT NULL)"
+            ))
+            conn.execute(text("INSERT INTO assignments (id, title, due_date, course_id) VALUES (1, 'HW', '2030-01-01', 1)"))
+            conn.execute(text(
+                "INSERT INTO submissions (submission_text, grade, assignment_id, student_id) "
+                "VALUES ('a', 80, 1, 1), ('b', NULL, 1, 2)"
+            ))
+        
+        runner.upgrade(engine, log=lambda message: None)
+        
+        with engine.connect() as conn:
+            row = conn.execute(text(
+                "SELECT submission_count, graded_count, grade_sum, grade_sum_sq FROM assignments WHERE id = 1"
+            )).one()
+        assert tuple(row) == (2, 1, 80.0, 6400.0)
@@ -0,0 +1,40 @@
+import pytest
+
+from benchmarks import model_benchmark
+
+
+class TestModelBenchmark:
+    """Tests for the micro-benchmark statistics and baseline comparison"""
+    
+    def test_summarize_percentiles(self):
+        """Test ops/sec and nearest-rank percentiles from per-op timings"""
+        timings = [i / 1000.0 for i in range(1, 101)]  # 1ms .. 100ms
+        
+        result = model_benchmark.summarize(timings)
+        
+        assert result['iterations'] == 100
+        assert result['p50_ms'] == pytest.approx(50)
+        assert result['p95_ms'] == pytest.approx(95)
+        assert result['p99_ms'] == pytest.approx(99)
+        assert result['ops_per_sec'] == pytest.approx(100 / sum(timings))
+    
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        """Test that only slowdowns larger than the tolerance are reported"""
+        baseline = {'results': {'1000x50': {
+            'search_courses': {'ops_per_sec': 1000.0, 'p50_ms': 1.0},
+            'course_to_dict': {'ops_per_sec': 2000.0, 'p50_ms': 0.5},
+        }}}
+        current = {'results': {'1000x50': {
+            'search_courses': {'ops_per_sec': 950.0, 'p50_ms': 1.1},
+            'course_to_dict': {'ops_per_sec': 1000.0, 'p50_ms': 1.0},
+            'view_grades': {'ops_per_sec': 10.0, 'p50_ms': 100.0},
+        }}}
+        
+        regressions = model_benchmark.compare(baseline, current, tolerance=0.2)
+        
+        assert {(name, metric) for _, name, metric, _, _ in regressions} == {
+            ('course_to_dict', 'p50_ms'), ('course_to_dict', 'ops_per_sec')}
+    
+    def test_parse_sizes(self):
+        """Test parsing of the --sizes argument"""
+        assert model_benchmark.parse_sizes('1000x50,10000X500') == [(1000, 50), (10000, 500)]
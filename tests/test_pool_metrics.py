@@ -0,0 +1,184 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+import pool_metrics
+from configtest import log_in, make_app  # noqa: F401 (make_app is a fixture)
+from extensions import db
+from pool_metrics import PoolStats, TimedQueuePool
+
+
+def stats_of(app, name='primary'):
+    return app.extensions['pool_stats'][name][1]
+
+
+class TestPoolMetrics:
+    """Tests for the connection pool counters"""
+
+    def test_queue_pools_are_timed(self, make_app):
+        """Test that QueuePool engines get TimedQueuePool and other pools are left alone"""
+        app = make_app(POOL_SIZE=3)
+        with app.app_context():
+            assert isinstance(db.engine.pool, TimedQueuePool)
+            assert db.engine.pool.size() == 3
+
+        memory = make_app('sqlite:///:memory:')
+        with memory.app_context():
+            assert not isinstance(db.engine.pool, TimedQueuePool)
+        assert 'primary' in memory.extensions['pool_stats']
+
+    def test_checkouts_and_concurrency(self, make_app):
+        """Test that checkouts, new connections and connections in use are counted"""
+        app = make_app()
+        with app.app_context():
+            first = db.engine.connect()
+            second = db.engine.connect()
+            second.close()
+            first.close()
+
+        stats = stats_of(app).snapshot()
+        assert stats['checkouts'] == 2
+        assert stats['connects'] == 2
+        assert stats['peak_in_use'] == 2
+        assert stats['in_use'] == 0
+
+    def test_wait_and_timeout(self, make_app):
+        """Test that a checkout from an exhausted pool is timed and its timeout counted"""
+        app = make_app(SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 1, 'max_overflow': 0, 'pool_timeout': 1})
+        with app.app_context():
+            held = db.engine.connect()
+            with pytest.raises(PoolTimeout):
+                db.engine.connect()
+            held.close()
+
+        stats = stats_of(app).snapshot()
+        assert stats['timeouts'] == 1
+        assert stats['waits'] >= 1
+        assert stats['wait_ms_max'] >= 1000
+
+    def test_pre_ping_failures(self, make_app):
+        """Test that a pooled connection failing its pre-ping is counted and replaced"""
+        app = make_app(SQLALCHEMY_ENGINE_OPTIONS={'pool_pre_ping': True})
+        with app.app_context():
+            with db.engine.connect() as conn:
+                dbapi_connection = conn.connection.dbapi_connection
+            # Dies while idle in the pool
+            dbapi_connection.close()
+            with db.engine.connect() as conn:
+                assert conn.execute(text('SELECT 1')).scalar() == 1
+
+        stats = stats_of(app).snapshot()
+        assert stats['pre_ping_failures'] == 1
+        assert stats['invalidations'] >= 1
+        assert stats['connects'] == 2
+
+    def test_stats_survive_dispose(self, make_app):
+        """Test that checkout timing carries over when the pool is recreated after a fork"""
+        app = make_app()
+        with app.app_context():
+            db.engine.dispose(close=False)
+            with db.engine.connect():
+                pass
+
+        stats = stats_of(app).snapshot()
+        assert stats['checkouts'] == 1
+        assert stats['wait_ms_total'] > 0
+
+
+class TestLiveness:
+    """Tests for background liveness checks instead of pre-ping"""
+
+    def test_liveness_mode_disables_pre_ping(self, make_app):
+        """Test that a liveness interval turns off pre-ping and schedules the probe"""
+        app = make_app(SQLALCHEMY_ENGINE_OPTIONS={'pool_pre_ping': True}, POOL_LIVENESS_INTERVAL=3600)
+        with app.app_context():
+            assert not db.engine.pool._pre_ping
+        assert 'pool-liveness' in [job.name for job in app.extensions['scheduled_jobs']]
+
+    def test_probe(self, tmp_path, make_app):
+        """Test that the probe passes on a live database and counts failures on a dead one"""
+        app = make_app()
+        with app.app_context():
+            assert pool_metrics.check_liveness() == []
+
+        dead = make_app(f"sqlite:///{tmp_path / 'missing' / 'pool.db'}")
+        with dead.app_context():
+            assert pool_metrics.check_liveness() == ['primary']
+        assert stats_of(dead).snapshot()['liveness_failures'] == 1
+
+
+class TestSizing:
+    """Tests for the pool size suggestions"""
+
+    def test_suggestion_follows_observed_concurrency(self):
+        """Test that pool_size covers p99 of connections in use and overflow the peak"""
+        stats = PoolStats()
+        stats.in_use_at_checkout.update({1: 90, 2: 9, 3: 1})
+        stats.peak_in_use = 3
+        stats.checkouts = 100
+
+        sizing = pool_metrics.sizing(stats, threads=4)
+
+        assert sizing['p99_in_use'] == 2
+        assert sizing['suggested_pool_size'] == 2
+        assert sizing['suggested_max_overflow'] == 1
+
+    def test_suggestion_capped_by_threads(self):
+        """Test that a worker is never told to hold more connections than it can use"""
+        stats = PoolStats()
+        stats.in_use_at_checkout.update({8: 100})
+        stats.peak_in_use = 12
+
+        sizing = pool_metrics.sizing(stats, threads=4, jobs=1)
+
+        assert sizing['suggested_pool_size'] == 5
+        assert sizing['suggested_max_overflow'] == 0
+
+    def test_concurrent_checkouts_counted_exactly(self, make_app):
+        """Test that counters stay exact under concurrent checkouts"""
+        app = make_app(SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 4, 'max_overflow': 0})
+
+        def work():
+            with app.app_context():
+                for _ in range(50):
+                    with db.engine.connect():
+                        pass
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = stats_of(app)
+        assert stats.checkouts == 200
+        assert stats.in_use == 0
+        assert 1 <= stats.peak_in_use <= 4
+
+
+class TestPoolEndpoint:
+    """Tests for the admin pool report"""
+
+    def test_admin_sees_report(self, make_app):
+        """Test that admins get the report and can reset the counters"""
+        app = make_app()
+        client = app.test_client()
+        log_in(client, 1, 'admin')
+
+        report = client.get('/admin/pool').get_json()
+        primary = report['engines']['primary']
+        assert primary['pool'] == 'TimedQueuePool'
+        assert {'size', 'checked_out', 'overflow', 'wait_ms_max', 'pre_ping_failures', 'sizing'} <= set(primary)
+
+        reset = client.post('/admin/pool/reset').get_json()
+        assert reset['engines']['primary']['checkouts'] == 0
+
+    def test_others_redirected(self, make_app):
+        """Test that non-admins cannot read the report"""
+        app = make_app()
+        client = app.test_client()
+        log_in(client, 2, 'student')
+
+        assert client.get('/admin/pool').status_code == 302
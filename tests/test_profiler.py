@@ -0,0 +1,188 @@
+import os
+import threading
+import time
+
+import pytest
+
+import profiler
+from benchmarks import profiler_benchmark
+from configtest import log_in, make_app  # noqa: F401 (make_app is a fixture)
+from profiler import Sampler
+
+
+def profile_settings(profile_dir, **settings):
+    """Settings for an app profiling into profile_dir, on an in-memory database"""
+    return {'url': 'sqlite:///:memory:', 'PROFILER_ENABLED': True, 'PROFILE_DIR': str(profile_dir),
+            'PROFILE_INTERVAL': 0.001, **settings}
+
+
+def wait_until(check, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not check():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    return make_app(**profile_settings(tmp_path))
+
+
+class TestSampler:
+    """Tests for stack sampling and the collapsed-stack format"""
+
+    def test_samples_busy_thread_only(self):
+        """Test that a running thread is sampled and an idle one is skipped"""
+        idle = threading.Event()
+        waiter = threading.Thread(target=idle.wait)
+        waiter.start()
+        sampler = Sampler(0.001).start()
+        busy_loop(0.1)
+        stacks = sampler.stop()
+        idle.set()
+        waiter.join()
+
+        text = profiler.collapse(stacks)
+        assert 'busy_loop (app:tests/test_profiler.py:' in text
+        assert 'wait (threading.py' not in text
+        assert sampler.samples > 0
+
+    def test_collapsed_round_trip(self, tmp_path):
+        """Test that collapsed lines are root-first, heaviest first and read back"""
+        sampler = Sampler(0.001, {threading.get_ident()}).start()
+        busy_loop(0.1)
+        stacks = sampler.stop()
+        path = tmp_path / 'loop.folded'
+        path.write_text(profiler.collapse(stacks))
+
+        lines = profiler.read_collapsed(path)
+        assert sum(count for _, count in lines) == sum(stacks.values())
+        counts = [count for _, count in lines]
+        assert counts == sorted(counts, reverse=True)
+        assert lines[0][0][-1].startswith(('busy_loop', 'perf_counter'))
+
+    def test_summary_categories(self):
+        """Test that samples are attributed to the innermost known component"""
+        stacks = [
+            (['wsgi_app (flask/app.py:1)', 'view (app:controllers/x.py:1)', 'render (jinja2/environment.py:1)'], 6),
+            (['wsgi_app (flask/app.py:1)', 'view (app:controllers/x.py:1)', 'execute (sqlalchemy/orm/session.py:1)'], 3),
+            (['login (app:models/user.py:1)', 'check_password_hash (werkzeug/security.py:1)'], 1),
+        ]
+
+        assert profiler.summary(stacks) == {'templates': 0.6, 'sqlalchemy': 0.3, 'password hashing': 0.1}
+        assert profiler.summary([]) == {}
+
+
+class TestRequestProfile:
+    """Tests for profiling a single request with the X-Profile header"""
+
+    def test_admin_request_is_profiled(self, app, tmp_path):
+        """Test that an admin request with X-Profile writes a profile named in the response"""
+        client = app.test_client()
+        log_in(client, 1, 'admin')
+
+        with client.get('/admin/dashboard', headers={'X-Profile': '1'}) as response:
+            name = response.headers['X-Profile-File']
+
+        assert name.endswith('.folded') and 'admin.dashboard' in name
+        assert os.path.exists(tmp_path / name)
+        index = client.get('/admin/profiles').get_json()
+        assert [entry['name'] for entry in index['profiles']] == [name]
+        assert not index['running']
+        download = client.get(f'/admin/profiles/{name}')
+        assert download.status_code == 200
+        assert download.data == (tmp_path / name).read_bytes()
+
+    def test_header_ignored_for_others(self, app, tmp_path):
+        """Test that the header does nothing without an admin session"""
+        client = app.test_client()
+        log_in(client, 2, 'student')
+
+        with client.get('/login', headers={'X-Profile': '1'}) as response:
+            assert 'X-Profile-File' not in response.headers
+        assert os.listdir(tmp_path) == []
+
+    def test_one_profile_at_a_time(self, app):
+        """Test that a request arriving during a window is reported busy"""
+        client = app.test_client()
+        log_in(client, 1, 'admin')
+        window = client.post('/admin/profiles/window', data={'seconds': '0.3'})
+        assert window.status_code == 202
+
+        with client.get('/admin/dashboard', headers={'X-Profile': '1'}) as response:
+            assert response.headers['X-Profile-File'] == 'busy'
+        assert client.post('/admin/profiles/window', data={'seconds': '1'}).status_code == 409
+
+        wait_until(lambda: not profiler._busy.locked())
+
+    def test_keeps_newest(self, tmp_path, make_app):
+        """Test that only the newest PROFILE_KEEP profiles are kept"""
+        app = make_app(**profile_settings(tmp_path, PROFILE_KEEP=2))
+        client = app.test_client()
+        log_in(client, 1, 'admin')
+
+        for _ in range(3):
+            client.get('/admin/dashboard', headers={'X-Profile': '1'}).close()
+            time.sleep(0.01)
+
+        assert len(os.listdir(tmp_path)) == 2
+
+
+class TestWindowProfile:
+    """Tests for profiling a worker for a time window"""
+
+    def test_window_writes_profile(self, app, tmp_path):
+        """Test that a window samples other threads and writes its profile when it ends"""
+        client = app.test_client()
+        log_in(client, 1, 'admin')
+        worker = threading.Thread(target=busy_loop, args=(0.3,))
+        worker.start()
+
+        response = client.post('/admin/profiles/window', data={'seconds': '0.2'})
+        name = response.get_json()['name']
+        worker.join()
+        wait_until(lambda: os.path.exists(tmp_path / name) and not profiler._busy.locked())
+
+        assert response.status_code == 202
+        assert 'busy_loop' in (tmp_path / name).read_text()
+
+    def test_window_capped(self, tmp_path, make_app):
+        """Test that the window length is capped by PROFILE_MAX_SECONDS"""
+        app = make_app(**profile_settings(tmp_path, PROFILE_MAX_SECONDS=0.05))
+        client = app.test_client()
+        log_in(client, 1, 'admin')
+
+        response = client.post('/admin/profiles/window', data={'seconds': '3600'})
+
+        assert response.get_json()['seconds'] == 0.05
+        wait_until(lambda: not profiler._busy.locked())
+
+    def test_disabled(self, tmp_path, make_app):
+        """Test that with PROFILER_ENABLED off no hook is installed and the pages are gone"""
+        app = make_app(**profile_settings(tmp_path, PROFILER_ENABLED=False))
+        client = app.test_client()
+        log_in(client, 1, 'admin')
+
+        assert profiler._start_request_profile not in app.before_request_funcs.get(None, [])
+        with client.get('/admin/dashboard', headers={'X-Profile': '1'}) as response:
+            assert 'X-Profile-File' not in response.headers
+        assert client.get('/admin/profiles').status_code == 404
+        assert client.post('/admin/profiles/window', data={'seconds': '1'}).status_code == 404
+
+
+class TestBenchmark:
+    """Tests for the profiler overhead benchmark"""
+
+    def test_reports_each_workload(self):
+        """Test that the benchmark reports off and armed times for every workload"""
+        results = profiler_benchmark.run(requests=2, rounds=1, interval=0.001, log=lambda line: None)
+
+        assert set(results) == {'login_page', 'python_loop'}
+        for result in results.values():
+            assert result['off_ms'] > 0 and result['armed_ms'] > 0
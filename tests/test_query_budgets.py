@@ -0,0 +1,227 @@
+import pytest
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+
+from app import load_blueprints
+from models.user import User
+from models.courses import Course
+from models.enrollment import Enrollment
+from models.assignment import Assignment
+from models.announcement import Announcement
+from models.submission import Submission
+
+# Data size the budgets below hold at: every course has ASSIGNMENTS_PER_COURSE
+# assignments; the student is enrolled in ENROLLED courses and has a graded
+# submission for each of their assignments.
+STUDENTS = 20
+COURSES = 5
+ENROLLED = 3
+ASSIGNMENTS_PER_COURSE = 4
+ANNOUNCEMENTS_PER_COURSE = 2
+
+STUDENT_ID, TA_ID, INSTRUCTOR_ID, ADMIN_ID = 1, 2, 3, 4
+OTHER_STUDENT_ID = 5
+COURSE_ID, OPEN_COURSE_ID = 1, COURSES
+ASSIGNMENT_ID = SUBMISSION_ID = 1
+PASSWORD = 'password123'
+
+# (endpoint, method, path, role, form, max queries)
+BUDGETS = [
+    ('auth.login', 'GET', '/login', None, None, 0),
+    ('auth.login', 'POST', '/login', None, {'email': 'student1@uni.edu', 'password': PASSWORD}, 1),
+    ('auth.logout', 'GET', '/logout', 'student', None, 0),
+
+    ('student.dashboard', 'GET', '/student/dashboard', 'student', None, 3),
+    ('student.view_courses', 'GET', '/student/courses', 'student', None, 2),
+    ('student.search_courses', 'GET', '/student/search?keyword=Course', 'student', None, 3),
+    ('student.enroll_course', 'GET', f'/student/enroll/{OPEN_COURSE_ID}', 'student', None, 5),
+    ('student.drop_course', 'GET', f'/student/drop/{COURSE_ID}', 'student', None, 5),
+    # Assignment status is still looked up per assignment (two queries each)
+    ('student.view_course', 'GET', f'/student/course/{COURSE_ID}', 'student', None, 3 + 2 * ASSIGNMENTS_PER_COURSE),
+    ('student.view_announcements', 'GET', f'/student/course/{COURSE_ID}/announcements', 'student', None, 5),
+    ('student.view_assignments', 'GET', f'/student/course/{COURSE_ID}/assignments', 'student', None,
+     4 + 3 * ASSIGNMENTS_PER_COURSE),
+    ('student.submit_assignment', 'GET', f'/student/assignment/{ASSIGNMENT_ID}/submit', 'student', None, 4),
+    ('student.submit_assignment', 'POST', f'/student/assignment/{ASSIGNMENT_ID}/submit', 'student',
+     {'submission_text': 'Resubmitted answer'}, 6),
+    ('student.view_grades', 'GET', '/student/grades', 'student', None, 2),
+    ('student.view_schedule', 'GET', '/student/schedule', 'student', None, 2),
+
+    ('ta.dashboard', 'GET', '/ta/dashboard', 'ta', None, 2),
+    ('ta.search_course', 'GET', '/ta/search_course', 'ta', None, 0),
+    ('ta.search_course', 'POST', '/ta/search_course', 'ta', {'query': 'Course'}, 1),
+    ('ta.search_student', 'GET', '/ta/search_student', 'ta', None, 0),
+    ('ta.search_student', 'POST', '/ta/search_student', 'ta', {'query': 'Student'}, 1),
+    ('ta.course_details', 'GET', f'/ta/course/{COURSE_ID}', 'ta', None, 3),
+    ('ta.add_assignment', 'POST', f'/ta/course/{COURSE_ID}/add_assignment', 'ta',
+     {'title': 'Extra', 'description': 'Extra work', 'due_date': '2030-01-01'}, 3),
+    ('ta.add_announcement', 'POST', f'/ta/course/{COURSE_ID}/add_announcement', 'ta',
+     {'title': 'Note', 'content': 'Room change'}, 3),
+    ('ta.attendance', 'GET', f'/ta/course/{COURSE_ID}/attendance', 'ta', None, 3),
+    ('ta.attendance', 'POST', f'/ta/course/{COURSE_ID}/attendance', 'ta', {'present': str(STUDENT_ID)}, 3),
+    ('ta.view_submissions', 'GET', f'/ta/assignment/{ASSIGNMENT_ID}/submissions', 'ta', None, 4),
+    ('ta.submit_grade', 'POST', f'/ta/submission/{SUBMISSION_ID}/grade', 'ta', {'grade': '88', 'feedback': 'Ok'}, 7),
+    ('ta.view_student', 'GET', f'/ta/student/{STUDENT_ID}', 'ta', None, 2),
+    ('ta.enroll_student', 'GET', f'/ta/course/{COURSE_ID}/enroll_student/{OTHER_STUDENT_ID}', 'ta', None, 4),
+
+    ('admin.dashboard', 'GET', '/admin/dashboard', 'admin', None, 0),
+    # One instructor/TA lookup per distinct staff member on the results page
+    ('admin.searchcourse', 'GET', '/admin/searchcourse?search=Course', 'admin', None, 1),
+    ('admin.view_course', 'GET', f'/admin/viewcourse/{COURSE_ID}', 'admin', None, 4),
+    ('admin.searchpeople', 'GET', '/admin/searchpeople?search=Student', 'admin', None, 1),
+    ('admin.add_person', 'GET', '/admin/addperson', 'admin', None, 0),
+    ('admin.add_person', 'POST', '/admin/addperson', 'admin',
+     {'name': 'New Person', 'email': 'new@uni.edu', 'password': PASSWORD, 'role': 'student'}, 2),
+    ('admin.edit_person', 'GET', f'/admin/editperson/{STUDENT_ID}', 'admin', None, 1),
+    ('admin.edit_person', 'POST', f'/admin/editperson/{STUDENT_ID}', 'admin', {'name': 'Renamed'}, 2),
+    ('admin.edit_course', 'GET', f'/admin/editcourse/{COURSE_ID}', 'admin', None, 3),
+    ('admin.edit_course', 'POST', f'/admin/editcourse/{COURSE_ID}', 'admin', {'name': 'Renamed course'}, 3),
+    ('admin.delete_person', 'GET', f'/admin/deleteperson/{OTHER_STUDENT_ID}', 'admin', None, 10),
+    ('admin.delete_course', 'GET', f'/admin/deletecourse/{OPEN_COURSE_ID}', 'admin', None, 5),
+    ('admin.drop_student', 'GET', f'/admin/dropstudent/{COURSE_ID}/{STUDENT_ID}', 'admin', None, 4),
+    ('admin.add_course', 'GET', '/admin/addcourse', 'admin', None, 2),
+    ('admin.add_course', 'POST', '/admin/addcourse', 'admin',
+     {'code': 'NEW101', 'name': 'New Course', 'instructor': str(INSTRUCTOR_ID), 'credits': '3', 'seats': '30'}, 2),
+    ('admin.pool_status', 'GET', '/admin/pool', 'admin', None, 0),
+    ('admin.reset_pool_stats', 'POST', '/admin/pool/reset', 'admin', None, 0),
+    ('admin.profiles', 'GET', '/admin/profiles', 'admin', None, 0),
+    ('admin.download_profile', 'GET', '/admin/profiles/missing.folded', 'admin', None, 0),
+    ('admin.profile_window', 'POST', '/admin/profiles/window', 'admin', {'seconds': '0.01'}, 0),
+    ('admin.querystats', 'GET', '/admin/querystats', 'admin', None, 0),
+    ('admin.reset_querystats', 'POST', '/admin/querystats/reset', 'admin', None, 0),
+    ('admin.access_log_status', 'GET', '/admin/accesslog', 'admin', None, 0),
+]
+
+BLUEPRINTS = ('auth', 'student', 'ta', 'admin')
+
+
+@pytest.fixture
+def seeded(app, session_db):
+    """University of the size the budgets are declared for, inserted in bulk"""
+    password_hash = generate_password_hash(PASSWORD, method='pbkdf2:sha256:1000')
+    now = datetime(2026, 9, 1, 9, 0, 0)
+    users = [
+        {'id': STUDENT_ID, 'name': 'Student 1', 'email': 'student1@uni.edu', 'role': 'student'},
+        {'id': TA_ID, 'name': 'Tara TA', 'email': 'ta@uni.edu', 'role': 'ta'},
+        {'id': INSTRUCTOR_ID, 'name': 'Ian Instructor', 'email': 'instructor@uni.edu', 'role': 'instructor'},
+        {'id': ADMIN_ID, 'name': 'Ada Admin', 'email': 'admin@uni.edu', 'role': 'admin'},
+    ]
+    users += [{'id': i, 'name': f'Student {i}', 'email': f'student{i}@uni.edu', 'role': 'student'}
+              for i in range(OTHER_STUDENT_ID, OTHER_STUDENT_ID + STUDENTS - 1)]
+    for user in users:
+        user.update(password_hash=password_hash, created_at=now)
+    session_db.execute(User.__table__.insert(), users)
+
+    session_db.execute(Course.__table__.insert(), [
+        {'id': c, 'code': f'CS{100 + c}', 'name': f'Course {c}', 'description': f'Course number {c}',
+         'credits': 3, 'max_seats': 30, 'seats_left': 30, 'schedule': 'Mon/Wed 9:00-10:00 AM',
+         'department': 'Computer Science', 'instructor_id': INSTRUCTOR_ID,
+         'ta_id': TA_ID if c == COURSE_ID else None}
+        for c in range(1, COURSES + 1)])
+
+    enrollments = [{'student_id': STUDENT_ID, 'course_id': c, 'enrolled_at': now} for c in range(1, ENROLLED + 1)]
+    enrollments += [{'student_id': s['id'], 'course_id': COURSE_ID, 'enrolled_at': now}
+                    for s in users[5:]]
+    session_db.execute(Enrollment.__table__.insert(), enrollments)
+    session_db.execute(Course.__table__.update().where(Course.id == COURSE_ID)
+                       .values(seats_left=30 - 1 - (STUDENTS - 2)))
+    for c in range(2, ENROLLED + 1):
+        session_db.execute(Course.__table__.update().where(Course.id == c).values(seats_left=29))
+
+    assignments, submissions = [], []
+    for c in range(1, COURSES + 1):
+        for n in range(ASSIGNMENTS_PER_COURSE):
+            assignment_id = len(assignments) + 1
+            graded = c <= ENROLLED
+            assignments.append({'id': assignment_id, 'title': f'Assignment {n + 1}', 'description': 'Do it',
+                                'due_date': now + timedelta(days=7 * (n + 1)), 'created_at': now,
+                                'course_id': c, 'submission_count': int(graded), 'graded_count': int(graded),
+                                'grade_sum': 80.0 if graded else 0.0, 'grade_sum_sq': 6400.0 if graded else 0.0})
+            if graded:
+                submissions.append({'id': len(submissions) + 1, 'submission_text': 'Answer', 'grade': 80.0,
+                                    'feedback': 'Good', 'submitted_at': now, 'assignment_id': assignment_id,
+                                    'student_id': STUDENT_ID})
+    session_db.execute(Assignment.__table__.insert(), assignments)
+    session_db.execute(Submission.__table__.insert(), submissions)
+    session_db.execute(Announcement.__table__.insert(), [
+        {'title': f'Update {n}', 'content': 'News', 'created_at': now, 'poster_id': TA_ID, 'course_id': c}
+        for c in range(1, COURSES + 1) for n in range(ANNOUNCEMENTS_PER_COURSE)])
+    session_db.commit()
+    session_db.remove()
+    return app
+
+
+ROLE_USERS = {'student': STUDENT_ID, 'ta': TA_ID, 'instructor': INSTRUCTOR_ID, 'admin': ADMIN_ID}
+
+
+class TestQueryBudgets:
+    """Tests that every route stays within its declared SQL query budget"""
+
+    @pytest.mark.parametrize('endpoint,method,path,role,form,limit', BUDGETS,
+                             ids=[f'{b[0]}-{b[1]}' for b in BUDGETS])
+    def test_route_within_budget(self, seeded, client, query_budget, endpoint, method, path, role, form, limit):
+        """Test that a request executes no more statements than its budget"""
+        if role:
+            with client.session_transaction() as sess:
+                sess['user_id'] = ROLE_USERS[role]
+                sess['role'] = role
+
+        with query_budget(limit, f'{method} {path}'):
+            response = client.open(path, method=method, data=form)
+
+        assert response.status_code < 500
+
+    def test_every_route_declares_a_budget(self, app):
+        """Test that new routes cannot be added without a query budget"""
+        load_blueprints(app)
+        declared = {(endpoint, method) for endpoint, method, *_ in BUDGETS}
+        missing = []
+        for rule in app.url_map.iter_rules():
+            if rule.endpoint.split('.')[0] not in BLUEPRINTS:
+                continue
+            for method in rule.methods - {'HEAD', 'OPTIONS'}:
+                if (rule.endpoint, method) not in declared:
+                    missing.append(f'{method} {rule.rule} ({rule.endpoint})')
+
+        assert not missing, 'Routes without a query budget: ' + ', '.join(sorted(missing))
+
+
+class TestQueryCounter:
+    """Tests for query_counter fingerprints and budget failures"""
+
+    def test_fingerprint_normalizes_literals(self):
+        """Test that the same query with different values has one fingerprint"""
+        from query_counter import fingerprint
+        
+        first = fingerprint("SELECT * FROM users WHERE id = 1 AND name = 'Ann'")
+        second = fingerprint("SELECT *  FROM users\n WHERE id = 42 AND name = 'O''Neil'")
+        
+        assert first == second == 'SELECT * FROM users WHERE id = ? AND name = ?'
+        assert fingerprint('SELECT id FROM courses WHERE id IN (?, ?, ?)') == \
+            'SELECT id FROM courses WHERE id IN (...)'
+
+    def test_budget_failure_lists_fingerprints(self, seeded, session_db, query_budget):
+        """Test that exceeding the budget reports the repeated statement"""
+        from query_counter import QueryBudgetExceeded
+        
+        with pytest.raises(QueryBudgetExceeded) as excinfo:
+            with query_budget(2, 'loop'):
+                for user_id in range(1, 4):
+                    session_db.get(User, user_id)
+        
+        message = str(excinfo.value)
+        assert 'loop executed 3 queries (budget 2)' in message
+        assert '3 x SELECT' in message
+
+    def test_grades_view_shows_graded_work(self, seeded, client):
+        """Test that the single-query grades view still lists every graded assignment"""
+        with client.session_transaction() as sess:
+            sess['user_id'] = STUDENT_ID
+            sess['role'] = 'student'
+        
+        response = client.get('/student/grades')
+        
+        assert response.status_code == 200
+        for c in range(1, ENROLLED + 1):
+            assert f'Course {c}'.encode() in response.data
+        assert response.data.count(b'Assignment ') == ENROLLED * ASSIGNMENTS_PER_COURSE
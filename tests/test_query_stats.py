@@ -0,0 +1,146 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from configtest import log_in, make_app  # noqa: F401 (make_app is a fixture)
+from extensions import db
+from models.user import User
+from query_stats import QueryStats, stats
+
+
+USERS = [{'id': i, 'name': f'User {i}', 'email': f'u{i}@uni.edu', 'password_hash': 'x', 'role': 'student'}
+         for i in range(1, 6)]
+
+
+def entry(fragment):
+    matches = [row for row in stats.rows() if fragment in row['query']]
+    assert len(matches) == 1, matches
+    return matches[0]
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(rows=[(User, USERS)])
+    stats.reset()
+    yield app
+    stats.reset()
+
+
+class TestQueryStats:
+    """Tests for the per-fingerprint query statistics"""
+
+    def test_same_query_with_different_values_is_one_entry(self, app):
+        """Test that executions differing only in values share a fingerprint"""
+        with app.app_context():
+            for user_id in (1, 2, 3):
+                db.session.get(User, user_id)
+                db.session.expunge_all()
+            db.session.execute(text("SELECT name FROM users WHERE email = 'u1@uni.edu'")).all()
+            db.session.execute(text("SELECT name FROM users WHERE email = 'u2@uni.edu'")).all()
+
+        by_id = entry('WHERE users.id = ?')
+        assert by_id['calls'] == 3
+        assert by_id['rows'] == 3
+        assert by_id['total_ms'] > 0 and by_id['max_ms'] >= by_id['mean_ms']
+        assert entry('WHERE email = ?')['calls'] == 2
+
+    def test_rows_fetched_and_affected(self, app):
+        """Test that SELECTs count rows read and DML counts rows affected"""
+        with app.app_context():
+            assert len(User.query.all()) == 5
+            db.session.execute(text('UPDATE users SET major = :major'), {'major': 'CS'})
+            db.session.commit()
+
+        assert entry('SELECT users.id')['rows'] == 5
+        assert entry('UPDATE users SET major')['rows'] == 5
+
+    def test_streamed_result_rows(self, app):
+        """Test that rows read in batches are all counted"""
+        with app.app_context():
+            result = db.session.execute(text('SELECT id FROM users').execution_options(yield_per=2))
+            assert len(list(result)) == 5
+
+        assert entry('SELECT id FROM users')['rows'] == 5
+
+    def test_bounded(self):
+        """Test that the table never holds more than max_entries fingerprints"""
+        table = QueryStats(max_entries=10)
+        for _ in range(3):
+            table.record('SELECT * FROM hot', 0.001)
+        for i in range(50):
+            table.record(f'SELECT * FROM table_{i}', 0.001)
+
+        assert len(table.entries) <= 10
+        assert table.evicted == 50 + 1 - len(table.entries)
+        assert 'SELECT * FROM hot' in table.entries
+
+    def test_sorting(self):
+        """Test that rows can be ordered by calls, mean time or total time"""
+        table = QueryStats()
+        for _ in range(4):
+            table.record('SELECT * FROM often', 0.001)
+        table.record('SELECT * FROM slow', 0.010)
+
+        assert table.rows('calls')[0]['query'] == 'SELECT * FROM often'
+        assert table.rows('mean')[0]['query'] == 'SELECT * FROM slow'
+        assert table.rows('total')[0]['share'] == pytest.approx(10 / 14, abs=1e-3)
+
+    def test_concurrent_updates(self):
+        """Test that counts stay exact under concurrent recording"""
+        table = QueryStats()
+
+        def work():
+            for _ in range(5000):
+                table.record('SELECT 1', 0.0001)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert table.rows()[0]['calls'] == 40000
+
+    def test_disabled(self, make_app):
+        """Test that nothing is recorded with QUERY_STATS_ENABLED off"""
+        app = make_app(rows=[(User, USERS)], QUERY_STATS_ENABLED=False)
+        stats.reset()
+        with app.app_context():
+            User.query.all()
+
+        assert stats.rows() == []
+
+    def test_one_timer_per_engine(self, make_app):
+        """Test that metrics, query stats and the slow-query log share one timing hook"""
+        app = make_app(SLOW_QUERY_MS=60000)
+        with app.app_context():
+            assert len(db.engine.dispatch.before_cursor_execute) == 1
+            assert len(db.engine.dispatch.after_cursor_execute) == 1
+
+
+class TestQueryStatsPage:
+    """Tests for the admin query statistics page"""
+
+    def test_page_and_reset(self, app):
+        """Test that admins see the heaviest statements and can reset them"""
+        client = app.test_client()
+        log_in(client, 1, 'admin')
+        with app.app_context():
+            User.query.all()
+
+        page = client.get('/admin/querystats?sort=calls')
+        assert page.status_code == 200
+        assert b'FROM users' in page.data
+
+        assert client.post('/admin/querystats/reset').status_code == 302
+        assert stats.rows() == []
+        assert client.get('/admin/querystats?sort=bogus').status_code == 200
+
+    def test_others_redirected(self, app):
+        """Test that non-admins cannot read the statistics"""
+        client = app.test_client()
+        log_in(client, 2, 'student')
+
+        assert client.get('/admin/querystats').status_code == 302
+        assert client.post('/admin/querystats/reset').status_code == 302
@@ -0,0 +1,91 @@
+import pytest
+
+from benchmarks import read_model_benchmark
+from extensions import db
+from models import read_models
+from models.courses import Course
+from models.enrollment import Enrollment
+from models.user import User
+
+
+@pytest.fixture
+def catalog(app, session_db):
+    """Two courses (one without staff), an instructor, a TA and enrolled students"""
+    instructor = User(name='Ian Instructor', email='ian@uni.edu', role='instructor')
+    ta = User(name='Tara TA', email='tara@uni.edu', role='ta')
+    students = [User(name=f'Student {i}', email=f's{i}@uni.edu', role='student') for i in range(3)]
+    session_db.add_all([instructor, ta] + students)
+    session_db.flush()
+    staffed = Course(code='CS101', name='Intro', instructor_id=instructor.id, ta_id=ta.id)
+    bare = Course(code='MATH200', name='Algebra')
+    session_db.add_all([staffed, bare])
+    session_db.flush()
+    for student in students[:2]:
+        session_db.add(Enrollment(student_id=student.id, course_id=staffed.id))
+    session_db.commit()
+    ids = {'staffed': staffed.id, 'bare': bare.id, 'instructor': instructor.id, 'ta': ta.id}
+    session_db.expunge_all()
+    return ids
+
+
+class TestReadModels:
+    """Tests for the column-only list read models"""
+
+    def test_people_match_orm_search(self, catalog):
+        """Test that search_people returns the same users and fields as User.search_users"""
+        rows = read_models.search_people('Student')
+        users = User.search_users('Student')
+
+        assert sorted(rows) == sorted(read_models.Person(u.id, u.name, u.email, u.role, u.major, u.level)
+                                      for u in users)
+
+    def test_courses_carry_staff_names(self, catalog):
+        """Test that course rows expose instructor and TA like the relationships do"""
+        rows = {row.code: row for row in read_models.search_courses('')}
+
+        staffed = rows['CS101']
+        assert staffed.id == catalog['staffed']
+        assert staffed.instructor == read_models.Staff(catalog['instructor'], 'Ian Instructor')
+        assert staffed.ta.name == 'Tara TA'
+        assert rows['MATH200'].instructor is None
+        assert rows['MATH200'].ta is None
+
+    def test_stream_matches_list(self, catalog):
+        """Test that the streamed variants yield the same rows as the list ones"""
+        assert list(read_models.stream_people('', batch_size=2)) == read_models.search_people('')
+        assert list(read_models.stream_courses('CS', batch_size=1)) == read_models.search_courses('CS')
+
+    def test_roster(self, catalog):
+        """Test that enrolled_students lists the students of one course only"""
+        rows = read_models.enrolled_students(catalog['staffed'])
+
+        assert sorted(row.name for row in rows) == ['Student 0', 'Student 1']
+        assert read_models.enrolled_students(catalog['bare']) == []
+
+    def test_rows_are_not_tracked(self, catalog):
+        """Test that loading read models adds nothing to the session"""
+        read_models.search_people('')
+        read_models.search_courses('')
+        read_models.enrolled_students(catalog['staffed'])
+
+        assert len(db.session.identity_map) == 0
+
+    def test_rows_are_compact(self, catalog):
+        """Test that rows have no per-instance dict"""
+        row = read_models.search_people('')[0]
+
+        assert not hasattr(row, '__dict__')
+
+
+class TestReadModelBenchmark:
+    """Tests for the ORM vs read model benchmark"""
+
+    def test_reports_every_case(self):
+        """Test that each list query is timed and measured both ways"""
+        results = read_model_benchmark.run(rows=50, min_time=0.01, log=lambda *a: None)
+
+        assert set(results) == {'people', 'courses', 'roster'}
+        for result in results.values():
+            assert result['orm']['rows'] == result['read_model']['rows'] >= 50
+            assert result['read_model']['p50_ms'] > 0
+            assert result['read_model']['held_bytes'] < result['orm']['held_bytes']
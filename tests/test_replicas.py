@@ -0,0 +1,114 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+import replicas
+from configtest import log_in, make_app  # noqa: F401 (make_app is a fixture)
+from extensions import db
+from models.courses import Course
+from models.enrollment import Enrollment
+from models.user import User
+
+COURSE_PAGE = '/student/course/1'
+
+
+def seed(url, course_name):
+    """A student enrolled in a course named after the database it lives in"""
+    engine = create_engine(url)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{'id': 1, 'name': 'Sam Student', 'email': 'sam@uni.edu',
+                                     'password_hash': 'x', 'role': 'student'}])
+        conn.execute(insert(Course), [{'id': 1, 'code': 'CS101', 'name': course_name, 'credits': 3,
+                                       'max_seats': 30, 'seats_left': 29}])
+        conn.execute(insert(Enrollment), [{'student_id': 1, 'course_id': 1}])
+    engine.dispose()
+
+
+@pytest.fixture
+def urls(tmp_path):
+    primary = f"sqlite:///{tmp_path / 'primary.db'}"
+    replica = f"sqlite:///{tmp_path / 'replica.db'}"
+    seed(primary, 'Primary Intro')
+    seed(replica, 'Replica Intro')
+    return primary, replica
+
+
+class TestReplicaRouting:
+    """Tests for sending GET view reads to a replica"""
+
+    def test_get_views_read_the_replica(self, urls, make_app):
+        """Test that a decorated GET view reads the replica"""
+        app = make_app(urls[0], SQLALCHEMY_REPLICA_URIS=[urls[1]])
+        client = app.test_client()
+        log_in(client)
+
+        page = client.get(COURSE_PAGE).text
+
+        assert 'Replica Intro' in page
+        assert 'Primary Intro' not in page
+        assert app.extensions['replicas'][0].reads > 0
+
+    def test_writes_go_to_the_primary_and_stick(self, urls, make_app):
+        """Test that dropping a course writes the primary and the user then reads the primary"""
+        primary, replica = urls
+        app = make_app(primary, SQLALCHEMY_REPLICA_URIS=[replica], REPLICA_STICKY_SECONDS=60)
+        client = app.test_client()
+        log_in(client)
+
+        client.get('/student/drop/1')
+
+        with app.app_context():
+            assert db.session.get(Course, 1).seats_left == 30
+        # The primary no longer has the enrollment; the (lagging) replica still does
+        assert client.get(COURSE_PAGE).status_code == 302
+        with client.session_transaction() as sess:
+            assert sess[replicas.STICKY_KEY] > time.time() + 50
+            sess[replicas.STICKY_KEY] = time.time() - 1
+        assert 'Replica Intro' in client.get(COURSE_PAGE).text
+
+    def test_unreachable_replica_falls_back(self, urls, tmp_path, make_app):
+        """Test that reads go to the primary when the replica is down"""
+        app = make_app(urls[0], SQLALCHEMY_REPLICA_URIS=[f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"])
+        client = app.test_client()
+        log_in(client)
+
+        response = client.get(COURSE_PAGE)
+
+        assert response.status_code == 200
+        assert 'Primary Intro' in response.text
+        assert not app.extensions['replicas'][0].healthy
+
+    def test_replica_failing_mid_request_reruns_on_primary(self, urls, tmp_path, make_app):
+        """Test that a view whose replica query fails is rerun against the primary"""
+        # Answers the health check but has no tables
+        app = make_app(urls[0], SQLALCHEMY_REPLICA_URIS=[f"sqlite:///{tmp_path / 'empty.db'}"])
+        client = app.test_client()
+        log_in(client)
+
+        response = client.get(COURSE_PAGE)
+
+        assert response.status_code == 200
+        assert 'Primary Intro' in response.text
+        assert not app.extensions['replicas'][0].healthy
+
+    def test_replica_rechecked_after_interval(self, urls, make_app):
+        """Test that a replica marked down is used again once a health check passes"""
+        app = make_app(urls[0], SQLALCHEMY_REPLICA_URIS=[urls[1]], REPLICA_HEALTH_INTERVAL=0)
+        replica = app.extensions['replicas'][0]
+        replica.mark_down('test')
+        client = app.test_client()
+        log_in(client)
+
+        assert 'Replica Intro' in client.get(COURSE_PAGE).text
+        assert replica.healthy
+
+    def test_without_replicas_everything_reads_the_primary(self, urls, make_app):
+        """Test that no configured replicas leaves routing untouched"""
+        app = make_app(urls[0])
+        client = app.test_client()
+        log_in(client)
+
+        assert 'replicas' not in app.extensions
+        assert 'Primary Intro' in client.get(COURSE_PAGE).text
@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy.exc import OperationalError, IntegrityError
+from models.user import User
+import retry
+from metrics import registry, render
+
+def deadlock():
+    """A DBAPIError shaped like the pyodbc error SQL Server raises for a deadlock victim"""
+    orig = Exception('40001', '[40001] [Microsoft][ODBC Driver 17 for SQL Server][SQL Server]'
+                              'Transaction (Process ID 52) was deadlocked on lock resources with another '
+                              'process and has been chosen as the deadlock victim. Rerun the transaction. (1205)')
+    return OperationalError("UPDATE courses SET seats_left=?", {}, orig)
+
+class TestRetry:
+    """Tests for retry.py"""
+    
+    @pytest.fixture(autouse=True)
+    def fast_retries(self, app):
+        app.config.update(DB_RETRY_ATTEMPTS=3, DB_RETRY_BASE_DELAY=0, DB_RETRY_MAX_DELAY=0)
+        retry.reset_retry_stats()
+        yield
+        retry.reset_retry_stats()
+    
+    def test_is_retryable(self):
+        """Test classification of database errors"""
+        assert retry.is_retryable(deadlock())
+        assert retry.is_retryable(OperationalError("stmt", {}, Exception("database is locked")))
+        assert not retry.is_retryable(IntegrityError("stmt", {}, Exception("UNIQUE constraint failed")))
+        assert not retry.is_retryable(ValueError("not a database error"))
+        # The COMMIT may have landed before the connection dropped
+        assert not retry.is_retryable(OperationalError("COMMIT", {}, Exception("Communication link failure"),
+                                                       connection_invalidated=True))
+    
+    def test_backoff_delay_bounded(self):
+        """Test that the jittered delay never exceeds the cap"""
+        for attempt in range(1, 10):
+            assert 0 <= retry.backoff_delay(attempt, 0.05, 0.2) <= 0.2
+    
+    def test_replays_until_success(self, app, session_db):
+        """Test that a deadlocked transaction is replayed and committed"""
+        calls = []
+        
+        def work():
+            calls.append(1)
+            session_db.add(User(name=f"User{len(calls)}", email=f"user{len(calls)}@test.com", role="student"))
+            if len(calls) < 3:
+                session_db.flush()
+                raise deadlock()
+            return "done"
+        
+        with app.test_request_context():
+            assert retry.run_in_transaction(work, name="student.enroll_course") == "done"
+        
+        assert len(calls) == 3
+        # Only the successful attempt was committed
+        assert [user.email for user in User.query.all()] == ["user3@test.com"]
+        assert retry.retry_stats()["student.enroll_course"] == {'calls': 1, 'retries': 2, 'aborts': 0}
+    
+    def test_aborts_after_budget(self, app, session_db):
+        """Test that the error surfaces once the attempt budget is spent"""
+        def work():
+            raise deadlock()
+        
+        with app.test_request_context():
+            with pytest.raises(OperationalError):
+                retry.run_in_transaction(work, name="ta.submit_grade")
+        
+        assert retry.retry_stats()["ta.submit_grade"] == {'calls': 1, 'retries': 2, 'aborts': 1}
+    
+    def test_counters_exported_to_metrics(self, app, session_db):
+        """Test that calls, retries and aborts per route show up in the /metrics exposition"""
+        registry.clear()
+        
+        def work():
+            raise deadlock()
+        
+        with app.test_request_context():
+            with pytest.raises(OperationalError):
+                retry.run_in_transaction(work, name="ta.submit_grade")
+        
+        text = render(registry.snapshot())
+        assert 'db_transactions_total{endpoint="ta.submit_grade"} 1' in text
+        assert 'db_transaction_retries_total{endpoint="ta.submit_grade"} 2' in text
+        assert 'db_transaction_aborts_total{endpoint="ta.submit_grade"} 1' in text
+        registry.clear()
+    
+    def test_non_retryable_not_replayed(self, app, session_db):
+        """Test that ordinary errors are raised immediately"""
+        calls = []
+        
+        def work():
+            calls.append(1)
+            raise ValueError("bad input")
+        
+        with app.test_request_context():
+            with pytest.raises(ValueError):
+                retry.run_in_transaction(work, name="student.drop_course")
+        assert len(calls) == 1
@@ -0,0 +1,235 @@
+import os
+import stat
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import session_store
+from configtest import make_app  # noqa: F401 (fixture)
+from session_store import MemoryStore, SQLiteStore
+
+
+def add_session_routes(app):
+    @app.route('/set/<value>')
+    def set_value(value):
+        from flask import session
+        session['value'] = value
+        return 'ok'
+
+    @app.route('/get')
+    def get_value():
+        from flask import session
+        return session.get('value', '-')
+
+    @app.route('/login-as/<int:user_id>')
+    def login_as(user_id):
+        from flask import session
+        session['user_id'] = user_id
+        return 'ok'
+
+    @app.route('/clear')
+    def clear():
+        from flask import session
+        session.clear()
+        return 'ok'
+
+    return app
+
+
+def sid_of(client, app):
+    cookie = client.get_cookie(app.config['SESSION_COOKIE_NAME'])
+    return cookie.value if cookie else None
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def app(request, tmp_path, make_app):
+    return add_session_routes(make_app(SESSION_TYPE=request.param,
+                                       SESSION_SQLITE_PATH=str(tmp_path / 'sessions.db')))
+
+
+class CountingStore:
+    """Wraps a store and counts writes"""
+
+    def __init__(self, store):
+        self.store = store
+        self.writes = []
+
+    def __getattr__(self, name):
+        attr = getattr(self.store, name)
+        if name in ('set', 'touch', 'delete'):
+            def record(*args):
+                self.writes.append(name)
+                return attr(*args)
+            return record
+        return attr
+
+
+class TestServerSessions:
+    """Tests for the server-side session interface"""
+
+    def test_cookie_carries_only_the_id(self, app):
+        """Test that data stays on the server and the cookie holds a random id"""
+        client = app.test_client()
+        client.get('/set/secret-value')
+
+        sid = sid_of(client, app)
+        assert 'secret' not in sid
+        assert app.extensions['session_store'].get(sid)[0] == {'value': 'secret-value'}
+        assert client.get('/get').text == 'secret-value'
+
+    def test_lazy_writes(self, app):
+        """Test that requests that do not modify the session do not write it"""
+        counting = CountingStore(app.extensions['session_store'])
+        app.session_interface.store = counting
+        client = app.test_client()
+
+        client.get('/get')
+        assert counting.writes == []
+        assert sid_of(client, app) is None
+
+        client.get('/set/a')
+        client.get('/get')
+        client.get('/get')
+        assert counting.writes == ['set']
+
+    def test_expiry_refreshed_when_half_spent(self, app):
+        """Test that an unmodified session is touched once less than half its lifetime remains"""
+        counting = CountingStore(app.extensions['session_store'])
+        app.session_interface.store = counting
+        client = app.test_client()
+        client.get('/set/a')
+        sid = sid_of(client, app)
+        data, _ = counting.get(sid)
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        counting.store.set(sid, data, time.time() + lifetime / 4)
+
+        client.get('/get')
+
+        assert counting.writes == ['set', 'touch']
+        assert counting.get(sid)[1] > time.time() + lifetime * 0.9
+
+    def test_new_id_when_user_changes(self, app):
+        """Test that logging in replaces the session id and drops the old one"""
+        store = app.extensions['session_store']
+        client = app.test_client()
+        client.get('/set/a')
+        before = sid_of(client, app)
+
+        client.get('/login-as/7')
+        after = sid_of(client, app)
+
+        assert after != before
+        assert store.get(before) is None
+        assert store.get(after)[0] == {'value': 'a', 'user_id': 7}
+
+    def test_clear_deletes_session(self, app):
+        """Test that clearing the session removes it from the store and the cookie"""
+        store = app.extensions['session_store']
+        client = app.test_client()
+        client.get('/login-as/7')
+        sid = sid_of(client, app)
+
+        client.get('/clear')
+
+        assert store.get(sid) is None
+        assert sid_of(client, app) is None
+
+    def test_revoke_user_sessions(self, app):
+        """Test that revoking a user ends every one of their sessions"""
+        clients = [app.test_client() for _ in range(3)]
+        for client, user_id in zip(clients, (7, 7, 8)):
+            client.get(f'/login-as/{user_id}')
+
+        with app.app_context():
+            assert session_store.revoke_user_sessions([7]) == 2
+
+        assert clients[0].get('/get').text == '-'
+        assert app.extensions['session_store'].get(sid_of(clients[1], app)) is None
+        assert app.extensions['session_store'].get(sid_of(clients[2], app)) is not None
+
+    def test_unknown_id_starts_new_session(self, app):
+        """Test that a forged or expired id gets a fresh session, not an error"""
+        client = app.test_client()
+        client.set_cookie(app.config['SESSION_COOKIE_NAME'], 'forged')
+
+        assert client.get('/get').text == '-'
+        client.get('/set/b')
+        assert sid_of(client, app) != 'forged'
+
+
+class TestStores:
+    """Tests for the memory and SQLite session stores"""
+
+    @pytest.fixture(params=['memory', 'sqlite'])
+    def store(self, request, tmp_path):
+        return MemoryStore() if request.param == 'memory' else SQLiteStore(str(tmp_path / 's.db'))
+
+    def test_expired_entries_hidden_and_swept(self, store):
+        """Test that expired sessions are not returned and sweep deletes them"""
+        store.set('old', {'user_id': 1}, time.time() - 1)
+        store.set('live', {'user_id': 2}, time.time() + 60)
+
+        assert store.get('old') is None
+        assert store.sweep() <= 1
+        assert len(store) == 1
+        assert store.get('live')[0] == {'user_id': 2}
+
+    def test_memory_store_evicts_least_recently_used(self):
+        """Test that the memory store keeps at most max_entries, dropping the least recently used"""
+        store = MemoryStore(max_entries=2)
+        expires = time.time() + 60
+        store.set('a', {}, expires)
+        store.set('b', {}, expires)
+        store.get('a')
+        store.set('c', {}, expires)
+
+        assert store.get('b') is None
+        assert store.get('a') is not None
+        assert store.get('c') is not None
+
+    def test_sqlite_store_shared_between_instances(self, tmp_path):
+        """Test that two stores on one file (two workers) see the same sessions"""
+        path = str(tmp_path / 'shared.db')
+        SQLiteStore(path).set('sid', {'user_id': 3, 'when': 'now'}, time.time() + 60)
+
+        assert SQLiteStore(path).get('sid')[0] == {'user_id': 3, 'when': 'now'}
+
+    def test_sqlite_files_private(self, tmp_path):
+        """Test that the session database and its WAL/SHM files are readable by the owner only"""
+        path = str(tmp_path / 'private.db')
+        store = SQLiteStore(path)
+        store.set('sid', {'user_id': 1, 'role': 'admin'}, time.time() + 60)
+
+        for name in (path, path + '-wal', path + '-shm'):
+            assert stat.S_IMODE(os.stat(name).st_mode) == 0o600
+
+    def test_sqlite_default_path_in_instance_folder(self, tmp_path):
+        """Test that without SESSION_SQLITE_PATH the file goes in the instance folder, not the temp dir"""
+        app = SimpleNamespace(config={'SESSION_TYPE': 'sqlite'}, instance_path=str(tmp_path / 'instance'))
+
+        store = session_store.make_store(app)
+
+        assert store.path == str(tmp_path / 'instance' / 'sessions.db')
+        assert stat.S_IMODE(os.stat(tmp_path / 'instance').st_mode) == 0o700
+
+    def test_sweep_command(self, tmp_path, make_app):
+        """Test that the CLI command deletes expired sessions"""
+        app = make_app(SESSION_TYPE='sqlite', SESSION_SQLITE_PATH=str(tmp_path / 's.db'))
+        app.extensions['session_store'].set('old', {}, time.time() - 1)
+
+        result = app.test_cli_runner().invoke(args=['sweep-sessions'])
+
+        assert 'Deleted 1 expired sessions' in result.output
+
+    def test_cookie_type_keeps_flask_sessions(self, make_app):
+        """Test that SESSION_TYPE=cookie leaves Flask's signed-cookie sessions in place"""
+        app = make_app(SESSION_TYPE='cookie')
+
+        assert 'session_store' not in app.extensions
+        assert type(app.session_interface).__name__ == 'SecureCookieSessionInterface'
+
+    def test_unknown_type(self, make_app):
+        """Test that a misspelled SESSION_TYPE fails at startup"""
+        with pytest.raises(ValueError):
+            make_app(SESSION_TYPE='filesystem')
@@ -0,0 +1,169 @@
+import threading
+import time
+
+import pytest
+from flask import g, session
+from sqlalchemy import event
+
+from configtest import make_app  # noqa: F401 (fixture)
+from extensions import db
+from models import read_models
+from models.courses import Course
+from query_counter import QueryCounter
+from single_flight import SingleFlight
+
+
+COURSES = [{'id': i, 'code': f'CS10{i}', 'name': f'Course {i}', 'credits': 3, 'max_seats': 30, 'seats_left': 30}
+           for i in range(1, 4)]
+
+
+def run_together(target, count):
+    """Start count threads running target and return their results"""
+    results = [None] * count
+
+    def run(i):
+        results[i] = target()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(rows=[(Course, COURSES)])
+
+
+class TestSingleFlight:
+    """Tests for sharing identical concurrent calls"""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Test that callers arriving while a call is in flight get its result"""
+        group = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def load():
+            calls.append(1)
+            release.wait()
+            return ['row']
+
+        leader = threading.Thread(target=group.do, args=('key', load))
+        leader.start()
+        while not group.stats()['in_flight']:
+            time.sleep(0.001)
+        results = []
+        followers = [threading.Thread(target=lambda: results.append(group.do('key', load))) for _ in range(5)]
+        for follower in followers:
+            follower.start()
+        while group.stats()['shared'] < 5:
+            time.sleep(0.001)
+        release.set()
+        leader.join()
+        for follower in followers:
+            follower.join()
+
+        assert len(calls) == 1
+        assert results == [['row']] * 5
+        assert group.stats() == {'executed': 1, 'shared': 5, 'cached': 0, 'in_flight': 0}
+
+    def test_error_shared_then_retried(self):
+        """Test that followers get the leader's exception and the next call runs again"""
+        group = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def fail():
+            started.set()
+            release.wait()
+            raise ValueError('database went away')
+
+        def call():
+            try:
+                group.do('key', fail)
+            except ValueError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=call)
+        follower.start()
+        while group.stats()['shared'] < 1:
+            time.sleep(0.001)
+        release.set()
+        leader.join()
+        follower.join()
+
+        assert len(errors) == 2 and errors[0] is errors[1]
+        assert group.do('key', lambda: 'ok') == 'ok'
+
+    def test_ttl(self):
+        """Test that a result is reused within the TTL and only in flight without one"""
+        cached = SingleFlight(ttl=60)
+        assert cached.do('key', lambda: 1) == 1
+        assert cached.do('key', lambda: 2) == 1
+        assert cached.stats()['cached'] == 1
+
+        uncached = SingleFlight()
+        assert uncached.do('key', lambda: 1) == 1
+        assert uncached.do('key', lambda: 2) == 2
+
+
+class TestCoalescedReads:
+    """Tests for the read models sharing concurrent queries"""
+
+    def test_identical_searches_run_one_query(self, app):
+        """Test that concurrent identical catalog searches share one database query"""
+        with app.app_context():
+            engine = db.engine
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def slow_search(conn, cursor, statement, parameters, context, executemany):
+            if 'FROM courses' in statement:
+                time.sleep(0.3)
+
+        def search():
+            with app.app_context():
+                return read_models.search_courses('CS')
+
+        with QueryCounter(engine) as counter:
+            results = run_together(search, 8)
+
+        assert counter.count == 1
+        assert all(result == results[0] and len(result) == 3 for result in results)
+        assert app.extensions['single_flight'].stats()['shared'] == 7
+
+    def test_different_arguments_not_shared(self, app):
+        """Test that calls with different arguments run separately"""
+        with app.app_context():
+            assert len(read_models.search_courses('CS101')) == 1
+            assert len(read_models.search_courses('')) == 3
+
+        assert app.extensions['single_flight'].stats()['executed'] == 2
+
+    def test_writers_read_their_own(self, app):
+        """Test that a request that has written or is pinned to the primary runs its own query"""
+        group = app.extensions['single_flight']
+        with app.test_request_context('/student/search'):
+            g._db_wrote = True
+            read_models.search_courses('CS')
+        with app.test_request_context('/student/search'):
+            session['_primary_until'] = time.time() + 60
+            read_models.search_courses('CS')
+        with app.test_request_context('/student/search'):
+            read_models.search_courses('CS')
+
+        assert group.stats()['executed'] == 1
+
+    def test_disabled(self, make_app):
+        """Test that SINGLE_FLIGHT_ENABLED off leaves every call to run on its own"""
+        app = make_app(rows=[(Course, COURSES)], SINGLE_FLIGHT_ENABLED=False)
+
+        with app.app_context():
+            assert len(read_models.search_courses('')) == 3
+        assert 'single_flight' not in app.extensions
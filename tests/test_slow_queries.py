@@ -0,0 +1,163 @@
+import logging
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+import slow_queries
+from configtest import log_in, make_app  # noqa: F401 (make_app is a fixture)
+from extensions import db
+from models.courses import Course
+from models.user import User
+from profiler import PROJECT_DIR
+from slow_queries import PlanCapturer, code_location, qualified_name
+
+
+ROWS = [
+    (User, [{'id': 1, 'name': 'Sam Student', 'email': 'sam@uni.edu', 'password_hash': 'x', 'role': 'student'}]),
+    (Course, [{'id': 1, 'code': 'CS101', 'name': 'Intro', 'credits': 3, 'max_seats': 30, 'seats_left': 30}]),
+]
+
+
+# Every statement is slow
+ALL_SLOW_MS = 0.0001
+
+
+def slow_records(caplog, fragment):
+    slow_queries.capturer.wait()
+    return [record.slow_query for record in caplog.records
+            if record.name == 'slow_queries' and fragment in record.slow_query['statement']]
+
+
+def fake_frame(path, name, back=None):
+    code = SimpleNamespace(co_filename=os.path.join(PROJECT_DIR, *path.split('/')), co_name=name, co_qualname=name)
+    return SimpleNamespace(f_code=code, f_lineno=1, f_back=back)
+
+
+class Enroller:
+    def where(self):
+        return sys._getframe()
+
+
+@pytest.fixture(autouse=True)
+def capturer(monkeypatch):
+    capturer = PlanCapturer()
+    monkeypatch.setattr(slow_queries, 'capturer', capturer)
+    return capturer
+
+
+class TestSlowQueryLog:
+    """Tests for logging statements over the threshold"""
+
+    def test_logs_location_parameters_and_plan(self, caplog, make_app):
+        """Test that a slow query is logged with its caller, parameters and SQLite plan"""
+        app = make_app(rows=ROWS, SLOW_QUERY_MS=ALL_SLOW_MS)
+        caplog.set_level(logging.WARNING, logger='slow_queries')
+        with app.app_context():
+            Course.search_courses('CS')
+
+        record, = slow_records(caplog, 'FROM courses')
+        assert record['location'].startswith('Course.search_courses (models/courses.py:')
+        assert '%CS%' in record['parameters']
+        assert record['endpoint'] is None
+        assert record['duration_ms'] > 0
+        assert any('courses' in line for line in record['plan'])
+
+    def test_request_endpoint(self, caplog, make_app):
+        """Test that a query issued while serving a request names its endpoint"""
+        app = make_app(rows=ROWS, SLOW_QUERY_MS=ALL_SLOW_MS)
+        caplog.set_level(logging.WARNING, logger='slow_queries')
+        client = app.test_client()
+        log_in(client, 1, 'student')
+
+        client.get('/student/course/1').close()
+
+        records = slow_records(caplog, 'FROM courses')
+        assert records and all(record['endpoint'] == 'student.view_course' for record in records)
+
+    def test_fast_queries_not_logged(self, caplog, make_app):
+        """Test that statements under the threshold are not logged"""
+        app = make_app(rows=ROWS, SLOW_QUERY_MS=60000)
+        caplog.set_level(logging.WARNING, logger='slow_queries')
+        with app.app_context():
+            Course.search_courses('CS')
+
+        assert slow_records(caplog, 'FROM courses') == []
+
+    def test_plan_errors_are_logged(self, tmp_path, caplog, make_app):
+        """Test that a failing plan still logs the query, with the error"""
+        app = make_app(rows=ROWS, SLOW_QUERY_MS=ALL_SLOW_MS)
+        caplog.set_level(logging.WARNING, logger='slow_queries')
+        with app.app_context():
+            Course.search_courses('CS')
+            # Plans are taken on a connection of their own; make it fail
+            slow_queries.capturer.wait()
+            (tmp_path / 'app.db').unlink()
+            slow_queries.capturer._connections.clear()
+            slow_queries.capturer.interval = 0
+            db.session.get(User, 1)
+
+        record, = slow_records(caplog, 'FROM users')
+        assert record['plan'] is None and record['plan_error']
+
+
+class TestCodeLocation:
+    """Tests for naming the application code that issued a query"""
+
+    def test_skips_libraries_inside_the_project(self):
+        """Test that a virtualenv inside the project is not taken for application code"""
+        caller = fake_frame('models/courses.py', 'Course.search_courses')
+        library = fake_frame('.venv/lib/python3.10/site-packages/sqlalchemy/event/attr.py',
+                             '_CompoundListener.__call__', back=caller)
+
+        assert code_location(library) == 'Course.search_courses (models/courses.py:1)'
+
+    def test_class_name_without_co_qualname(self, caplog, monkeypatch, make_app):
+        """Test that before Python 3.11 the class comes from self, cls or the module"""
+        monkeypatch.setattr(slow_queries, 'HAS_QUALNAME', False)
+        monkeypatch.setattr(slow_queries, '_qualnames', {})
+        assert qualified_name(Enroller().where()) == 'Enroller.where'
+
+        app = make_app(rows=ROWS, SLOW_QUERY_MS=ALL_SLOW_MS)
+        caplog.set_level(logging.WARNING, logger='slow_queries')
+        with app.app_context():
+            Course.search_courses('CS')
+
+        record, = slow_records(caplog, 'FROM courses')
+        assert record['location'].startswith('Course.search_courses (models/courses.py:')
+
+
+class TestPlanRateLimit:
+    """Tests for limiting how many plans are taken"""
+
+    def test_one_plan_per_fingerprint_per_interval(self, caplog, capturer, make_app):
+        """Test that repeats of a statement within the interval are logged without a plan"""
+        app = make_app(rows=ROWS, SLOW_QUERY_MS=ALL_SLOW_MS)
+        caplog.set_level(logging.WARNING, logger='slow_queries')
+        with app.app_context():
+            for term in ('CS', 'MA', 'PH'):
+                Course.search_courses(term)
+
+        records = slow_records(caplog, 'FROM courses')
+        assert len(records) == 3
+        assert sum(1 for record in records if record['plan']) == 1
+        assert capturer.captured == 1 and capturer.skipped == 2
+
+    def test_plans_per_minute(self):
+        """Test that distinct statements are capped per minute"""
+        capturer = PlanCapturer(interval=600, per_minute=2)
+
+        allowed = [capturer.allow(f'SELECT * FROM t{i}') for i in range(5)]
+
+        assert allowed == [True, True, False, False, False]
+
+    def test_plans_off(self, caplog, capturer, make_app):
+        """Test that SLOW_QUERY_PLANS off logs without plans"""
+        app = make_app(rows=ROWS, SLOW_QUERY_MS=ALL_SLOW_MS, SLOW_QUERY_PLANS=False)
+        caplog.set_level(logging.WARNING, logger='slow_queries')
+        with app.app_context():
+            Course.search_courses('CS')
+
+        record, = slow_records(caplog, 'FROM courses')
+        assert record['plan'] is None
+        assert capturer.captured == 0
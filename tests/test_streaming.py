@@ -0,0 +1,106 @@
+import pytest
+
+from models.courses import Course
+from models.user import User
+from streaming import Rows
+
+
+@pytest.fixture
+def admin_client(app, session_db):
+    admin = User(name='Ada Admin', email='admin@uni.edu', role='admin', password='password123')
+    session_db.add(admin)
+    session_db.commit()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = admin.id
+        sess['role'] = 'admin'
+    return client
+
+
+class TestRows:
+    """Tests for the emptiness-testable row generator"""
+
+    def test_empty(self):
+        """Test that an empty generator is false and yields nothing"""
+        rows = Rows(iter([]))
+
+        assert not rows
+        assert list(rows) == []
+
+    def test_first_row_replayed(self):
+        """Test that the row fetched to answer bool() is still yielded"""
+        rows = Rows(x for x in ['a', 'b', 'c'])
+
+        assert rows
+        assert list(rows) == ['a', 'b', 'c']
+
+    def test_lazy_until_used(self):
+        """Test that nothing is fetched before the template looks at the rows"""
+        fetched = []
+
+        def generate():
+            fetched.append(1)
+            yield 'a'
+
+        rows = Rows(generate())
+        assert fetched == []
+        assert list(rows) == ['a']
+
+
+class TestStreamedListings:
+    """Tests for the streamed admin search pages"""
+
+    def test_searchpeople_streams_every_match(self, admin_client, session_db):
+        """Test that the people search is streamed and contains every matching user"""
+        for i in range(30):
+            session_db.add(User(name=f'Student {i:03d}', email=f's{i}@uni.edu', role='student'))
+        session_db.commit()
+
+        response = admin_client.get('/admin/searchpeople?search=Student')
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        body = response.get_data(as_text=True)
+        assert body.count('--- (Student)') == 30
+        assert 'Ada Admin' not in body
+
+    def test_searchpeople_no_results(self, admin_client):
+        """Test that an empty search still shows the no-results message"""
+        response = admin_client.get('/admin/searchpeople?search=nobody')
+
+        assert 'No people found for' in response.get_data(as_text=True)
+
+    def test_first_chunk_before_last_row(self, admin_client, session_db):
+        """Test that the page starts arriving before the last row is rendered"""
+        for i in range(30):
+            session_db.add(User(name=f'Student {i:03d}', email=f's{i}@uni.edu', role='student'))
+        session_db.commit()
+
+        response = admin_client.get('/admin/searchpeople?search=Student', buffered=False)
+        chunks = iter(response.response)
+        first = next(chunks)
+        rest = ''.join(chunk.decode() if isinstance(chunk, bytes) else chunk for chunk in chunks)
+        response.close()
+
+        first = first.decode() if isinstance(first, bytes) else first
+        assert 'Search People' in first
+        assert 'Student 029' not in first
+        assert 'Student 029' in rest
+
+    def test_searchcourse_loads_staff_with_courses(self, admin_client, session_db):
+        """Test that the course search shows instructor and TA from the streamed query"""
+        instructor = User(name='Ian Instructor', email='ian@uni.edu', role='instructor')
+        ta = User(name='Tara TA', email='tara@uni.edu', role='ta')
+        session_db.add_all([instructor, ta])
+        session_db.flush()
+        session_db.add(Course(code='CS101', name='Intro', instructor_id=instructor.id, ta_id=ta.id))
+        session_db.add(Course(code='CS102', name='Data'))
+        session_db.commit()
+
+        response = admin_client.get('/admin/searchcourse?search=CS')
+
+        body = response.get_data(as_text=True)
+        assert 'CS101 - Intro' in body
+        assert 'Instructor: Ian Instructor' in body
+        assert 'TA: Tara TA' in body
+        assert 'CS102 - Data' in body
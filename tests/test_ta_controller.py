@@ -37,15 +37,15 @@ class TestTAController:
         response = client.post('/ta/search_course', data=data, follow_redirects=True)
         assert response.status_code == 200
     
-    @patch('controllers.TA_controller.User')
-    def test_search_student(self, mock_user, client, auth_client):
+    @patch('controllers.TA_controller.read_models')
+    def test_search_student(self, mock_read_models, client, auth_client):
         """Test student search"""
         auth_client.login_as('ta', 3)
         
         # Mock user search results
         mock_student = Mock()
         mock_student.role = 'student'
-        mock_user.search_users.return_value = [mock_student]
+        mock_read_models.search_people.return_value = [mock_student]
         
         data = {'query': 'john'}
         response = client.post('/ta/search_student', data=data, follow_redirects=True)
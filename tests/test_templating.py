@@ -0,0 +1,67 @@
+import templating
+from configtest import make_app  # noqa: F401 (fixture)
+
+
+def cache_settings(cache_dir, **settings):
+    """Settings for an app with its template bytecode cache in cache_dir, on an in-memory database"""
+    return {'url': 'sqlite:///:memory:', 'TEMPLATE_BYTECODE_CACHE': True, 'TEMPLATE_CACHE_DIR': str(cache_dir),
+            **settings}
+
+
+class TestTemplating:
+    """Tests for the Jinja bytecode cache and template warm-up"""
+
+    def test_warm_templates_loads_every_template(self, tmp_path, make_app):
+        """Test that warm-up compiles every .html template into the bytecode cache"""
+        app = make_app(**cache_settings(tmp_path))
+
+        timings = templating.warm_templates(app)
+
+        assert 'auth/login.html' in timings
+        assert 'admin/searchpeople.html' in timings
+        assert not any(name.endswith('.css') for name in timings)
+        assert len(list(tmp_path.iterdir())) == len(timings)
+
+    def test_bytecode_cache_reused_by_new_app(self, tmp_path, monkeypatch, make_app):
+        """Test that a second app loads templates from the cache instead of compiling"""
+        templating.warm_templates(make_app(**cache_settings(tmp_path)))
+        app = make_app(**cache_settings(tmp_path))
+        compiled = []
+        original = app.jinja_env.compile
+        monkeypatch.setattr(app.jinja_env, 'compile',
+                            lambda *args, **kwargs: compiled.append(args) or original(*args, **kwargs))
+
+        app.jinja_env.get_template('admin/searchcourse.html')
+
+        assert compiled == []
+
+    def test_warmup_in_create_app(self, tmp_path, make_app):
+        """Test that TEMPLATE_WARMUP loads the templates before the first request"""
+        app = make_app(**cache_settings(tmp_path, TEMPLATE_WARMUP=True))
+
+        cached = {name for _, name in app.jinja_env.cache.keys()}
+        assert cached == set(templating.template_names(app))
+        assert app.test_client().get('/login').status_code == 200
+
+    def test_broken_template_logged_not_raised(self, tmp_path, caplog, make_app):
+        """Test that a template that fails to compile does not stop the warm-up"""
+        (tmp_path / 'templates').mkdir()
+        (tmp_path / 'templates' / 'broken.html').write_text('{% if %}')
+        app = make_app(**cache_settings(tmp_path / 'cache'))
+        app.jinja_loader.searchpath.append(str(tmp_path / 'templates'))
+
+        timings = templating.warm_templates(app)
+
+        assert 'broken.html' not in timings
+        assert 'auth/login.html' in timings
+        assert 'broken.html failed to compile' in caplog.text
+
+    def test_compile_templates_command(self, tmp_path, make_app):
+        """Test that the CLI command fills the bytecode cache"""
+        app = make_app(**cache_settings(tmp_path))
+
+        result = app.test_cli_runner().invoke(args=['compile-templates'])
+
+        assert result.exit_code == 0
+        assert 'Loaded' in result.output
+        assert any(tmp_path.iterdir())
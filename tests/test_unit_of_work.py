@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import event
+from models.user import User
+from models.courses import Course
+from models.announcement import Announcement
+from extensions import db
+import unit_of_work
+
+class TestUnitOfWork:
+    """Tests for unit_of_work.py"""
+    
+    @pytest.fixture
+    def course(self, session_db):
+        instructor = User(name="Inst", email="inst@test.com", role="instructor", password="password123")
+        session_db.add(instructor)
+        session_db.commit()
+        course = Course(code="CS101", name="CS 101", instructor_id=instructor.id)
+        session_db.add(course)
+        session_db.commit()
+        return course
+    
+    @pytest.fixture
+    def commits(self, session_db):
+        """Record every session commit"""
+        recorded = []
+        listener = lambda session: recorded.append(session)
+        event.listen(db.Session, 'after_commit', listener)
+        yield recorded
+        event.remove(db.Session, 'after_commit', listener)
+    
+    def test_commit_outside_unit_of_work(self, course, commits):
+        """Test that model methods still commit immediately by default"""
+        assert not unit_of_work.in_unit_of_work()
+        course.add_announcement("A", "content", course.instructor_id)
+        assert len(commits) == 1
+    
+    def test_unit_of_work_commits_once(self, course, commits):
+        """Test that several model calls share a single commit"""
+        with unit_of_work.unit_of_work():
+            assert unit_of_work.in_unit_of_work()
+            first = course.add_announcement("A", "content", course.instructor_id)
+            course.add_announcement("B", "content", course.instructor_id)
+            assert first.id is not None  # flushed, so ids are available
+            assert len(commits) == 0
+        assert len(commits) == 1
+        assert Announcement.query.count() == 2
+    
+    def test_unit_of_work_rolls_back_on_error(self, course, commits):
+        """Test that an error discards everything staged in the unit of work"""
+        with pytest.raises(RuntimeError):
+            with unit_of_work.unit_of_work():
+                course.add_announcement("A", "content", course.instructor_id)
+                raise RuntimeError("boom")
+        assert len(commits) == 0
+        assert Announcement.query.count() == 0
+    
+    def test_nested_unit_of_work(self, course, commits):
+        """Test that nested blocks join the outermost transaction"""
+        with unit_of_work.unit_of_work():
+            with unit_of_work.unit_of_work():
+                course.add_announcement("A", "content", course.instructor_id)
+            assert len(commits) == 0
+        assert len(commits) == 1
+    
+    def test_legacy_commits_opt_out(self, course, commits):
+        """Test that legacy_commits restores immediate commits"""
+        with unit_of_work.unit_of_work():
+            with unit_of_work.legacy_commits():
+                course.add_announcement("A", "content", course.instructor_id)
+                assert len(commits) == 1
+            assert unit_of_work.in_unit_of_work()
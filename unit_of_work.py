@@ -0,0 +1,118 @@
+"""Request-scoped unit of work.
+
+With UNIT_OF_WORK enabled every request runs inside one transaction: model
+methods call commit() from this module, which only flushes (so generated ids
+are available) while a unit of work is open, and the request commits once in
+after_request. Any exception rolls the whole request back.
+
+Outside a unit of work (CLI commands, scripts, tests, or code wrapped in
+legacy_commits) commit() commits immediately, exactly like the old
+db.session.commit() calls did.
+"""
+from contextlib import contextmanager
+
+from flask import g, has_app_context
+
+from extensions import db
+
+
+def in_unit_of_work():
+    """True when commits are currently deferred to an enclosing unit of work"""
+    if not has_app_context():
+        return False
+    return g.get('_uow_depth', 0) > 0 and not g.get('_uow_legacy', False)
+
+
+def commit():
+    """Commit the session, or just flush it when a unit of work is open"""
+    if in_unit_of_work():
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+@contextmanager
+def unit_of_work():
+    """Group everything inside the block into one transaction.
+    
+    Nested blocks join the outermost one; only the outermost block commits
+    (or rolls back on error).
+    """
+    depth = g.get('_uow_depth', 0)
+    g._uow_depth = depth + 1
+    try:
+        yield db.session
+        if depth == 0:
+            db.session.commit()
+    except Exception:
+        if depth == 0:
+            db.session.rollback()
+        raise
+    finally:
+        g._uow_depth = depth
+
+
+@contextmanager
+def transaction():
+    """Own a transaction boundary, committing at exit even inside an open unit of work.
+    
+    Used where a block must be replayable as a whole (see retry.py): work
+    staged before the block is committed along with it.
+    """
+    depth = g.get('_uow_depth', 0)
+    legacy = g.get('_uow_legacy', False)
+    g._uow_depth = depth + 1
+    g._uow_legacy = False
+    try:
+        yield db.session
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        g._uow_depth = depth
+        g._uow_legacy = legacy
+
+
+@contextmanager
+def legacy_commits():
+    """Opt out of the unit of work: commit() commits immediately again.
+    
+    Usable as a context manager or as a view decorator.
+    """
+    previous = g.get('_uow_legacy', False)
+    g._uow_legacy = True
+    try:
+        yield
+    finally:
+        g._uow_legacy = previous
+
+
+def init_app(app):
+    """Open a unit of work around every request when UNIT_OF_WORK is enabled"""
+    if not app.config.get('UNIT_OF_WORK', False):
+        return
+    
+    @app.before_request
+    def _begin_unit_of_work():
+        g._uow_depth = 1
+    
+    @app.after_request
+    def _commit_unit_of_work(response):
+        if g.get('_uow_depth', 0) == 1:
+            g._uow_depth = 0
+            if response.status_code >= 500:
+                db.session.rollback()
+            else:
+                try:
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+        return response
+    
+    @app.teardown_request
+    def _rollback_unit_of_work(exc):
+        if g.get('_uow_depth', 0) > 0:
+            g._uow_depth = 0
+            db.session.rollback()
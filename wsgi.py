@@ -0,0 +1,4 @@
+"""Entry point for the production server (gunicorn wsgi:app)"""
+from app import create_app
+
+app = create_app('production')